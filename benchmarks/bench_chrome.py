@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del perfil ligero de Chrome (scraping_core.chrome)
+
+Sirve en local un listado sintético de 1000 filas de GeneraWeb como el de
+bench_tables, con las imágenes, fuentes, hoja de estilos y script de
+analítica que trae una página real (cada recurso con una latencia simulada),
+y lo carga con un Chrome arrancado como antes (--headless y las opciones de
+siempre) y con el perfil ligero (headless nuevo, sin imágenes, fuentes, CSS
+ni analítica). Mide:
+
+- el tiempo de driver.get hasta el evento load, la mejor y la mediana de
+  varias cargas;
+- las peticiones que llegan al servidor por carga;
+- el RSS de todo el árbol de procesos del driver (chromedriver y los
+  procesos de Chrome) tras las cargas, leído de /proc (solo Linux).
+
+Necesita Chrome y chromedriver instalados. Uso:
+python3 benchmarks/bench_chrome.py [cargas] [filas]
+"""
+
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_tables import EMPRESA_ROW, build_page  # noqa: E402
+from scraping_core.chrome import create_scraping_driver  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+# Latencia simulada de cada recurso (segundos)
+RESOURCE_DELAY = 0.05
+IMAGES = 30
+RESOURCES = (
+    '<link rel="stylesheet" href="/static/estilos.css">'
+    '<script src="/www.googletagmanager.com/gtm.js"></script>'
+    + ''.join(f'<img src="/static/logo{i}.png" width="64" height="64">' for i in range(IMAGES))
+)
+CSS = ("@font-face { font-family: 'Marca'; src: url('/static/marca.woff2') format('woff2'); }\n"
+       "body { font-family: 'Marca', sans-serif; background: url('/static/fondo.jpg'); }\n" * 20)
+# PNG de 1x1 con relleno hasta ~50 KB, como un logo de listado
+PNG = (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+       b'\x00\x00\x00\rIDATx\x9cc\xf8\xff\xff?\x00\x05\xfe\x02\xfe\xa7\x35\x81\x84\x00\x00\x00\x00IEND\xaeB`\x82')
+PNG += b'\x00' * (50 * 1024 - len(PNG))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    page = b''
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requests += 1
+        if self.path.startswith('/index.php'):
+            body, content_type = self.page, 'text/html; charset=utf-8'
+        else:
+            time.sleep(RESOURCE_DELAY)
+            if self.path.endswith('.css'):
+                body, content_type = CSS.encode(), 'text/css'
+            elif self.path.endswith('.js'):
+                body, content_type = b'window.dataLayer = [];' * 2000, 'application/javascript'
+            elif self.path.endswith('.woff2'):
+                body, content_type = b'\x00' * 80 * 1024, 'font/woff2'
+            else:
+                body, content_type = PNG, 'image/png'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _children(pid):
+    """PIDs de todos los descendientes de pid según /proc"""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # El nombre del proceso va entre paréntesis y puede tener espacios
+                    parents[int(entry)] = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    found, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        for child, parent in parents.items():
+            if parent == current:
+                found.append(child)
+                pending.append(child)
+    return found
+
+
+def tree_rss_mb(pid):
+    """RSS (MB) de pid y todos sus descendientes"""
+    total_kb = 0
+    for process in [pid] + _children(pid):
+        try:
+            with open(f'/proc/{process}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def measure(lightweight, url, loads):
+    """(ms de la mejor carga, ms de la mediana, peticiones por carga, MB de RSS del árbol de procesos)"""
+    start = time.perf_counter()
+    driver = create_scraping_driver(headless=True, lightweight=lightweight)
+    startup = time.perf_counter() - start
+    try:
+        driver.get(url)  # Primera carga (arranque del renderer), no se cuenta
+        _Handler.requests = 0
+        times = []
+        for _ in range(loads):
+            start = time.perf_counter()
+            driver.get(url)
+            times.append((time.perf_counter() - start) * 1000)
+        rows = driver.execute_script("return document.querySelectorAll('table.table tr.new_platform').length;")
+        rss = tree_rss_mb(driver.service.process.pid)
+        return min(times), statistics.median(times), _Handler.requests / loads, rss, startup, rows
+    finally:
+        driver.quit()
+
+
+def main():
+    loads = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    page = build_page(EMPRESA_ROW, rows)
+    _Handler.page = page.replace('</title>', '</title>' + RESOURCES, 1).encode('utf-8')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/index.php?s=home&page=1'
+
+    print(f"Listado de {rows} filas ({len(_Handler.page) // 1024} KB) con {IMAGES} imágenes, fuente, CSS y "
+          f"analítica ({RESOURCE_DELAY * 1000:.0f} ms por recurso); {loads} cargas por perfil")
+    print(f"{'Perfil':10} {'arranque':>9} {'mejor':>9} {'mediana':>9} {'peticiones':>11} {'RSS':>9}")
+    results = {}
+    for label, lightweight in (('anterior', False), ('ligero', True)):
+        best, median, requests, rss, startup, found = measure(lightweight, url, loads)
+        assert found == rows, f"{label}: {found} filas de {rows}"
+        results[label] = (best, median, rss)
+        print(f"{label:10} {startup:8.2f}s {best:7.0f}ms {median:7.0f}ms {requests:11.0f} {rss:7.0f}MB")
+    server.shutdown()
+
+    before, after = results['anterior'], results['ligero']
+    print(f"Carga {before[1] / after[1]:.1f}x más rápida (mediana), RSS {before[2] - after[2]:.0f} MB menos por driver")
+
+
+if __name__ == "__main__":
+    main()
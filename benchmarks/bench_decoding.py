@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de la decodificación de páginas HTML
+
+Compara el pipeline anterior de get_page_content (reintentar descompresión,
+escaneo base64 y chardet sobre todo el cuerpo) con scraping_core.HtmlDecoder
+sobre páginas sintéticas del tamaño de un listado de catálogo.
+
+Uso: python3 benchmarks/bench_decoding.py [repeticiones]
+"""
+
+import base64
+import gzip
+import os
+import sys
+import time
+import zlib
+
+import brotli
+import chardet
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping_core import HtmlDecoder
+
+
+def legacy_decode(response):
+    """Copia del pipeline que tenían los get_page_content antes del HtmlDecoder"""
+    raw_data = response.content
+    content_encoding = response.headers.get('Content-Encoding', '').lower()
+    if 'gzip' in content_encoding:
+        try:
+            raw_data = gzip.decompress(raw_data)
+        except Exception:
+            pass
+    elif 'deflate' in content_encoding:
+        try:
+            raw_data = zlib.decompress(raw_data)
+        except Exception:
+            pass
+    elif 'br' in content_encoding:
+        try:
+            raw_data = brotli.decompress(raw_data)
+        except Exception:
+            pass
+    try:
+        if all(c.isalnum() or c in '+/=\n\r' for c in raw_data.decode('ascii', errors='ignore')[:200]):
+            decoded = base64.b64decode(raw_data)
+            if b'<html' in decoded.lower():
+                raw_data = decoded
+    except Exception:
+        pass
+    detected = chardet.detect(raw_data)
+    encoding = detected.get('encoding') or response.apparent_encoding or 'utf-8'
+    return raw_data.decode(encoding, errors='replace')
+
+
+def build_page(n_items=400, meta=True):
+    """Genera un listado HTML parecido a los de los catálogos"""
+    head = '<meta charset="utf-8">' if meta else ''
+    rows = ''.join(
+        f'<li id="iid_{i}" class="list_index_item"><h3><a href="/es/p/{i}">Bomba centrífuga nº {i} - Hidráulica</a></h3>'
+        f'<p class="image"><img src="/img/{i}.jpg"></p><p class="sku"><strong>Código:</strong> ABC-{i}</p>'
+        f'<div class="text"><p>Descripción del producto {i}: presión máxima, caudal y conexión.</p></div></li>'
+        for i in range(n_items)
+    )
+    return f'<!DOCTYPE html><html><head>{head}<title>Catálogo</title></head><body><ul>{rows}</ul></body></html>'
+
+
+def make_response(body, content_type, url='https://www.example.com/es/productos'):
+    response = requests.Response()
+    response._content = body
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict({'Content-Type': content_type, 'Content-Encoding': 'gzip'})
+    return response
+
+
+def cpu_per_page(func, responses, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for response in responses:
+            func(response)
+    return (time.process_time() - start) / (repeat * len(responses)) * 1000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    html = build_page()
+    cases = {
+        'charset en Content-Type': make_response(html.encode('utf-8'), 'text/html; charset=utf-8'),
+        '<meta charset> sin cabecera': make_response(html.encode('utf-8'), 'text/html'),
+        'UTF-8 sin declarar': make_response(build_page(meta=False).encode('utf-8'), 'text/html'),
+        'Latin-1 sin declarar': make_response(build_page(meta=False).encode('latin-1'), 'text/html'),
+    }
+
+    print(f"Página de prueba: {len(html.encode('utf-8')) / 1024:.0f} KB, {repeat} repeticiones")
+    print(f"{'Caso':32} {'anterior (ms)':>14} {'nuevo (ms)':>12} {'ahorro':>8}")
+    for name, response in cases.items():
+        decoder = HtmlDecoder()
+        legacy_ms = cpu_per_page(legacy_decode, [response], repeat)
+        new_ms = cpu_per_page(decoder.decode, [response], repeat)
+        assert decoder.decode(response) == legacy_decode(response)
+        print(f"{name:32} {legacy_ms:14.2f} {new_ms:12.2f} {legacy_ms / max(new_ms, 1e-6):7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la ficha de producto de Bombas Bloch
+
+Compara el parse_detailed_product_info anterior, que lanzaba cada selector
+alternativo con select()/select_one()/find_all() sobre el documento entero
+(unos veinte recorridos), con el actual, que resuelve todos los selectores
+de SelectorSet en un solo recorrido del árbol lxml. Comprueba que el
+resultado es idéntico y muestra el tiempo de CPU por ficha.
+
+Uso: python3 benchmarks/bench_detail.py [repeticiones]
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.append(ROOT)
+
+from scraping_core import make_soup
+
+logging.disable(logging.WARNING)
+
+
+# Copia del parse_detailed_product_info anterior (sin los logs)
+
+def legacy_parse_detailed_product_info(html_content, base_url, product_url=''):
+    """Extrae la información detallada del HTML de la página de un producto"""
+    detailed_info = {
+        'imagenes_adicionales': [],
+        'urls_imagenes_adicionales': [],
+        'descripcion_completa': '',
+        'especificaciones': '',
+        'archivo_descarga': '',
+        'url_archivo_descarga': '',
+        'atributos': ''
+    }
+
+    if not html_content:
+        return detailed_info
+
+    soup = make_soup(html_content)
+
+    # Extraer imágenes adicionales de galería
+    gallery_selectors = [
+        '.product-gallery img',
+        '.product-images img',
+        '.gallery img',
+        '.slider img',
+        '[class*="gallery"] img',
+        '[class*="slider"] img',
+        '.product-image-gallery img',
+        '.thumbnails img'
+    ]
+
+    for selector in gallery_selectors:
+        images = soup.select(selector)
+        if images:
+            for img in images:
+                img_src = (
+                    img.get('src') or 
+                    img.get('data-src') or 
+                    img.get('data-large-image') or
+                    img.get('data-lazy-src')
+                )
+                if img_src:
+                    full_url = urljoin(base_url, img_src)
+                    if full_url not in detailed_info['urls_imagenes_adicionales']:
+                        detailed_info['urls_imagenes_adicionales'].append(full_url)
+                        detailed_info['imagenes_adicionales'].append(img_src.split('/')[-1].split('?')[0])
+            if detailed_info['imagenes_adicionales']:
+                break
+
+    # Extraer descripción completa
+    desc_selectors = [
+        '.product-description',
+        '.product-content',
+        '[class*="description"]',
+        '#description',
+        '.description',
+        '.entry-content',
+        '.product-details'
+    ]
+
+    for selector in desc_selectors:
+        desc_elem = soup.select_one(selector)
+        if desc_elem:
+            detailed_info['descripcion_completa'] = desc_elem.get_text(strip=True)
+            break
+
+    # Extraer especificaciones técnicas
+    specs_selectors = [
+        '.product-specifications',
+        '.specifications',
+        '.technical-specs',
+        '#specifications',
+        '[class*="spec"]'
+    ]
+
+    for selector in specs_selectors:
+        specs_elem = soup.select_one(selector)
+        if specs_elem:
+            detailed_info['especificaciones'] = specs_elem.get_text(strip=True)
+            break
+
+    # Extraer atributos del producto (tablas de especificaciones)
+    tables = soup.find_all('table', class_=lambda x: x and ('attribute' in x.lower() or 'spec' in x.lower()))
+    if tables:
+        attrs = []
+        for table in tables:
+            rows = table.find_all('tr')
+            for row in rows:
+                cells = row.find_all(['th', 'td'])
+                if len(cells) >= 2:
+                    key = cells[0].get_text(strip=True)
+                    value = cells[1].get_text(strip=True)
+                    attrs.append(f"{key}: {value}")
+        if attrs:
+            detailed_info['atributos'] = '; '.join(attrs)
+
+    # Extraer enlaces de descarga (PDF, catálogos, etc.)
+    download_links = soup.find_all('a', href=True)
+    for link in download_links:
+        href = link.get('href', '')
+        if any(ext in href.lower() for ext in ['.pdf', '.zip', '.doc', '.docx', '.xlsx']):
+            detailed_info['url_archivo_descarga'] = urljoin(base_url, href)
+            detailed_info['archivo_descarga'] = href.split('/')[-1]
+            break
+
+    return detailed_info
+
+
+def load_scraper():
+    spec = importlib.util.spec_from_file_location('scrapper_blonch', os.path.join(ROOT, 'scrapper-blonch.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BombasBlochScraper(cache_dir=None)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def cpu_ms(func, html, repeat):
+    """(ms de CPU por ficha, resultado)"""
+    result = func(html)
+    start = time.process_time()
+    for _ in range(repeat):
+        func(html)
+    return (time.process_time() - start) / repeat * 1000, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    scraper = load_scraper()
+
+    print(f"{repeat} repeticiones por ficha; ms de CPU por ficha (parseo incluido)")
+    print(f"{'Ficha':26} {'anterior':>10} {'un recorrido':>13} {'mejora':>8}")
+    for fixture in ('bloch_producto.html', 'ficha_variantes.html'):
+        html = read_fixture(fixture)
+        legacy_ms, legacy_info = cpu_ms(lambda doc: legacy_parse_detailed_product_info(doc, scraper.base_url), html,
+                                        repeat)
+        single_ms, info = cpu_ms(scraper.parse_detailed_product_info, html, repeat)
+        assert info == legacy_info, f"Resultados distintos en {fixture}"
+        print(f"{fixture:26} {legacy_ms:10.2f} {single_ms:13.2f} {legacy_ms / single_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
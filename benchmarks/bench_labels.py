@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la asignación de etiquetas a campos (scraping_core.labels)
+
+Compara, sobre las fichas de benchmarks/fixtures/ (einforma, nlocal y perfil
+de GeneraWeb), las cadenas if/elif anteriores con las tablas de reglas de
+cada fuente. Comprueba que los diccionarios son idénticos y mide dos cosas:
+la página completa (parseo con BeautifulSoup incluido, que no cambia) y solo
+la etapa de mapeo sobre los pares etiqueta/valor ya extraídos.
+
+Uso: python3 benchmarks/bench_labels.py [repeticiones]
+"""
+
+import contextlib
+import importlib.util
+import io
+import logging
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.append(ROOT)
+
+logging.disable(logging.WARNING)
+
+
+# Copias de los mapeos anteriores (sin los print ni los logs)
+
+def legacy_einforma_map(pares, datos):
+    for etiqueta, valor in pares:
+        if 'Denominación:' in etiqueta:
+            datos['denominacion'] = valor
+        elif 'Duns Number:' in etiqueta:
+            datos['duns_number'] = valor
+        elif 'Domicilio social' in etiqueta:
+            valor = re.sub(r'\s*Ver Mapa.*', '', valor)
+            datos['domicilio_social'] = valor
+        elif 'Localidad:' in etiqueta:
+            datos['localidad'] = valor
+        elif 'Teléfono:' in etiqueta:
+            datos['telefono'] = valor.replace('\n', ' | ')
+        elif 'Fax:' in etiqueta:
+            datos['fax'] = valor
+        elif 'Fecha último dato:' in etiqueta:
+            datos['fecha_ultimo_dato'] = valor
+        elif 'Accionistas:' in etiqueta:
+            match = re.search(r'(\d+)', valor)
+            datos['accionistas'] = match.group(1) if match else valor
+        elif 'Forma Jurídica:' in etiqueta:
+            datos['forma_juridica'] = valor
+        elif 'Actividad Informa:' in etiqueta:
+            datos['actividad_informa'] = valor
+        elif 'CNAE 2009:' in etiqueta:
+            datos['cnae_2009'] = valor
+        elif 'CNAE 2025:' in etiqueta:
+            datos['cnae_2025'] = valor
+        elif 'Objeto Social:' in etiqueta:
+            datos['objeto_social'] = valor
+        elif 'Último Balance' in etiqueta and 'cargado' in etiqueta:
+            match = re.search(r'(\d{4})\s*\(Fecha Cierre\s+(\d{2}/\d{2}/\d{4})\)', valor)
+            datos['ultimo_balance'] = f"{match.group(1)} ({match.group(2)})" if match else valor
+        elif 'Balances disponibles:' in etiqueta:
+            match = re.search(r'(\d+)', valor)
+            datos['balances_disponibles'] = match.group(1) if match else valor
+        elif 'Depósito en R. Mercantil:' in etiqueta:
+            datos['deposito_mercantil'] = valor
+        elif 'Depósito en eInforma:' in etiqueta:
+            datos['deposito_einforma'] = valor
+        elif 'Popularidad:' in etiqueta:
+            match = re.search(r'última vez el (.+?) y (\d+) veces', valor)
+            datos['popularidad'] = f"{match.group(1)} - {match.group(2)} veces" if match else valor
+    return datos
+
+
+def einforma_pairs(tabla):
+    pares = []
+    for fila in tabla.find_all('tr'):
+        td_left = fila.find('td', align='right')
+        td_right = fila.find('td', align='left')
+        if td_left and td_right:
+            pares.append((td_left.get_text(strip=True), ' '.join(td_right.get_text(strip=True).split())))
+    return pares
+
+
+def legacy_einforma(html_content, nif, campos):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    datos = {campo: '' for campo in campos}
+    datos['nif'] = nif
+    tabla = soup.find('table', id='datos')
+    if not tabla:
+        return datos
+    legacy_einforma_map(einforma_pairs(tabla), datos)
+    script_grafico = tabla.find('script', type='text/javascript')
+    if script_grafico:
+        match_ventas = re.search(r'data_y:\s*\[(.*?)\]', script_grafico.text)
+        if match_ventas:
+            ventas = [v.strip() for v in match_ventas.group(1).split(',')]
+            if len(ventas) >= 3:
+                datos['ventas_2022'], datos['ventas_2023'], datos['ventas_2024'] = ventas[:3]
+            elif len(ventas) == 2:
+                datos['ventas_2023'], datos['ventas_2024'] = ventas
+            elif len(ventas) == 1:
+                datos['ventas_2024'] = ventas[0]
+    return datos
+
+
+def legacy_nlocal_map(filas, datos):
+    for campo, valor, td in filas:
+        if campo == 'CIF':
+            datos['cif'] = valor
+        elif campo == 'Teléfono':
+            datos['telefono'] = valor
+        elif campo == 'Móvil':
+            datos['movil'] = valor
+        elif campo == 'Web':
+            datos['web'] = valor
+        elif campo == 'Dirección':
+            datos['direccion'] = valor
+        elif campo == 'Nombre':
+            nombre_link = td.find('a')
+            if nombre_link:
+                datos['nombre_contacto'] = nombre_link.text.strip()
+        elif campo == 'Email':
+            datos['email'] = valor
+        elif campo == 'Estado':
+            datos['estado_usuario'] = valor
+        elif campo == 'Completada':
+            datos['completada'] = valor
+        elif campo == 'Ultima modificación':
+            datos['ultima_modificacion'] = valor
+        elif campo == 'Ultimo login':
+            datos['ultimo_login'] = valor
+        elif campo == 'Logins':
+            datos['total_logins'] = valor
+        elif campo == 'Método de pago':
+            links = td.find_all('a')
+            if links:
+                metodos = [link.text.strip() for link in links if link.text.strip()]
+                datos['metodo_pago'] = ', '.join(metodos) if metodos else valor
+            else:
+                datos['metodo_pago'] = valor
+    return datos
+
+
+def nlocal_rows(soup):
+    filas = []
+    for tabla in soup.find_all('table', class_='table_left_aligned'):
+        for fila in tabla.find_all('tr'):
+            th = fila.find('th')
+            td = fila.find('td')
+            if th and td:
+                filas.append((th.text.strip(), ' '.join(td.text.strip().split()), td))
+    return filas
+
+
+def legacy_nlocal(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    datos = {campo: '' for campo in ('org_id', 'nombre_organizacion', 'estado_org', 'cif', 'telefono', 'movil', 'web',
+                                     'direccion', 'nombre_contacto', 'email', 'estado_usuario', 'completada',
+                                     'ultima_modificacion', 'metodo_pago', 'ultimo_login', 'total_logins')}
+    h1_org = soup.find('h1', class_='admin_menu_3')
+    if h1_org and h1_org.find('span'):
+        nombre_org = h1_org.find('span').text.strip()
+        datos['nombre_organizacion'] = nombre_org[1:].strip() if nombre_org.startswith(':') else nombre_org
+    for h2 in soup.find_all('h2'):
+        if h2.text and 'Org' in h2.text:
+            org_match = re.search(r'Org\s*(\d+)', h2.text)
+            if org_match:
+                datos['org_id'] = org_match.group(1)
+                break
+    estado_tag = soup.find('span', class_='tag_success')
+    if estado_tag:
+        datos['estado_org'] = estado_tag.text.strip()
+    return legacy_nlocal_map(nlocal_rows(soup), datos)
+
+
+GENERAWEB_FIELDS = [('Id', 'id'), ('Nombre', 'nombre'), ('Apellidos', 'apellidos'), ('RazonSocial', 'razon_social'),
+                    ('Login', 'login'), ('Password_No_Encriptado', 'password'), ('NifCif', 'cif_nif'),
+                    ('Direccion', 'direccion'), ('Provincia', 'provincia'), ('Ciudad', 'ciudad'),
+                    ('Cp', 'codigo_postal'), ('Pais', 'pais'), ('Telefono', 'telefono'), ('Fax', 'fax'),
+                    ('Telefono_movil', 'telefono_movil'), ('Url', 'url'), ('Email', 'email'),
+                    ('NumDomains', 'num_dominios'), ('UrlAdminWordPress', 'wordpress_url')]
+
+
+def legacy_generaweb_map(elementos, profile_data):
+    # El if/elif anterior comparaba el nombre con cada campo en este orden
+    for name, value, element in elementos:
+        for field_name, key in GENERAWEB_FIELDS:
+            if name == field_name:
+                profile_data[key] = value
+                break
+        else:
+            if name == 'id_gp' and element.name == 'select':
+                selected = element.find('option', selected=True)
+                if selected:
+                    profile_data['gestor_proyecto'] = selected.get_text(strip=True)
+    return profile_data
+
+
+def generaweb_elements(soup):
+    return [(element.get('name', ''), element.get('value', '') or element.get_text(strip=True), element)
+            for element in soup.find_all(['input', 'select', 'textarea'])]
+
+
+def legacy_generaweb(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return legacy_generaweb_map(generaweb_elements(soup), {})
+
+
+def load_module(relative_path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def cpu_us(func, repeat, rounds=5):
+    """(µs de CPU por llamada en la mejor de varias rondas, resultado), sin los print de los scrapers"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.process_time()
+            for _ in range(repeat):
+                func()
+            best = min(best, time.process_time() - start)
+        return best / repeat * 1e6, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    einforma = load_module('einforma/scraper_einforma.py', 'scraper_einforma').EinformaScraper()
+    nlocal = load_module('nlocal/scraper_nlocal.py', 'scraper_nlocal').NlocalScraper('usuario', 'password')
+    perfil = load_module('generaweb_duda/perfil_empresa.py', 'perfil_empresa')
+
+    pages = {name: read_fixture(f'{name}.html') for name in ('einforma_ficha', 'nlocal_organizacion', 'generaweb_perfil')}
+    einforma_tabla = BeautifulSoup(pages['einforma_ficha'], 'html.parser').find('table', id='datos')
+    einforma_pares = einforma_pairs(einforma_tabla)
+    nlocal_filas = nlocal_rows(BeautifulSoup(pages['nlocal_organizacion'], 'html.parser'))
+    generaweb_elementos = generaweb_elements(BeautifulSoup(pages['generaweb_perfil'], 'html.parser'))
+
+    cases = [
+        ('einforma', 'página',
+         lambda: legacy_einforma(pages['einforma_ficha'], 'B12345678', einforma.campos_csv),
+         lambda: einforma.parsear_informacion_empresa(pages['einforma_ficha'], 'B12345678')),
+        ('einforma', 'mapeo',
+         lambda: legacy_einforma_map(einforma_pares, {}),
+         lambda: einforma.CAMPOS.map(einforma_pares, {})),
+        ('nlocal', 'página',
+         lambda: legacy_nlocal(pages['nlocal_organizacion']),
+         lambda: nlocal.parsear_informacion_organizacion(pages['nlocal_organizacion'])),
+        ('nlocal', 'mapeo',
+         lambda: legacy_nlocal_map(nlocal_filas, {}),
+         lambda: nlocal.CAMPOS.map(nlocal_filas, {})),
+        ('GeneraWeb', 'página',
+         lambda: legacy_generaweb(pages['generaweb_perfil']),
+         lambda: perfil.parse_empresa_profile(pages['generaweb_perfil'])),
+        ('GeneraWeb', 'mapeo',
+         lambda: legacy_generaweb_map(generaweb_elementos, {}),
+         lambda: perfil.PROFILE_FIELDS.map(generaweb_elementos, {})),
+    ]
+
+    print(f"{repeat} repeticiones; µs de CPU por ficha (mejor de 5 rondas)")
+    print(f"{'Fuente':10} {'etapa':7} {'campos':>6} {'if/elif':>10} {'tabla':>10} {'mejora':>8}")
+    for source, stage, legacy, mapped in cases:
+        legacy_us, legacy_result = cpu_us(legacy, repeat)
+        mapped_us, mapped_result = cpu_us(mapped, repeat)
+        assert mapped_result == legacy_result, f"Datos distintos en {source} ({stage})"
+        filled = sum(1 for value in mapped_result.values() if value)
+        print(f"{source:10} {stage:7} {filled:6d} {legacy_us:10.1f} {mapped_us:10.1f} {legacy_us / mapped_us:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
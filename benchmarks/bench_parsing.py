@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del parseo de listados y fichas de producto
+
+Ejecuta los extractores de los scrapers de catálogo sobre las páginas de
+benchmarks/fixtures/ con tres configuraciones: html.parser con el documento
+completo (lo que se hacía antes), lxml con el documento completo y lxml
+limitado a los subárboles que necesita cada extractor (SoupStrainer). Mide
+el tiempo de CPU y el pico de memoria por página, y comprueba que los
+productos extraídos son idénticos en las tres. parse_listing parsea siempre
+un único árbol completo que comparten todos sus extractores. El pico de
+memoria es el de tracemalloc, que no cuenta la memoria en C de lxml.
+
+Uso: python3 benchmarks/bench_parsing.py [repeticiones]
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.append(ROOT)
+
+from scraping_core import set_parser_backend
+
+logging.disable(logging.WARNING)
+
+
+def load_module(relative_path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def build_cases():
+    """(nombre, scraper, método, fixture) de cada extractor a medir"""
+    bloch = load_module('scrapper-blonch.py', 'scrapper_blonch').BombasBlochScraper(cache_dir=None)
+    hidraulica = load_module('hidraulicaneumatica/scrapper_hidraulica.py', 'scrapper_hidraulica') \
+        .HidraulicaNeumatiaScraper(cache_dir=None)
+    evolucion = load_module('evolucionaa/scrapper_evolucion_a.py', 'scrapper_evolucion_a') \
+        .EvolucionAScraperCompeticion(cache_dir=None)
+    completo = load_module('evolucionaa/scrapper_evolucion_a_completo.py', 'scrapper_evolucion_a_completo') \
+        .EvolucionScraper(cache_dir=None)
+    return [
+        ('Bloch: categorías', bloch, 'extract_categories', 'bloch_listado.html'),
+        ('Bloch: productos', bloch, 'extract_catalog_items', 'bloch_listado.html'),
+        ('Bloch: ficha', bloch, 'parse_detailed_product_info', 'bloch_producto.html'),
+        ('Hidráulica: categorías', hidraulica, 'extract_categories', 'hidraulica_listado.html'),
+        ('Hidráulica: productos', hidraulica, 'extract_catalog_items', 'hidraulica_listado.html'),
+        ('Hidráulica: parse_listing', hidraulica, 'parse_listing', 'hidraulica_listado.html'),
+        ('Evolución-A: categorías', evolucion, 'extract_categories', 'evolucion_catalogo.html'),
+        ('Evolución-A: destacados', evolucion, 'extract_catalog_items', 'evolucion_catalogo.html'),
+        ('Evolución-A: parse_listing', evolucion, 'parse_listing', 'evolucion_catalogo.html'),
+        ('Evolución-A: ficha', completo, 'parse_detailed_product_info', 'evolucion_producto.html'),
+    ]
+
+
+def set_strainers(scraper, enabled, _saved={}):
+    """Activa o desactiva los SoupStrainer de la clase del scraper (None = documento completo)"""
+    cls = type(scraper)
+    if cls not in _saved:
+        _saved[cls] = {name: value for name, value in vars(cls).items() if name.endswith('_STRAINER')}
+    for name, value in _saved[cls].items():
+        setattr(cls, name, value if enabled else None)
+
+
+def measure(func, html, repeat):
+    """(ms de CPU por página, pico de memoria en KB, resultado)"""
+    result = func(html)
+    start = time.process_time()
+    for _ in range(repeat):
+        func(html)
+    cpu_ms = (time.process_time() - start) / repeat * 1000
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    configs = [
+        ('html.parser', 'html.parser', False),
+        ('lxml', 'lxml', False),
+        ('lxml+strainer', 'lxml', True),
+    ]
+
+    print(f"{repeat} repeticiones por página; tiempo en ms de CPU y pico de memoria en KB")
+    header = f"{'Extractor':26}" + ''.join(f" {name:>22}" for name, _, _ in configs)
+    print(header)
+    print('-' * len(header))
+    for label, scraper, method, fixture in build_cases():
+        html = read_fixture(fixture)
+        func = getattr(scraper, method)
+        cells, results = [], []
+        for _, backend, strained in configs:
+            set_parser_backend(backend)
+            set_strainers(scraper, strained)
+            cpu_ms, peak_kb, result = measure(func, html, repeat)
+            cells.append(f"{cpu_ms:9.2f} ms {peak_kb:7.0f} KB")
+            results.append(result)
+        set_strainers(scraper, True)
+        assert all(result == results[0] for result in results), f"Resultados distintos en {label}"
+        print(f"{label:26}" + ''.join(f" {cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los esquemas de extracción (scraping_core.schema)
+
+Compara, sobre las páginas de benchmarks/fixtures/, los extractores de
+productos anteriores (cadenas de find() de BeautifulSoup por cada <li>) con
+los ItemSchema compilados a XPath de cada sitio. Comprueba que los
+diccionarios son idénticos y muestra productos por segundo, incluyendo el
+parseo de la página en ambos casos.
+
+Uso: python3 benchmarks/bench_schemas.py [repeticiones]
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import SoupStrainer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.append(ROOT)
+
+from scraping_core import ParsedPage, id_startswith, make_soup
+
+logging.disable(logging.WARNING)
+
+
+# Copias de los extract_item_data anteriores a los esquemas (sin los logs)
+
+def legacy_bloch_item(element, base_url):
+    item = {
+        'titulo': '',
+        'codigo': '',
+        'sku': '',
+        'imagen_principal': '',
+        'url_imagen_principal': '',
+        'precio': '',
+        'precio_regular': '',
+        'precio_oferta': '',
+        'enlace_detalle': '',
+        'descripcion_corta': '',
+        'categoria': '',
+        'stock': ''
+    }
+
+    try:
+        # Extraer ID del elemento como código
+        element_id = element.get('id', '')
+        if element_id:
+            item['codigo'] = element_id
+            item['sku'] = element_id
+
+        # Extraer título - buscar en h3 > a (estructura de Bombas Bloch)
+        title_elem = element.find('h3')
+        if title_elem:
+            link = title_elem.find('a')
+            if link:
+                item['titulo'] = link.get_text(strip=True)
+                href = link.get('href')
+                if href and not href.startswith('#'):
+                    item['enlace_detalle'] = urljoin(base_url, href)
+            else:
+                item['titulo'] = title_elem.get_text(strip=True)
+
+        # Si no hay h3, buscar en h2 o elementos con clase title
+        if not item['titulo']:
+            title_elem = (
+                element.find('h2') or 
+                element.find(class_=lambda x: x and ('title' in x.lower() or 'name' in x.lower()))
+            )
+            if title_elem:
+                link = title_elem.find('a')
+                if link:
+                    item['titulo'] = link.get_text(strip=True)
+                else:
+                    item['titulo'] = title_elem.get_text(strip=True)
+
+        # Si aún no hay enlace, buscar el primer enlace del elemento
+        if not item['enlace_detalle']:
+            link_elem = element.find('a', href=True)
+            if link_elem:
+                href = link_elem.get('href')
+                if href and not href.startswith('#'):
+                    item['enlace_detalle'] = urljoin(base_url, href)
+
+        # Extraer imagen principal
+        img_elem = element.find('img')
+        if img_elem:
+            # Intentar obtener la imagen de varias fuentes posibles
+            img_src = (
+                img_elem.get('src') or 
+                img_elem.get('data-src') or 
+                img_elem.get('data-lazy-src') or
+                img_elem.get('data-original')
+            )
+
+            if img_src:
+                # Asegurar URL completa
+                full_img_url = urljoin(base_url, img_src)
+                item['url_imagen_principal'] = full_img_url
+                # Extraer solo el nombre del archivo
+                item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
+
+        # Extraer precio
+        price_elem = element.find(class_=lambda x: x and 'price' in x.lower())
+        if price_elem:
+            # Buscar precio de oferta
+            sale_price = price_elem.find(class_=lambda x: x and ('sale' in x.lower() or 'offer' in x.lower()))
+            if sale_price:
+                item['precio_oferta'] = sale_price.get_text(strip=True)
+
+            # Buscar precio regular
+            regular_price = price_elem.find(class_=lambda x: x and 'regular' in x.lower())
+            if regular_price:
+                item['precio_regular'] = regular_price.get_text(strip=True)
+
+            # Si no hay separación, tomar el precio general
+            if not item['precio_oferta'] and not item['precio_regular']:
+                item['precio'] = price_elem.get_text(strip=True)
+
+        # Extraer SKU o código de producto
+        sku_elem = element.find(class_=lambda x: x and ('sku' in x.lower() or 'code' in x.lower() or 'ref' in x.lower()))
+        if sku_elem:
+            item['sku'] = sku_elem.get_text(strip=True)
+            item['codigo'] = sku_elem.get_text(strip=True)
+        else:
+            # Intentar extraer del data attribute
+            sku_attr = element.get('data-product-id') or element.get('data-id') or element.get('data-sku')
+            if sku_attr:
+                item['sku'] = str(sku_attr)
+                item['codigo'] = str(sku_attr)
+
+        # Extraer descripción corta
+        desc_elem = element.find(class_=lambda x: x and ('description' in x.lower() or 'excerpt' in x.lower()))
+        if desc_elem:
+            item['descripcion_corta'] = desc_elem.get_text(strip=True)[:200]
+
+        # Extraer categoría
+        cat_elem = element.find(class_=lambda x: x and ('category' in x.lower() or 'cat' in x.lower()))
+        if cat_elem:
+            item['categoria'] = cat_elem.get_text(strip=True)
+
+        # Extraer estado de stock
+        stock_elem = element.find(class_=lambda x: x and ('stock' in x.lower() or 'availability' in x.lower()))
+        if stock_elem:
+            item['stock'] = stock_elem.get_text(strip=True)
+
+        return item
+
+    except Exception:
+        return None
+
+
+def legacy_hidraulica_item(element, base_url):
+    item = {
+        'titulo': '',
+        'codigo': '',
+        'imagen_principal': '',
+        'url_imagen_principal': '',
+        'precio': '',
+        'enlace_detalle': '',
+        'descripcion_corta': '',
+        'marca': 'Hidráulica Neumática',
+        'categoria': ''
+    }
+
+    try:
+        # Extraer ID del elemento como código
+        element_id = element.get('id', '')
+        if element_id:
+            item['codigo'] = element_id
+
+        # Extraer título en h3 > a o h3.list_index_item_h3 > a
+        title_elem = element.find('h3', class_='list_index_item_h3')
+        if not title_elem:
+            title_elem = element.find('h3')
+
+        if title_elem:
+            link = title_elem.find('a')
+            if link:
+                item['titulo'] = link.get_text(strip=True)
+                href = link.get('href')
+                if href and not href.startswith('#'):
+                    item['enlace_detalle'] = urljoin(base_url, href)
+            else:
+                item['titulo'] = title_elem.get_text(strip=True)
+
+        # Si aún no hay enlace, buscar el primer enlace
+        if not item['enlace_detalle']:
+            link_elem = element.find('a', href=True)
+            if link_elem:
+                href = link_elem.get('href')
+                if href and not href.startswith('#'):
+                    item['enlace_detalle'] = urljoin(base_url, href)
+
+        # Extraer imagen principal desde p class="image"
+        image_p = element.find('p', class_='image')
+        if image_p:
+            img = image_p.find('img')
+            if img:
+                img_src = img.get('src')
+                if img_src:
+                    item['url_imagen_principal'] = urljoin(base_url, img_src)
+                    item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
+
+        # Extraer precio
+        price_elem = element.find('p', class_='price')
+        if price_elem:
+            price_strong = price_elem.find('strong')
+            if price_strong:
+                item['precio'] = price_strong.get_text(strip=True)
+
+        # Extraer código del producto
+        sku_elem = element.find('p', class_='sku')
+        if sku_elem:
+            strong_elem = sku_elem.find('strong')
+            if strong_elem and strong_elem.next_sibling:
+                codigo_text = str(strong_elem.next_sibling).strip()
+                if codigo_text:
+                    item['codigo'] = codigo_text
+
+        # Extraer descripción corta
+        text_div = element.find('div', class_='text')
+        if text_div:
+            desc_p = text_div.find('p')
+            if desc_p:
+                item['descripcion_corta'] = desc_p.get_text(strip=True)[:200]
+
+        return item
+
+    except Exception:
+        return None
+
+
+def legacy_evolucion_item(element, base_url):
+    item = {
+        'titulo': '',
+        'codigo': '',
+        'imagen_principal': '',
+        'url_imagen_principal': '',
+        'precio': '',
+        'enlace_detalle': '',
+        'descripcion_corta': '',
+        'marca': 'Evolución-A'
+    }
+
+    try:
+        # Extraer título del enlace en h3
+        title_link = element.find('h3')
+        if title_link:
+            link_elem = title_link.find('a')
+            if link_elem:
+                item['titulo'] = link_elem.get_text(strip=True)
+                # URL relativa del producto
+                href = link_elem.get('href')
+                if href:
+                    item['enlace_detalle'] = urljoin(base_url, href)
+
+        # Extraer código del producto
+        sku_elem = element.find('p', class_='sku')
+        if sku_elem:
+            strong_elem = sku_elem.find('strong')
+            if strong_elem and strong_elem.next_sibling:
+                item['codigo'] = str(strong_elem.next_sibling).strip()
+
+        # Extraer imagen principal
+        image_p = element.find('p', class_='image')
+        if image_p:
+            img = image_p.find('img')
+            if img:
+                img_src = img.get('src')
+                if img_src:
+                    item['url_imagen_principal'] = img_src
+                    item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
+
+        # Extraer precio
+        price_elem = element.find('p', class_='price')
+        if price_elem:
+            price_strong = price_elem.find('strong', class_='sales_price')
+            if price_strong:
+                item['precio'] = price_strong.get_text(strip=True)
+
+        # Extraer descripción corta
+        text_div = element.find('div', class_='text')
+        if text_div:
+            desc_p = text_div.find('p')
+            if desc_p:
+                item['descripcion_corta'] = desc_p.get_text(strip=True)[:200]
+
+        return item
+
+    except Exception:
+        return None
+
+
+def legacy_bloch_page(html, base_url):
+    soup = make_soup(html, parse_only=SoupStrainer('li', id=id_startswith('cid_', 'iid_')))
+    elements = soup.find_all('li', id=lambda x: x and (x.startswith('cid_') or x.startswith('iid_')))
+    if not elements:
+        soup = make_soup(html)
+        for selector in ['.item_prod', '.product-item', '.product', '.product-card', '.grid-item', '.collection-item']:
+            elements = soup.select(selector)
+            if elements:
+                break
+    items = [legacy_bloch_item(element, base_url) for element in elements]
+    return [item for item in items if item and (item['titulo'] or item['imagen_principal'])]
+
+
+def legacy_hidraulica_page(html, base_url):
+    soup = make_soup(html, parse_only=SoupStrainer('li', id=id_startswith('iid_')))
+    elements = (soup.find_all('li', class_='list_index_item', id=lambda x: x and x.startswith('iid_'))
+                or soup.find_all('li', id=lambda x: x and x.startswith('iid_')))
+    items = [legacy_hidraulica_item(element, base_url) for element in elements]
+    return [item for item in items if item and (item['titulo'] or item['imagen_principal'])]
+
+
+def legacy_evolucion_page(html, base_url):
+    soup = make_soup(html, parse_only=SoupStrainer('div', id='block_highlighted_products'))
+    section = soup.find('div', id='block_highlighted_products')
+    if section:
+        elements = section.find_all('li')
+    else:
+        soup = make_soup(html, parse_only=SoupStrainer('li', id=id_startswith('iid_')))
+        elements = soup.find_all('li', id=lambda x: x and x.startswith('iid_'))
+    return [item for item in (legacy_evolucion_item(element, base_url) for element in elements) if item]
+
+
+def load_scraper(relative_path, name, class_name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)(cache_dir=None)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def items_per_second(func, html, repeat):
+    """(productos por segundo de CPU, resultado)"""
+    result = func(html)
+    start = time.process_time()
+    for _ in range(repeat):
+        func(html)
+    elapsed = time.process_time() - start
+    return len(result) * repeat / elapsed if elapsed else float('inf'), result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    bloch = load_scraper('scrapper-blonch.py', 'scrapper_blonch', 'BombasBlochScraper')
+    hidraulica = load_scraper('hidraulicaneumatica/scrapper_hidraulica.py', 'scrapper_hidraulica',
+                              'HidraulicaNeumatiaScraper')
+    evolucion = load_scraper('evolucionaa/scrapper_evolucion_a.py', 'scrapper_evolucion_a',
+                             'EvolucionAScraperCompeticion')
+    cases = [
+        ('Bloch', bloch, legacy_bloch_page, 'bloch_listado.html'),
+        ('Bloch (variantes)', bloch, legacy_bloch_page, 'listado_variantes.html'),
+        ('Hidráulica', hidraulica, legacy_hidraulica_page, 'hidraulica_listado.html'),
+        ('Hidráulica (variantes)', hidraulica, legacy_hidraulica_page, 'listado_variantes.html'),
+        ('Evolución-A', evolucion, legacy_evolucion_page, 'evolucion_catalogo.html'),
+        ('Evolución-A (variantes)', evolucion, legacy_evolucion_page, 'listado_variantes.html'),
+    ]
+
+    print(f"{repeat} repeticiones por página; productos por segundo de CPU (parseo incluido)")
+    print(f"{'Página':26} {'productos':>9} {'anterior':>12} {'esquema':>12} {'mejora':>8}")
+    for label, scraper, legacy_page, fixture in cases:
+        html = read_fixture(fixture)
+        legacy_rate, legacy_items = items_per_second(lambda doc: legacy_page(doc, scraper.base_url), html, repeat)
+        schema_rate, schema_items = items_per_second(
+            lambda doc: scraper.extract_catalog_items(ParsedPage(doc)), html, repeat)
+        assert schema_items == legacy_items, f"Productos distintos en {label}"
+        print(f"{label:26} {len(schema_items):9d} {legacy_rate:12.0f} {schema_rate:12.0f} "
+              f"{schema_rate / legacy_rate:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
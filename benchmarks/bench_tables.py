@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la extracción de las tablas de 1000 filas de GeneraWeb
+
+Compara el método anterior (BeautifulSoup con html.parser sobre todo el
+driver.page_source y find_all en cada fila) con la extracción en streaming
+de scraping_core.tables (solo la tabla, iterparse de lxml y filas liberadas
+al procesarlas) sobre páginas sintéticas de empresas y de dominios.
+Comprueba que los datos son idénticos y mide el tiempo de CPU y el pico de
+memoria del proceso (RSS, que sí incluye la memoria en C de lxml), cada
+medida de memoria en un intérprete nuevo (usa /proc, solo Linux).
+
+Uso: python3 benchmarks/bench_tables.py [repeticiones] [filas]
+"""
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+logging.disable(logging.WARNING)
+
+PAGE_HEAD = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>GeneraWeb</title>
+<script>{script}</script><style>{style}</style></head><body>
+<table class="tablebackg"><tr><td><div id="menu">{menu}</div></td></tr></table>
+<form action="index.php"><input name="ids"><select name="count"><option>5</option><option selected>1000</option></select></form>
+<table class="table"><thead><tr><th>ID</th><th>Entrada</th><th>Empresa</th><th>Estado</th><th>Acciones</th><th></th></tr></thead><tbody>
+"""
+PAGE_TAIL = """</tbody></table><div id="pie">{menu}</div></body></html>"""
+
+EMPRESA_ROW = """<tr class="new_platform"><td class="line first_td">{id}</td><td class="line">2024-0{month}-1{day} 10:2{day}</td>
+<td class="line"><a href="index.php?s=user_profile&amp;id={id}">Empresa Número {id} S.L.</a></td>
+<td class="line"><span class="estado">{estado}</span></td>
+<td class="line"><a href="http://www.empresa{id}.es" target="_blank">web</a> <a href="panelcontrol.php?id={id}">panel</a></td></tr>
+"""
+DOMINIO_ROW = """<tr class="new_platform"><td class="line">{id}</td><td class="line">Empresa Número {id} S.L.</td>
+<td class="line"><a href="http://www.empresa{id}.es">empresa{id}.es</a></td><td class="line">{principal}</td>
+<td class="line"><select name="plataforma_{id}"><option value="1">Google</option><option value="2" selected>Duda Mail</option></select> ({cuentas} cuentas)</td>
+<td class="line"><a href="#" onclick="window.open('index.php?s=domain_profile&amp;id={id}')">Ver</a></td></tr>
+"""
+ESTADOS = ['Diseño', 'Publicación', 'Publicada', 'Baja']
+
+
+def build_page(row_template, rows):
+    filler = {'script': 'var x = 1;' * 2000, 'style': '.a { color: red; }' * 1000,
+              'menu': '<a href="index.php?s=home">Inicio</a>' * 200}
+    body = ''.join(row_template.format(id=1000 + i, month=i % 9 + 1, day=i % 10, estado=ESTADOS[i % 4],
+                                       principal='Sí' if i % 2 else 'No', cuentas=i % 7 + 1)
+                   for i in range(rows))
+    return PAGE_HEAD.format(**filler) + body + PAGE_TAIL.format(**filler)
+
+
+# Copias de los extractores anteriores (sin los logs)
+
+def legacy_empresa_data(row, base_url):
+    empresa = {'id': '', 'entrada': '', 'empresa': '', 'estado': '', 'url_perfil': '', 'url_web': '', 'url_panel': ''}
+    id_cell = row.find('td', class_='first_td')
+    if id_cell:
+        empresa['id'] = id_cell.get_text(strip=True)
+    cells = row.find_all('td', class_='line')
+    if len(cells) >= 4:
+        empresa['entrada'] = cells[1].get_text(strip=True)
+        empresa['empresa'] = cells[2].get_text(strip=True)
+        empresa['estado'] = cells[3].get_text(strip=True)
+    for link in row.find_all('a', href=True):
+        href = link.get('href')
+        if href:
+            if 'user_profile' in href:
+                empresa['url_perfil'] = urljoin(base_url, href)
+            elif 'http://www.' in href or 'https://www.' in href:
+                empresa['url_web'] = href
+            elif 'panelcontrol' in href:
+                empresa['url_panel'] = urljoin(base_url, href)
+    return empresa
+
+
+def legacy_empresas(html_content, base_url):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    table = soup.find('table', class_='table')
+    if not table:
+        return []
+    return [legacy_empresa_data(row, base_url) for row in table.find_all('tr', class_='new_platform')]
+
+
+def legacy_dominios(html_content, profile_base_url):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    table = soup.find('table', class_='table')
+    if not table:
+        return []
+    dominios = []
+    for row in table.find_all('tr'):
+        if not row.find('td', class_='line'):
+            continue
+        cells = row.find_all('td', class_='line')
+        if len(cells) >= 6:
+            dominio = {'id': cells[0].get_text(strip=True), 'empresa': cells[1].get_text(strip=True), 'dominio': '',
+                       'principal': cells[3].get_text(strip=True), 'plataforma_correo': '', 'cuentas_correo': '',
+                       'url_perfil': ''}
+            dominio_link = cells[2].find('a')
+            if dominio_link:
+                dominio['dominio'] = dominio_link.get_text(strip=True)
+                dominio['url_web'] = dominio_link.get('href', '')
+            select_element = cells[4].find('select')
+            if select_element:
+                selected_option = select_element.find('option', selected=True)
+                if selected_option:
+                    dominio['plataforma_correo'] = selected_option.get_text(strip=True)
+            texto_plataforma = cells[4].get_text(strip=True)
+            if '(' in texto_plataforma and ')' in texto_plataforma:
+                match = re.search(r'\((\d+)\s+cuentas?\)', texto_plataforma)
+                if match:
+                    dominio['cuentas_correo'] = match.group(1)
+            perfil_link = cells[5].find('a')
+            if perfil_link:
+                onclick = perfil_link.get('onclick', '')
+                if 'domain_profile' in onclick:
+                    match = re.search(r"id=(\d+)", onclick)
+                    if match:
+                        dominio['url_perfil'] = f"{profile_base_url}/index.php?s=domain_profile&id={match.group(1)}"
+            dominios.append(dominio)
+    return dominios
+
+
+def load_class(relative_path, name, class_name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)
+
+
+def cpu_ms(func, html, repeat):
+    """(ms de CPU por página, resultado)"""
+    result = func(html)
+    start = time.process_time()
+    for _ in range(repeat):
+        func(html)
+    return (time.process_time() - start) / repeat * 1000, result
+
+
+def build_cases(rows):
+    """(nombre, html, extractor anterior, extractor en streaming) de cada tabla"""
+    empresas_scraper = load_class('generaweb_duda/scrapper_generaweb_duda.py', 'scrapper_generaweb_duda',
+                                  'GeneraWebDudaScraper')()
+    dominios_scraper = load_class('generaweb_duda/scrapper_dominios.py', 'scrapper_dominios',
+                                  'GeneraWebDudaScraperDominios')()
+    return [
+        ('Empresas', build_page(EMPRESA_ROW, rows),
+         lambda html: legacy_empresas(html, empresas_scraper.base_url),
+         lambda html: list(empresas_scraper.iter_empresas(html))),
+        ('Dominios', build_page(DOMINIO_ROW, rows),
+         lambda html: legacy_dominios(html, dominios_scraper.profile_base_url),
+         dominios_scraper.extract_table_data_from_html),
+    ]
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _rss_child(index, variant, rows, queue):
+    logging.disable(logging.WARNING)
+    _, html, *extractors = build_cases(rows)[index]
+    func = extractors[variant]
+    # Reinicia el pico de RSS (VmHWM) del proceso al RSS actual
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    before = _status_kb('VmRSS')
+    func(html)
+    queue.put(_status_kb('VmHWM') - before)
+
+
+def peak_rss_kb(index, variant, rows):
+    """Crecimiento del pico de RSS (KB) al extraer una página en un intérprete nuevo (solo Linux)"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    child = context.Process(target=_rss_child, args=(index, variant, rows, queue))
+    child.start()
+    growth = queue.get()
+    child.join()
+    return growth
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    cases = build_cases(rows)
+
+    print(f"{rows} filas por página, {repeat} repeticiones; ms de CPU y crecimiento del pico de RSS en KB")
+    print(f"{'Tabla':10} {'KB de HTML':>10} {'anterior':>22} {'streaming':>22}")
+    for index, (label, html, legacy, streaming) in enumerate(cases):
+        cells = []
+        results = []
+        for variant, func in enumerate((legacy, streaming)):
+            ms, result = cpu_ms(func, html, repeat)
+            cells.append(f"{ms:9.1f} ms {peak_rss_kb(index, variant, rows):7d} KB")
+            results.append(result)
+        assert results[0] == results[1] and len(results[0]) == rows, f"Resultados distintos en {label}"
+        print(f"{label:10} {len(html) // 1024:10d} {cells[0]:>22} {cells[1]:>22}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,18 +10,74 @@ import time
 import json
 import re
 import os
-from bs4 import BeautifulSoup
+import sys
+from concurrent.futures import Future
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping_core import ParsePool, create_fetcher
+from scraping_core.labels import LabelMapper, LabelRule, regex_remove, regex_value
+
 class EinformaScraper:
-    def __init__(self):
-        """Inicializa el scraper de Einforma"""
+    # Etiquetas de la tabla de datos y campo que alimentan (por contenido, en este orden)
+    CAMPOS = LabelMapper([
+        LabelRule('denominacion', contains='Denominación:'),
+        LabelRule('duns_number', contains='Duns Number:'),
+        # Quitar el texto "Ver Mapa" si existe
+        LabelRule('domicilio_social', contains='Domicilio social', post=regex_remove(r'\s*Ver Mapa.*')),
+        LabelRule('localidad', contains='Localidad:'),
+        LabelRule('telefono', contains='Teléfono:', post=lambda valor: valor.replace('\n', ' | ')),
+        LabelRule('fax', contains='Fax:'),
+        LabelRule('fecha_ultimo_dato', contains='Fecha último dato:'),
+        # Número de accionistas
+        LabelRule('accionistas', contains='Accionistas:', post=regex_value(r'(\d+)')),
+        LabelRule('forma_juridica', contains='Forma Jurídica:'),
+        LabelRule('actividad_informa', contains='Actividad Informa:'),
+        LabelRule('cnae_2009', contains='CNAE 2009:'),
+        LabelRule('cnae_2025', contains='CNAE 2025:'),
+        LabelRule('objeto_social', contains='Objeto Social:'),
+        # Año y fecha de cierre
+        LabelRule('ultimo_balance', contains=('Último Balance', 'cargado'),
+                  post=regex_value(r'(\d{4})\s*\(Fecha Cierre\s+(\d{2}/\d{2}/\d{4})\)', r'\1 (\2)')),
+        # Número de balances
+        LabelRule('balances_disponibles', contains='Balances disponibles:', post=regex_value(r'(\d+)')),
+        LabelRule('deposito_mercantil', contains='Depósito en R. Mercantil:'),
+        LabelRule('deposito_einforma', contains='Depósito en eInforma:'),
+        LabelRule('popularidad', contains='Popularidad:',
+                  post=regex_value(r'última vez el (.+?) y (\d+) veces', r'\1 - \2 veces')),
+    ])
+    # Ventas de los últimos años en el script del gráfico: data_y: [..., ..., ...]
+    VENTAS_RE = re.compile(r'data_y:\s*\[(.*?)\]')
+    # Solo se construye el árbol de la tabla de datos
+    DATOS_STRAINER = SoupStrainer('table', id='datos')
+    
+    def __init__(self, parse_workers=1):
+        """
+        Inicializa el scraper de Einforma
+        
+        Args:
+            parse_workers: Procesos que parsean las fichas mientras se descarga la
+                siguiente (0 = parsear en el proceso principal)
+        """
         self.base_url = "https://www.einforma.com"
         self.search_url_template = f"{self.base_url}/servlet/app/prod/ETIQUETA_EMPRESA/nif/{{nif}}"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        # Núcleo de descarga compartido sin caché (los datos de empresa cambian).
+        # El limitador empieza al ritmo de la antigua pausa de 3 s y acelera
+        # mientras einforma responda rápido; los reintentos evitan que un timeout
+        # deje un NIF como error definitivo y los que agotan los intentos se
+        # reintentan en la siguiente ejecución
+        self.fetcher = create_fetcher(
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            },
+            timeout=(5, 30),
+            cache_dir=None,
+            dead_letter_file='nifs_fallidos.jsonl',
+            initial_rate=1 / 3,
+            max_rate=2.0,
+        )
         self.campos_csv = [
             'nif', 'denominacion', 'duns_number', 'domicilio_social', 'localidad', 
             'telefono', 'fax', 'fecha_ultimo_dato', 'accionistas', 'forma_juridica',
@@ -30,6 +86,7 @@ class EinformaScraper:
             'deposito_einforma', 'popularidad', 'ventas_2022', 'ventas_2023', 'ventas_2024'
         ]
         self.dnis_procesados = set()
+        self.parse_workers = parse_workers
         
     def obtener_dnis_procesados(self, archivo_csv='resultados_einforma.csv'):
         """
@@ -104,7 +161,7 @@ class EinformaScraper:
             dict: Información extraída
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, 'html.parser', parse_only=self.DATOS_STRAINER)
             
             datos = {campo: '' for campo in self.campos_csv}
             datos['nif'] = nif
@@ -115,87 +172,24 @@ class EinformaScraper:
                 print("   ⚠️ No se encontró la tabla de datos")
                 return datos
             
-            # Extraer filas de la tabla
-            filas = tabla.find_all('tr')
-            
-            for fila in filas:
+            # Extraer filas de la tabla y mapear cada etiqueta a su campo
+            for fila in tabla.find_all('tr'):
                 td_left = fila.find('td', align='right')
                 td_right = fila.find('td', align='left')
                 
                 if td_left and td_right:
-                    etiqueta = td_left.get_text(strip=True)
-                    valor = td_right.get_text(strip=True)
-                    
                     # Limpiar el valor (quitar saltos de línea y espacios extra)
-                    valor = ' '.join(valor.split())
-                    
-                    # Mapear campos según la etiqueta
-                    if 'Denominación:' in etiqueta:
-                        datos['denominacion'] = valor
-                        print(f"   🏢 Denominación: {valor}")
-                    elif 'Duns Number:' in etiqueta:
-                        datos['duns_number'] = valor
-                    elif 'Domicilio social' in etiqueta:
-                        # Quitar el texto "Ver Mapa" si existe
-                        valor = re.sub(r'\s*Ver Mapa.*', '', valor)
-                        datos['domicilio_social'] = valor
-                    elif 'Localidad:' in etiqueta:
-                        datos['localidad'] = valor
-                    elif 'Teléfono:' in etiqueta:
-                        datos['telefono'] = valor.replace('\n', ' | ')
-                    elif 'Fax:' in etiqueta:
-                        datos['fax'] = valor
-                    elif 'Fecha último dato:' in etiqueta:
-                        datos['fecha_ultimo_dato'] = valor
-                    elif 'Accionistas:' in etiqueta:
-                        # Extraer número de accionistas
-                        match = re.search(r'(\d+)', valor)
-                        if match:
-                            datos['accionistas'] = match.group(1)
-                        else:
-                            datos['accionistas'] = valor
-                    elif 'Forma Jurídica:' in etiqueta:
-                        datos['forma_juridica'] = valor
-                    elif 'Actividad Informa:' in etiqueta:
-                        datos['actividad_informa'] = valor
-                    elif 'CNAE 2009:' in etiqueta:
-                        datos['cnae_2009'] = valor
-                    elif 'CNAE 2025:' in etiqueta:
-                        datos['cnae_2025'] = valor
-                    elif 'Objeto Social:' in etiqueta:
-                        datos['objeto_social'] = valor
-                    elif 'Último Balance' in etiqueta and 'cargado' in etiqueta:
-                        # Extraer año y fecha
-                        match = re.search(r'(\d{4})\s*\(Fecha Cierre\s+(\d{2}/\d{2}/\d{4})\)', valor)
-                        if match:
-                            datos['ultimo_balance'] = f"{match.group(1)} ({match.group(2)})"
-                        else:
-                            datos['ultimo_balance'] = valor
-                    elif 'Balances disponibles:' in etiqueta:
-                        # Extraer número de balances
-                        match = re.search(r'(\d+)', valor)
-                        if match:
-                            datos['balances_disponibles'] = match.group(1)
-                        else:
-                            datos['balances_disponibles'] = valor
-                    elif 'Depósito en R. Mercantil:' in etiqueta:
-                        datos['deposito_mercantil'] = valor
-                    elif 'Depósito en eInforma:' in etiqueta:
-                        datos['deposito_einforma'] = valor
-                    elif 'Popularidad:' in etiqueta:
-                        # Extraer información de popularidad
-                        match = re.search(r'última vez el (.+?) y (\d+) veces', valor)
-                        if match:
-                            datos['popularidad'] = f"{match.group(1)} - {match.group(2)} veces"
-                        else:
-                            datos['popularidad'] = valor
+                    valor = ' '.join(td_right.get_text(strip=True).split())
+                    self.CAMPOS.assign(datos, td_left.get_text(strip=True), valor)
+            
+            if datos['denominacion']:
+                print(f"   🏢 Denominación: {datos['denominacion']}")
             
             # Extraer datos de ventas desde el script JavaScript
             script_grafico = tabla.find('script', type='text/javascript')
             if script_grafico:
                 texto_script = script_grafico.text
-                # Buscar data_y: [..., ..., ...]
-                match_ventas = re.search(r'data_y:\s*\[(.*?)\]', texto_script)
+                match_ventas = self.VENTAS_RE.search(texto_script)
                 if match_ventas:
                     ventas = [v.strip() for v in match_ventas.group(1).split(',')]
                     if len(ventas) >= 3:
@@ -214,15 +208,16 @@ class EinformaScraper:
             print(f"❌ Error al parsear información: {str(e)}")
             return {campo: '' for campo in self.campos_csv}
     
-    def buscar_por_nif(self, nif):
+    def descargar_ficha(self, nif):
         """
-        Busca información de una empresa por su NIF
+        Descarga la ficha de una empresa por su NIF
         
         Args:
             nif: NIF de la empresa
             
         Returns:
-            dict: Resultado de la búsqueda
+            tuple: (html, None) si hay ficha que parsear, o (None, resultado) si no
+            hubo resultados o falló la descarga
         """
         try:
             print(f"\n🔍 Buscando NIF: {nif}")
@@ -231,69 +226,122 @@ class EinformaScraper:
             url = self.search_url_template.format(nif=nif)
             print(f"🌐 Accediendo a: {url}")
             
-            # Realizar petición
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            # Realizar petición (con reintentos ante errores transitorios)
+            response = self.fetcher.get(url, context={'nif': nif})
+            html = response.html or response.text
             
             # Verificar si se encontraron resultados
-            if 'No se encontraron resultados' in response.text or 'empresa no encontrada' in response.text.lower():
+            if 'No se encontraron resultados' in html or 'empresa no encontrada' in html.lower():
                 print(f"⚠️ No se encontraron resultados para NIF: {nif}")
-                return {
+                return None, {
                     'nif': nif,
                     'resultado_encontrado': False,
                     'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
                 }
             
-            # Parsear información
-            datos = self.parsear_informacion_empresa(response.text, nif)
-            
-            # Verificar si se extrajo información válida
-            tiene_datos = any([
-                datos.get('denominacion'),
-                datos.get('domicilio_social'),
-                datos.get('telefono'),
-                datos.get('localidad')
-            ])
-            
-            if tiene_datos:
-                datos['resultado_encontrado'] = True
-                datos['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
-                print(f"✅ Resultados encontrados para NIF: {nif}")
-                if datos.get('telefono'):
-                    print(f"   📞 Teléfono: {datos['telefono']}")
-                if datos.get('domicilio_social'):
-                    print(f"   📍 Dirección: {datos['domicilio_social']}")
-                return datos
-            else:
-                print(f"⚠️ Se encontró entrada pero sin datos válidos para NIF: {nif}")
-                return {
-                    'nif': nif,
-                    'resultado_encontrado': False,
-                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-                }
+            return html, None
             
         except requests.exceptions.Timeout:
             print(f"⏱️ Timeout al buscar NIF {nif}")
-            return {
+            return None, {
                 'nif': nif,
                 'error': 'Timeout',
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             }
         except requests.exceptions.RequestException as e:
             print(f"❌ Error de conexión al buscar NIF {nif}: {str(e)}")
-            return {
+            return None, {
                 'nif': nif,
                 'error': str(e),
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             }
         except Exception as e:
             print(f"❌ Error al buscar NIF {nif}: {str(e)}")
-            return {
+            return None, {
                 'nif': nif,
                 'error': str(e),
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             }
     
+    def completar_resultado(self, nif, datos):
+        """
+        Marca los datos parseados de una ficha como resultado válido o vacío
+        
+        Args:
+            nif: NIF de la empresa
+            datos: Resultado de parsear_informacion_empresa
+            
+        Returns:
+            dict: Resultado de la búsqueda
+        """
+        # Verificar si se extrajo información válida
+        tiene_datos = any([
+            datos.get('denominacion'),
+            datos.get('domicilio_social'),
+            datos.get('telefono'),
+            datos.get('localidad')
+        ])
+        
+        if tiene_datos:
+            datos['resultado_encontrado'] = True
+            datos['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            print(f"✅ Resultados encontrados para NIF: {nif}")
+            if datos.get('telefono'):
+                print(f"   📞 Teléfono: {datos['telefono']}")
+            if datos.get('domicilio_social'):
+                print(f"   📍 Dirección: {datos['domicilio_social']}")
+            return datos
+        else:
+            print(f"⚠️ Se encontró entrada pero sin datos válidos para NIF: {nif}")
+            return {
+                'nif': nif,
+                'resultado_encontrado': False,
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+    
+    def buscar_por_nif(self, nif):
+        """
+        Busca información de una empresa por su NIF
+        
+        Args:
+            nif: NIF de la empresa
+            
+        Returns:
+            dict: Resultado de la búsqueda
+        """
+        html, resultado = self.descargar_ficha(nif)
+        if resultado is not None:
+            return resultado
+        return self.completar_resultado(nif, self.parsear_informacion_empresa(html, nif))
+    
+    def recoger_resultado(self, nif, html, resultado):
+        """
+        Termina la búsqueda de un NIF cuya ficha se está parseando y la guarda en el CSV
+        
+        Args:
+            nif: NIF de la empresa
+            html: Ficha descargada (None si la descarga ya dio el resultado)
+            resultado: Resultado final, datos parseados o Future del pool de parseo
+            
+        Returns:
+            dict: Resultado de la búsqueda
+        """
+        if html is not None:
+            try:
+                datos = resultado.result() if isinstance(resultado, Future) else resultado
+                resultado = self.completar_resultado(nif, datos)
+            except Exception as e:
+                print(f"❌ Error al parsear NIF {nif}: {str(e)}")
+                resultado = {
+                    'nif': nif,
+                    'error': str(e),
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+                }
+        
+        # Añadir resultado al CSV inmediatamente si tiene información
+        self.append_resultado_csv(resultado)
+        return resultado
+    
     def append_resultado_csv(self, resultado):
         """
         Añade un resultado al archivo CSV de salida
@@ -353,6 +401,13 @@ class EinformaScraper:
                 
                 print(f"📊 Total de NIFs encontrados: {len(nifs)}")
                 
+                # Añadir los NIFs que fallaron en ejecuciones anteriores
+                fallidos = [entrada['nif'] for entrada in self.fetcher.dead_letters.take() if entrada.get('nif')]
+                fallidos = [nif for nif in fallidos if nif not in nifs]
+                if fallidos:
+                    print(f"🔁 Reintentando {len(fallidos)} NIFs fallidos en ejecuciones anteriores")
+                    nifs = fallidos + nifs
+                
                 # Filtrar NIFs ya procesados si existen
                 if self.dnis_procesados:
                     nifs_originales = len(nifs)
@@ -362,23 +417,37 @@ class EinformaScraper:
                         print(f"⏭️ Omitiendo {nifs_omitidos} NIFs ya procesados")
                         print(f"📊 NIFs pendientes: {len(nifs)}")
                 
-                # Procesar cada NIF
-                for i, nif in enumerate(nifs, 1):
-                    print(f"\n{'='*60}")
-                    print(f"Procesando {i}/{len(nifs)}: {nif}")
-                    print(f"{'='*60}")
-                    
-                    resultado = self.buscar_por_nif(nif)
-                    resultados.append(resultado)
-                    
-                    # Añadir resultado al CSV inmediatamente si tiene información
-                    self.append_resultado_csv(resultado)
+                # Procesar cada NIF: mientras la ficha de uno se parsea en el pool
+                # se descarga la del siguiente (el ritmo entre búsquedas lo marca
+                # el limitador de la sesión)
+                pool = ParsePool(EinformaScraper, self.parse_workers) if self.parse_workers else None
+                pendiente = None
+                try:
+                    for i, nif in enumerate(nifs, 1):
+                        print(f"\n{'='*60}")
+                        print(f"Procesando {i}/{len(nifs)}: {nif}")
+                        print(f"{'='*60}")
+                        
+                        html, resultado = self.descargar_ficha(nif)
+                        if html is not None:
+                            if pool:
+                                resultado = pool.submit('parsear_informacion_empresa', html, nif)
+                            else:
+                                resultado = self.parsear_informacion_empresa(html, nif)
+                        
+                        if pendiente:
+                            resultados.append(self.recoger_resultado(*pendiente))
+                        pendiente = (nif, html, resultado)
                     
-                    # Pausa entre búsquedas para no sobrecargar el servidor
-                    if i < len(nifs):
-                        time.sleep(3)  # Pausa de 3 segundos
+                    if pendiente:
+                        resultados.append(self.recoger_resultado(*pendiente))
+                finally:
+                    if pool:
+                        print(f"⏱️ {pool.summary()}")
+                        pool.close()
                 
                 print(f"\n✅ Procesamiento completado: {len(resultados)} resultados nuevos")
+                print(f"⏱️ {self.fetcher.summary()}")
                 return resultados
                 
         except FileNotFoundError:
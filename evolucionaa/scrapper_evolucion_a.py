@@ -6,99 +6,90 @@ URL: https://www.evolucion-a.com/es/productos
 Especialistas en productos para automovilismo de competición
 """
 
-import base64
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from bs4 import SoupStrainer
 import csv
 import time
 import os
+import sys
 from urllib.parse import urljoin, urlparse
 import logging
-import gzip
-import zlib
-import chardet
-import brotli
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping_core import (AsyncFetchEngine, SitemapDiscovery, canonicalize_url, category_from_url,
+                           ParsedPage, create_fetcher, has_class, load_csv_items, merge_items)
+from scraping_core.schema import Field, ItemSchema, absolute_url, file_name, truncate
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class EvolucionAScraperCompeticion:
-    def __init__(self, base_url="https://www.evolucion-a.com"):
+    # Subárbol que se construye cuando extract_categories parsea la página por su cuenta
+    CATEGORY_STRAINER = SoupStrainer('div', class_=has_class('category_list'))
+    
+    # Productos del "Listado de destacados"; si no existe, <li id="iid_XXX">
+    ITEM_SCHEMA = ItemSchema(
+        items=['div#block_highlighted_products / li', 'li[id^=iid_]'],
+        fields=[
+            Field('titulo', 'h3 / a'),
+            Field('enlace_detalle', 'h3 / a @href', post=absolute_url),
+            # Código tras <strong>Código:</strong>
+            Field('codigo', 'p.sku / strong ::tail'),
+            Field('url_imagen_principal', 'p.image / img @src'),
+            Field('imagen_principal', 'p.image / img @src', post=file_name),
+            Field('precio', 'p.price / strong.sales_price'),
+            Field('descripcion_corta', 'div.text / p', post=truncate(200)),
+        ],
+        defaults={
+            'titulo': '', 'codigo': '', 'imagen_principal': '', 'url_imagen_principal': '', 'precio': '',
+            'enlace_detalle': '', 'descripcion_corta': '', 'marca': 'Evolución-A',
+        },
+    )
+    
+    def __init__(self, base_url="https://www.evolucion-a.com", max_concurrency=32, max_per_host=4, offline=False, cache_dir='.http_cache', dead_letter_file='dead_letters.jsonl'):
         self.base_url = base_url
         self.catalogo_url = urljoin(base_url, "/es/catalogo")
-        self.session = requests.Session()
-        # Headers para parecer un navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Núcleo de descarga compartido: caché, limitador, reintentos y decodificación
+        self.fetcher = create_fetcher(offline=offline, cache_dir=cache_dir, dead_letter_file=dead_letter_file)
+        # Motor asíncrono que ejecuta get_page_content con límites de concurrencia
+        self.fetch_engine = AsyncFetchEngine(self.get_page_content, max_concurrency, max_per_host)
         
     def get_page_content(self, url):
         """Obtiene el contenido HTML real (descomprimido y decodificado correctamente)."""
-        try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-
-            raw_data = response.content
-
-            # Detectar compresión
-            content_encoding = response.headers.get('Content-Encoding', '').lower()
-
-            if 'gzip' in content_encoding:
-                try:
-                    raw_data = gzip.decompress(raw_data)
-                except Exception:
-                    pass
-
-            elif 'deflate' in content_encoding:
-                try:
-                    raw_data = zlib.decompress(raw_data)
-                except Exception:
-                    pass
-            elif 'br' in content_encoding:
-                try:
-                    raw_data = brotli.decompress(raw_data)
-                except Exception:
-                    pass
-
-            # Detectar si el cuerpo parece base64
-            try:
-                if all(c.isalnum() or c in '+/=\n\r' for c in raw_data.decode('ascii', errors='ignore')[:200]):
-                    decoded = base64.b64decode(raw_data)
-                    logger.info("Contenido decodificado de base64")
-                    if b'<html' in decoded.lower():
-                        raw_data = decoded
-            except Exception:
-                pass
-
-            # Detectar codificación de texto
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding') or response.apparent_encoding or 'utf-8'
-
-            html = raw_data.decode(encoding, errors='replace')
-
-            return html
+        return self.fetcher.get_html(url)
+    
+    async def get_page_content_async(self, url):
+        """Versión awaitable de get_page_content sobre el motor asíncrono"""
+        return await self.fetch_engine.fetch(url)
+    
+    async def retry_dead_letters_async(self):
+        """Reintenta las URLs de este sitio que fallaron en ejecuciones anteriores
 
-        except requests.RequestException as e:
-            logger.error(f"Error al acceder a {url}: {e}")
-            return None
+        Las que se recuperan quedan en la caché, así que el crawl posterior no
+        vuelve a descargarlas; las que fallan de nuevo vuelven a la lista.
+        """
+        if self.fetcher.cache is not None and self.fetcher.cache.offline:
+            return
+        pending = self.fetcher.dead_letters.take(urlparse(self.base_url).netloc)
+        if not pending:
+            return
+        logger.info(f"Reintentando {len(pending)} URLs fallidas en ejecuciones anteriores")
+        results = await self.fetch_engine.fetch_all([entry['url'] for entry in pending])
+        logger.info(f"✓ Recuperadas {sum(1 for html in results if html)}/{len(pending)} URLs")
     
     def extract_categories(self, html_content, parent_category=''):
-        """Extrae las categorías y subcategorías desde una página"""
+        """Extrae las categorías y subcategorías desde una página (HTML o ParsedPage)"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        page = ParsedPage.of(html_content, self.CATEGORY_STRAINER)
         categories = []
         seen_urls = set()
         
         # Buscar la sección de categorías: div class="category_list"
-        category_section = soup.find('div', class_='category_list')
+        category_section = page.find('div', class_='category_list')
         
         if not category_section:
             return []  # No hay categorías en esta página
@@ -135,123 +126,128 @@ class EvolucionAScraperCompeticion:
         return categories
     
     def extract_catalog_items(self, html_content):
-        """Extrae los productos desde el HTML - específico para Evolución-A"""
+        """Extrae los productos desde el HTML o ParsedPage - específico para Evolución-A"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        items = []
-        
-        # Buscar específicamente la sección "Listado de destacados"
-        highlighted_section = soup.find('div', id='block_highlighted_products')
-        
-        if highlighted_section:
-            logger.info("Encontrada sección 'Listado de destacados'")
-            # Extraer todos los elementos <li> que contienen los productos
-            product_items = highlighted_section.find_all('li')
-            logger.info(f"Encontrados {len(product_items)} productos destacados")
-            
-            for item_element in product_items:
-                item_data = self.extract_item_data(item_element)
-                if item_data:
-                    items.append(item_data)
+        items = self.ITEM_SCHEMA.extract(ParsedPage.of(html_content).tree, self.base_url)
+        if items:
+            logger.info(f"Encontrados {len(items)} productos")
         else:
-            # Fallback: buscar productos en <li> con id="iid_XXX"
-            fallback_items = soup.find_all('li', id=lambda x: x and x.startswith('iid_'))
-            if fallback_items:
-                logger.info(f"Usando fallback: encontrados {len(fallback_items)} elementos")
-                for item_element in fallback_items:
-                    item_data = self.extract_item_data(item_element)
-                    if item_data:
-                        items.append(item_data)
-            else:
-                logger.warning("No se encontraron productos")
+            logger.warning("No se encontraron productos")
         
         return items
     
-    def extract_item_data(self, element):
-        """Extrae título, imagen, código y enlace de un elemento del catálogo - específico para Evolución-A"""
-        item = {
-            'titulo': '',
-            'codigo': '',
-            'imagen_principal': '',
-            'url_imagen_principal': '',
-            'precio': '',
-            'enlace_detalle': '',
-            'descripcion_corta': '',
-            'marca': 'Evolución-A'
-        }
-        
-        try:
-            # Extraer título del enlace en h3
-            title_link = element.find('h3')
-            if title_link:
-                link_elem = title_link.find('a')
-                if link_elem:
-                    item['titulo'] = link_elem.get_text(strip=True)
-                    # URL relativa del producto
-                    href = link_elem.get('href')
-                    if href:
-                        item['enlace_detalle'] = urljoin(self.base_url, href)
-            
-            # Extraer código del producto
-            sku_elem = element.find('p', class_='sku')
-            if sku_elem:
-                strong_elem = sku_elem.find('strong')
-                if strong_elem and strong_elem.next_sibling:
-                    item['codigo'] = str(strong_elem.next_sibling).strip()
-            
-            # Extraer imagen principal
-            image_p = element.find('p', class_='image')
-            if image_p:
-                img = image_p.find('img')
-                if img:
-                    img_src = img.get('src')
-                    if img_src:
-                        item['url_imagen_principal'] = img_src
-                        item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
-            
-            # Extraer precio
-            price_elem = element.find('p', class_='price')
-            if price_elem:
-                price_strong = price_elem.find('strong', class_='sales_price')
-                if price_strong:
-                    item['precio'] = price_strong.get_text(strip=True)
-            
-            # Extraer descripción corta
-            text_div = element.find('div', class_='text')
-            if text_div:
-                desc_p = text_div.find('p')
-                if desc_p:
-                    item['descripcion_corta'] = desc_p.get_text(strip=True)[:200]
-            
-            logger.info(f"Extraído producto: {item['titulo']} - Código: {item['codigo']}")
-            return item
-            
-        except Exception as e:
-            logger.error(f"Error extrayendo datos del elemento: {e}")
-            return None
-    
     def scrape_catalog(self, max_categories=None):
         """Función principal para hacer scraping del catálogo"""
+        items = asyncio.run(self.scrape_catalog_async(max_categories))
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        return items
+    
+    def parse_listing(self, html_content):
+        """Productos y enlaces de categoría de una página de listado
+
+        Se usa con fetch_engine.fetch_parsed, así que una página enlazada desde
+        varios padres se parsea una sola vez por crawl; los nombres de las
+        categorías se completan después con with_parent. Ambos extractores
+        comparten la misma ParsedPage: los productos salen de su árbol lxml y
+        las categorías de un árbol BeautifulSoup limitado a su bloque.
+        """
+        page = ParsedPage(html_content, self.CATEGORY_STRAINER)
+        return self.extract_catalog_items(page), self.extract_categories(page)
+    
+    def with_parent(self, categories, parent_category):
+        """Copia de las categorías de parse_listing con el nombre completo bajo su padre"""
+        return [
+            dict(category, nombre=f"{parent_category} > {category['nombre_corto']}", es_subcategoria=True)
+            for category in categories
+        ]
+    
+    async def scrape_subcategory_async(self, subcat):
+        """Descarga una subcategoría y sus sub-subcategorías y devuelve sus productos"""
+        all_items = []
+        
+        listing = await self.fetch_engine.fetch_parsed(subcat['url'], self.parse_listing)
+        if not listing:
+            return all_items
+        items, sub_subcategories = listing
+        
+        # Extraer productos directamente de esta subcategoría
+        if items:
+            logger.info(f"    ✓ {len(items)} productos en nivel actual de {subcat['nombre_corto']}")
+            # Los productos parseados se comparten entre padres: se copian antes de etiquetarlos
+            all_items.extend(dict(item, categoria=subcat['nombre']) for item in items)
+        
+        # SIEMPRE buscar sub-subcategorías (tercer nivel)
+        sub_subcategories = self.with_parent(sub_subcategories, subcat['nombre'])
+        if sub_subcategories:
+            logger.info(f"    → {len(sub_subcategories)} sub-subcategorías encontradas")
+            # parse_listing y no extract_catalog_items: si la página también es
+            # subcategoría de otro padre, se reutiliza el mismo parseo
+            pages = await asyncio.gather(*(
+                self.fetch_engine.fetch_parsed(sub_subcat['url'], self.parse_listing)
+                for sub_subcat in sub_subcategories
+            ))
+            for sub_subcat, sub_listing in zip(sub_subcategories, pages):
+                sub_items = sub_listing[0] if sub_listing else []
+                if sub_items:
+                    logger.info(f"        ✓ {len(sub_items)} productos en {sub_subcat['nombre_corto']}")
+                    all_items.extend(dict(item, categoria=sub_subcat['nombre']) for item in sub_items)
+        
+        return all_items
+    
+    async def scrape_category_async(self, category):
+        """Descarga una categoría con sus subcategorías y devuelve sus productos en orden"""
+        all_items = []
+        
+        listing = await self.fetch_engine.fetch_parsed(category['url'], self.parse_listing)
+        
+        if not listing:
+            logger.warning(f"No se pudo obtener contenido de: {category['nombre']}")
+            return all_items
+        items, subcategories = listing
+        
+        # Primero buscar si hay subcategorías en esta categoría
+        subcategories = self.with_parent(subcategories, category['nombre_corto'] if 'nombre_corto' in category else category['nombre'])
+        
+        if subcategories:
+            logger.info(f"Encontradas {len(subcategories)} subcategorías en {category['nombre_corto']}")
+            results = await asyncio.gather(*(self.scrape_subcategory_async(subcat) for subcat in subcategories))
+            for sub_items in results:
+                all_items.extend(sub_items)
+        else:
+            # No hay subcategorías, buscar productos directamente
+            if not items:
+                logger.info(f"Sin productos en: {category['nombre']}")
+            else:
+                logger.info(f"✓ {len(items)} productos encontrados en {category['nombre']}")
+                all_items.extend(dict(item, categoria=category['nombre']) for item in items)
+        
+        return all_items
+    
+    async def scrape_catalog_async(self, max_categories=None):
+        """Variante asíncrona de scrape_catalog: categorías y subcategorías se descargan en paralelo"""
+        await self.retry_dead_letters_async()
         all_items = []
         
         logger.info(f"Iniciando scraping de: {self.catalogo_url}")
         
         # Obtener la página del catálogo
-        html_content = self.get_page_content(self.catalogo_url)
+        html_content = await self.get_page_content_async(self.catalogo_url)
         
         if not html_content:
             logger.error("No se pudo obtener el contenido de la página")
             return all_items
         
-        # Extraer las categorías
-        categories = self.extract_categories(html_content)
+        # Extraer las categorías (el mismo árbol sirve para buscar productos si no hay)
+        page = ParsedPage(html_content, self.CATEGORY_STRAINER)
+        categories = self.extract_categories(page)
         
         if not categories:
             logger.warning("No se encontraron categorías, intentando extraer productos de la página principal")
             # Intentar extraer productos directamente del catálogo
-            items = self.extract_catalog_items(html_content)
+            items = self.extract_catalog_items(page)
             if items:
                 for item in items:
                     item['categoria'] = 'Destacados'
@@ -265,70 +261,12 @@ class EvolucionAScraperCompeticion:
             categories = categories[:max_categories]
             logger.info(f"Limitando a las primeras {max_categories} categorías")
         
-        # Recorrer cada categoría y sus subcategorías
-        for i, category in enumerate(categories, 1):
-            logger.info("")
-            logger.info(f"{'='*60}")
-            logger.info(f"Procesando categoría {i}/{len(categories)}: {category['nombre']}")
-            logger.info(f"{'='*60}")
-            
-            category_html = self.get_page_content(category['url'])
-            
-            if not category_html:
-                logger.warning(f"No se pudo obtener contenido de: {category['nombre']}")
-                continue
-            
-            # Primero buscar si hay subcategorías en esta categoría
-            subcategories = self.extract_categories(category_html, parent_category=category['nombre_corto'] if 'nombre_corto' in category else category['nombre'])
-            
-            if subcategories:
-                logger.info(f"Encontradas {len(subcategories)} subcategorías en {category['nombre_corto']}")
-                # Procesar las subcategorías
-                for j, subcat in enumerate(subcategories, 1):
-                    logger.info(f"  [{j}/{len(subcategories)}] {subcat['nombre_corto']}")
-                    
-                    subcat_html = self.get_page_content(subcat['url'])
-                    if subcat_html:
-                        # Extraer productos directamente de esta subcategoría
-                        items = self.extract_catalog_items(subcat_html)
-                        if items:
-                            logger.info(f"    ✓ {len(items)} productos en nivel actual")
-                            for item in items:
-                                item['categoria'] = subcat['nombre']
-                                all_items.append(item)
-                        
-                        # SIEMPRE buscar sub-subcategorías (tercer nivel)
-                        sub_subcategories = self.extract_categories(subcat_html, parent_category=subcat['nombre'])
-                        if sub_subcategories:
-                            logger.info(f"    → {len(sub_subcategories)} sub-subcategorías encontradas")
-                            for k, sub_subcat in enumerate(sub_subcategories, 1):
-                                logger.info(f"      [{k}/{len(sub_subcategories)}] {sub_subcat['nombre_corto']}")
-                                
-                                sub_subcat_html = self.get_page_content(sub_subcat['url'])
-                                if sub_subcat_html:
-                                    sub_items = self.extract_catalog_items(sub_subcat_html)
-                                    if sub_items:
-                                        logger.info(f"        ✓ {len(sub_items)} productos")
-                                        for item in sub_items:
-                                            item['categoria'] = sub_subcat['nombre']
-                                            all_items.append(item)
-                                
-                                time.sleep(0.3)  # Pausa entre sub-subcategorías
-                    
-                    time.sleep(0.5)  # Pausa entre subcategorías
-            else:
-                # No hay subcategorías, buscar productos directamente
-                items = self.extract_catalog_items(category_html)
-                
-                if not items:
-                    logger.info(f"Sin productos en: {category['nombre']}")
-                else:
-                    logger.info(f"✓ {len(items)} productos encontrados")
-                    for item in items:
-                        item['categoria'] = category['nombre']
-                        all_items.append(item)
-            
-            time.sleep(1)  # Pausa entre categorías
+        # Recorrer todas las categorías en paralelo; los resultados mantienen el orden
+        results = await asyncio.gather(*(self.scrape_category_async(category) for category in categories))
+        
+        for i, (category, items) in enumerate(zip(categories, results), 1):
+            logger.info(f"Categoría {i}/{len(categories)}: {category['nombre']} - {len(items)} productos")
+            all_items.extend(items)
         
         # Eliminar duplicados
         logger.info("")
@@ -337,6 +275,8 @@ class EvolucionAScraperCompeticion:
         seen_keys = set()
         for item in all_items:
             key = item.get('enlace_detalle') or item.get('codigo') or item.get('titulo')
+            if item.get('enlace_detalle'):
+                key = canonicalize_url(key)
             if key and key not in seen_keys:
                 unique_items.append(item)
                 seen_keys.add(key)
@@ -347,6 +287,49 @@ class EvolucionAScraperCompeticion:
         
         return unique_items
     
+    def scrape_sitemap(self):
+        """Pasada incremental: solo los listados del sitemap modificados desde la última ejecución
+
+        Devuelve los productos nuevos o actualizados para combinarlos con la
+        salida anterior mediante merge_items.
+        """
+        discovery = SitemapDiscovery(self.fetcher)
+        started_at = time.time()
+        urls = list(discovery.changed_urls(self.base_url))
+        logger.info(discovery.summary())
+        
+        items, complete = asyncio.run(self.scrape_sitemap_async(urls))
+        if complete:
+            discovery.mark_success(self.base_url, started_at)
+        else:
+            logger.warning("Hubo páginas sin descargar: la próxima pasada volverá a revisar estos cambios")
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        return items
+    
+    async def scrape_sitemap_async(self, urls):
+        """Descarga los listados cambiados; devuelve (productos, si se descargó todo)"""
+        listing_urls = [url for url in urls if url.startswith(self.catalogo_url + '/')]
+        logger.info(f"→ {len(listing_urls)} páginas de catálogo modificados")
+        
+        pages = await asyncio.gather(*(
+            self.fetch_engine.fetch_parsed(url, self.extract_catalog_items) for url in listing_urls
+        ))
+        unique_items = []
+        seen_keys = set()
+        for url, items in zip(listing_urls, pages):
+            for item in items or []:
+                key = item.get('enlace_detalle') or item.get('codigo') or item.get('titulo')
+                if item.get('enlace_detalle'):
+                    key = canonicalize_url(key)
+                if key and key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                unique_items.append(dict(item, categoria=category_from_url(url)))
+        
+        logger.info(f"✓ {len(unique_items)} productos nuevos o modificados")
+        return unique_items, all(page is not None for page in pages)
+    
     def save_to_csv(self, items, filename='evolucion_a_productos.csv'):
         """Guarda los productos en CSV"""
         if not items:
@@ -381,11 +364,20 @@ def main():
     logger.info("URL: https://www.evolucion-a.com/es/catalogo")
     logger.info("=" * 60)
     
-    scraper = EvolucionAScraperCompeticion()
+    # --offline: reproduce la última ejecución desde la caché sin acceder a la red
+    offline = '--offline' in sys.argv
+    # --sitemap: solo revisa las páginas del sitemap modificadas desde la última ejecución
+    incremental = '--sitemap' in sys.argv
+    scraper = EvolucionAScraperCompeticion(offline=offline)
     
-    # Realizar scraping de todas las categorías (8 marcas principales)
-    # Cambiar max_categories=N para limitar, o None para todas las categorías
-    items = scraper.scrape_catalog(max_categories=None)
+    if incremental:
+        # Combinar los cambios con el CSV de la ejecución anterior
+        previous_items = load_csv_items('evolucion_a_productos.csv')
+        items = merge_items(previous_items, scraper.scrape_sitemap())
+    else:
+        # Realizar scraping de todas las categorías (8 marcas principales)
+        # Cambiar max_categories=N para limitar, o None para todas las categorías
+        items = scraper.scrape_catalog(max_categories=None)
     
     if items:
         logger.info("")
@@ -5,95 +5,62 @@ Web Scraper para extraer información completa del catálogo de Evolución-A
 Específicamente diseñado para la estructura del "Listado de destacados"
 """
 
-import base64
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from bs4 import SoupStrainer
 import csv
-import time
 import os
+import sys
 from urllib.parse import urljoin, urlparse
 import logging
-import gzip
-import zlib
-import chardet
-import brotli
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping_core import AsyncFetchEngine, create_fetcher, make_soup
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class EvolucionScraper:
-    def __init__(self, base_url="https://www.evolucion-a.com/es/"):
+    # Subárbol que se construye al parsear listados (el resto de la página se descarta)
+    HIGHLIGHTED_STRAINER = SoupStrainer('div', id='block_highlighted_products')
+    
+    def __init__(self, base_url="https://www.evolucion-a.com/es/", max_concurrency=32, max_per_host=4, offline=False, cache_dir='.http_cache', dead_letter_file='dead_letters.jsonl'):
         self.base_url = base_url
-        self.session = requests.Session()
-        # Headers para parecer un navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Núcleo de descarga compartido: caché, limitador, reintentos y decodificación
+        self.fetcher = create_fetcher(offline=offline, cache_dir=cache_dir, dead_letter_file=dead_letter_file)
+        # Motor asíncrono que ejecuta get_page_content con límites de concurrencia
+        self.fetch_engine = AsyncFetchEngine(self.get_page_content, max_concurrency, max_per_host)
         
     def get_page_content(self, url):
         """Obtiene el contenido HTML real (descomprimido y decodificado correctamente)."""
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-
-            raw_data = response.content
-
-            # --- 1️⃣ Detectar compresión ---
-            content_encoding = response.headers.get('Content-Encoding', '').lower()
-
-            if 'gzip' in content_encoding:
-                try:
-                    raw_data = gzip.decompress(raw_data)
-                except Exception:
-                    pass  # algunos servidores ya lo descomprimen automáticamente
-
-            elif 'deflate' in content_encoding:
-                try:
-                    raw_data = zlib.decompress(raw_data)
-                except Exception:
-                    pass
-            elif 'br' in content_encoding:
-                try:
-                    raw_data = brotli.decompress(raw_data)
-                except Exception:
-                    pass
-
-            # --- 2️⃣ Detectar si el cuerpo parece base64 ---
-            # A veces devuelven el HTML como texto codificado (inicia con letras y acaba con ==)
-            try:
-                if all(c.isalnum() or c in '+/=\n\r' for c in raw_data.decode('ascii', errors='ignore')[:200]):
-                    decoded = base64.b64decode(raw_data)
-                    print("Contenido decodificado de base64")
-                    # Si la decodificación tiene sentido (contiene <html>), usamos eso
-                    if b'<html' in decoded.lower():
-                        raw_data = decoded
-            except Exception:
-                pass
-
-            # --- 3️⃣ Detectar codificación de texto ---
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding') or response.apparent_encoding or 'utf-8'
-
-            html = raw_data.decode(encoding, errors='replace')
-
-            return html
+        return self.fetcher.get_html(url)
+    
+    async def get_page_content_async(self, url):
+        """Versión awaitable de get_page_content sobre el motor asíncrono"""
+        return await self.fetch_engine.fetch(url)
+    
+    async def retry_dead_letters_async(self):
+        """Reintenta las URLs de este sitio que fallaron en ejecuciones anteriores
 
-        except requests.RequestException as e:
-            logger.error(f"Error al acceder a {url}: {e}")
-            return None
+        Las que se recuperan quedan en la caché, así que el crawl posterior no
+        vuelve a descargarlas; las que fallan de nuevo vuelven a la lista.
+        """
+        if self.fetcher.cache is not None and self.fetcher.cache.offline:
+            return
+        pending = self.fetcher.dead_letters.take(urlparse(self.base_url).netloc)
+        if not pending:
+            return
+        logger.info(f"Reintentando {len(pending)} URLs fallidas en ejecuciones anteriores")
+        results = await self.fetch_engine.fetch_all([entry['url'] for entry in pending])
+        logger.info(f"✓ Recuperadas {sum(1 for html in results if html)}/{len(pending)} URLs")
     
     def extract_catalog_items(self, html_content):
         """Extrae los elementos del catálogo desde el HTML - específico para Evolución-A"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content, parse_only=self.HIGHLIGHTED_STRAINER)
 
         items = []
         
@@ -112,7 +79,8 @@ class EvolucionScraper:
                     items.append(item_data)
         else:
             logger.warning("No se encontró la sección 'Listado de destacados'")
-            # Fallback: buscar cualquier lista de productos
+            # Fallback: buscar cualquier lista de productos (necesita la página completa)
+            soup = make_soup(html_content)
             fallback_items = soup.select('.item_list ul li, ul li[id*="iid_"]')
             if fallback_items:
                 logger.info(f"Usando fallback: encontrados {len(fallback_items)} elementos")
@@ -187,6 +155,12 @@ class EvolucionScraper:
     
     def extract_detailed_product_info(self, product_url):
         """Extrae información detallada de la página individual del producto"""
+        logger.info(f"Obteniendo detalles de: {product_url}")
+        html_content = self.get_page_content(product_url)
+        return self.parse_detailed_product_info(html_content, product_url)
+    
+    def parse_detailed_product_info(self, html_content, product_url=''):
+        """Extrae la información detallada del HTML de la página de un producto"""
         detailed_info = {
             'imagenes_adicionales': [],
             'urls_imagenes_adicionales': [],
@@ -195,13 +169,11 @@ class EvolucionScraper:
             'url_archivo_descarga': ''
         }
         
+        if not html_content:
+            return detailed_info
+        
         try:
-            logger.info(f"Obteniendo detalles de: {product_url}")
-            html_content = self.get_page_content(product_url)
-            if not html_content:
-                return detailed_info
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # Extraer imágenes adicionales de la galería
             image_list = soup.find('ul', class_='image_list')
@@ -256,6 +228,20 @@ class EvolucionScraper:
     
     def scrape_catalog(self, max_pages=5):
         """Función principal para hacer scraping del catálogo con información detallada"""
+        items = asyncio.run(self.scrape_catalog_async(max_pages))
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        return items
+    
+    async def fetch_detail_async(self, product_url):
+        """Versión awaitable de extract_detailed_product_info"""
+        logger.info(f"Obteniendo detalles de: {product_url}")
+        html_content = await self.get_page_content_async(product_url)
+        return self.parse_detailed_product_info(html_content, product_url)
+    
+    async def scrape_catalog_async(self, max_pages=5):
+        """Variante asíncrona de scrape_catalog: páginas y detalles se descargan en paralelo"""
+        await self.retry_dead_letters_async()
         all_items = []
         
         # Páginas comunes a revisar
@@ -267,34 +253,28 @@ class EvolucionScraper:
             'catalog.html'
         ]
         
-        for page in pages_to_check[:max_pages]:
-            url = urljoin(self.base_url, page)
-            logger.info(f"Escaneando: {url}")
-            
-            html_content = self.get_page_content(url)
+        urls = [urljoin(self.base_url, page) for page in pages_to_check[:max_pages]]
+        logger.info(f"Escaneando {len(urls)} páginas candidatas")
+        pages = await self.fetch_engine.fetch_all(urls)
+        
+        # Se usa la primera página (en el orden original) que tenga productos
+        for url, html_content in zip(urls, pages):
             items = self.extract_catalog_items(html_content)
             
             if items:
                 logger.info(f"Encontrados {len(items)} productos en {url}")
                 
-                # Para cada producto, obtener información detallada
-                for item in items:
-                    if item.get('enlace_detalle'):
-                        detailed_info = self.extract_detailed_product_info(item['enlace_detalle'])
-                        # Combinar información básica con detalles
-                        item.update(detailed_info)
-                        all_items.append(item)
-                        
-                        # Pausa entre solicitudes para ser respetuoso
-                        time.sleep(2)
-                    else:
-                        # Si no hay enlace de detalle, agregar solo info básica
-                        all_items.append(item)
+                # Para cada producto, obtener información detallada en paralelo
+                with_details = [item for item in items if item.get('enlace_detalle')]
+                details = await asyncio.gather(*(self.fetch_detail_async(item['enlace_detalle']) for item in with_details))
+                for item, detailed_info in zip(with_details, details):
+                    # Combinar información básica con detalles
+                    item.update(detailed_info)
+                
+                # Los productos sin enlace de detalle se agregan solo con info básica
+                all_items.extend(items)
                 
                 break  # Si encontramos productos en una página, no seguir buscando
-            
-            # Pausa educada entre solicitudes de páginas
-            time.sleep(1)
         
         # Eliminar duplicados basándose en el código del producto
         unique_items = []
@@ -366,7 +346,9 @@ def main():
     """Función principal"""
     logger.info("Iniciando scraper específico de Evolución-A...")
     
-    scraper = EvolucionScraper()
+    # --offline: reproduce la última ejecución desde la caché sin acceder a la red
+    offline = '--offline' in sys.argv
+    scraper = EvolucionScraper(offline=offline)
     
     # Realizar scraping
     items = scraper.scrape_catalog()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Campos del formulario de perfil de empresa de GeneraWeb Duda
+
+Tabla común a los scrapers que abren el perfil (user_profile) de cada
+empresa: nombre exacto de cada input/select/textarea del formulario y campo
+del diccionario del perfil al que se vuelca.
+"""
+
+import logging
+import os
+import sys
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core.labels import LabelMapper, LabelRule
+
+logger = logging.getLogger(__name__)
+
+
+def _gestor_proyecto(element, value):
+    """Opción seleccionada del select de gestor de proyecto"""
+    if isinstance(element, dict):
+        # Control extraído en el navegador (fetch_in_page): la opción ya viene resuelta
+        return element['selected'] if element['tag'] == 'select' else None
+    if element.name != 'select':
+        return None
+    selected = element.find('option', selected=True)
+    return selected.get_text(strip=True) if selected else None
+
+
+PROFILE_FIELDS = LabelMapper([
+    LabelRule('id', 'Id'),
+    LabelRule('nombre', 'Nombre'),
+    LabelRule('apellidos', 'Apellidos'),
+    LabelRule('razon_social', 'RazonSocial'),
+    LabelRule('login', 'Login'),
+    LabelRule('password', 'Password_No_Encriptado'),
+    LabelRule('cif_nif', 'NifCif'),
+    LabelRule('direccion', 'Direccion'),
+    LabelRule('provincia', 'Provincia'),
+    LabelRule('ciudad', 'Ciudad'),
+    LabelRule('codigo_postal', 'Cp'),
+    LabelRule('pais', 'Pais'),
+    LabelRule('telefono', 'Telefono'),
+    LabelRule('fax', 'Fax'),
+    LabelRule('telefono_movil', 'Telefono_movil'),
+    LabelRule('url', 'Url'),
+    LabelRule('email', 'Email'),
+    LabelRule('num_dominios', 'NumDomains'),
+    LabelRule('wordpress_url', 'UrlAdminWordPress'),
+    LabelRule('gestor_proyecto', 'id_gp', read=_gestor_proyecto),
+])
+
+# Nombres de los controles del formulario que se guardan (fields de fetch_in_page)
+PROFILE_FIELD_NAMES = [rule.label for rule in PROFILE_FIELDS.rules]
+
+
+# Solo se construyen los controles del formulario (y las opciones de los select)
+FORM_STRAINER = SoupStrainer(['input', 'select', 'textarea'])
+
+
+def parse_empresa_profile(html_content):
+    """Diccionario con los campos del perfil a partir del HTML de la página user_profile"""
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=FORM_STRAINER)
+    profile_data = {}
+
+    # Buscar todos los inputs y selects en el formulario
+    form_elements = soup.find_all(['input', 'select', 'textarea'])
+    logger.debug(f"Total de elementos encontrados: {len(form_elements)}")
+
+    for element in form_elements:
+        name = element.get('name', '')
+        # El valor solo se calcula para los campos que se guardan
+        if PROFILE_FIELDS.resolve(name) is None:
+            continue
+        value = element.get('value', '') or element.get_text(strip=True)
+        PROFILE_FIELDS.assign(profile_data, name, value, element)
+
+    return profile_data
+
+
+def profile_from_controls(controls):
+    """Diccionario del perfil a partir de los controles extraídos en el navegador (fetch_in_page con fields)"""
+    profile_data = {}
+    for control in controls:
+        PROFILE_FIELDS.assign(profile_data, control['name'], control['value'], control)
+    return profile_data
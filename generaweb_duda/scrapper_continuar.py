@@ -6,24 +6,33 @@ Este scrapper continúa el scraping desde el último ID procesado
 """
 
 import csv
-import time
 import logging
 import os
-from urllib.parse import urljoin
-from selenium import webdriver
+import sys
+from urllib.parse import urljoin, urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core import AdaptiveRateLimiter, PageWaits, SessionStore, driver_ttfb
+from scraping_core.chrome import create_scraping_driver
+from scraping_core.schema import element_text
+from scraping_core.tables import extract_table_html, find_with_class, iter_table_rows
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from perfil_empresa import parse_empresa_profile
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class GeneraWebDudaScraperContinuar:
+    # Filas de la tabla de resultados: la página ha cargado cuando su número deja de crecer
+    ROWS_SELECTOR = 'table.table tr.new_platform'
+    
     def __init__(self, base_url="http://generawebduda.nlocal.com", headless=True):
         self.base_url = base_url
         self.login_url = urljoin(base_url, "/index.php")
@@ -32,23 +41,20 @@ class GeneraWebDudaScraperContinuar:
         self.profile_base_url = "http://generawebduda.nlocal.com"
         self.driver = None
         self.headless = headless
+        # Ritmo por host ajustado según el TTFB de cada página (sustituye a las pausas fijas)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=0.5, max_rate=4.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.waits = PageWaits()
+        # Cookies de la sesión guardadas entre ejecuciones: solo se hace login si han caducado
+        self.sessions = SessionStore()
+        self.session_site = urlparse(base_url).netloc
         self.csv_filename = 'generaweb_duda_empresas.csv'
         
     def init_driver(self):
         """Inicializa el driver de Selenium"""
         try:
-            chrome_options = Options()
-            
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
+            # Perfil ligero: headless nuevo, sin imágenes, fuentes, CSS ni analítica
+            self.driver = create_scraping_driver(headless=self.headless)
             logger.info("✓ Driver de Chrome inicializado correctamente")
             return True
             
@@ -101,7 +107,7 @@ class GeneraWebDudaScraperContinuar:
         try:
             logger.info(f"Iniciando sesión en: {self.login_url}")
             self.driver.get(self.login_url)
-            time.sleep(5)
+            self.waits.ready(self.driver)
             
             # Buscar campos de login
             username_field = None
@@ -154,12 +160,11 @@ class GeneraWebDudaScraperContinuar:
                 except:
                     continue
             
+            # Enviar y esperar a que cargue la página siguiente
             if login_button:
-                login_button.click()
+                self.waits.new_page(self.driver, login_button.click)
             else:
-                password_field.send_keys(Keys.RETURN)
-            
-            time.sleep(5)
+                self.waits.new_page(self.driver, lambda: password_field.send_keys(Keys.RETURN))
             
             # Verificar login exitoso
             current_url = self.driver.current_url
@@ -201,7 +206,7 @@ class GeneraWebDudaScraperContinuar:
             logger.error(f"Error guardando empresa: {e}")
     
     def extract_empresa_data(self, row):
-        """Extrae datos de una fila de empresa"""
+        """Extrae datos de una fila de empresa (elemento <tr> de lxml)"""
         try:
             empresa = {
                 'id': '',
@@ -214,24 +219,23 @@ class GeneraWebDudaScraperContinuar:
             }
             
             # Extraer ID
-            id_cell = row.find('td', class_='first_td')
-            if id_cell:
-                empresa['id'] = id_cell.get_text(strip=True)
+            id_cells = find_with_class(row, 'td', 'first_td')
+            if id_cells:
+                empresa['id'] = element_text(id_cells[0])
             
             # Extraer datos de las celdas
-            cells = row.find_all('td', class_='line')
+            cells = find_with_class(row, 'td', 'line')
             
             if len(cells) >= 4:
                 if len(cells) > 1:
-                    empresa['entrada'] = cells[1].get_text(strip=True)
+                    empresa['entrada'] = element_text(cells[1])
                 if len(cells) > 2:
-                    empresa['empresa'] = cells[2].get_text(strip=True)
+                    empresa['empresa'] = element_text(cells[2])
                 if len(cells) > 3:
-                    empresa['estado'] = cells[3].get_text(strip=True)
+                    empresa['estado'] = element_text(cells[3])
             
             # Extraer URLs
-            links = row.find_all('a', href=True)
-            for link in links:
+            for link in row.iter('a'):
                 href = link.get('href')
                 if href:
                     if 'user_profile' in href:
@@ -253,67 +257,15 @@ class GeneraWebDudaScraperContinuar:
             logger.info(f"Extrayendo perfil de empresa ID: {empresa_id}")
             
             # Abrir perfil en nueva ventana
+            self.rate_limiter.acquire(profile_url)
             self.driver.execute_script(f"window.open('{profile_url}', '_blank');")
             self.driver.switch_to.window(self.driver.window_handles[-1])
             
             # Esperar a que cargue
-            time.sleep(3)
+            self.waits.ready(self.driver)
+            self.rate_limiter.record(profile_url, latency=driver_ttfb(self.driver))
             
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            profile_data = {}
-            
-            # Extraer todos los campos del perfil
-            form_elements = soup.find_all(['input', 'select', 'textarea'])
-            
-            for element in form_elements:
-                name = element.get('name', '')
-                value = element.get('value', '') or element.get_text(strip=True)
-                
-                # Mapear nombres exactos de campos
-                if name == 'Id':
-                    profile_data['id'] = value
-                elif name == 'Nombre':
-                    profile_data['nombre'] = value
-                elif name == 'Apellidos':
-                    profile_data['apellidos'] = value
-                elif name == 'RazonSocial':
-                    profile_data['razon_social'] = value
-                elif name == 'Login':
-                    profile_data['login'] = value
-                elif name == 'Password_No_Encriptado':
-                    profile_data['password'] = value
-                elif name == 'NifCif':
-                    profile_data['cif_nif'] = value
-                elif name == 'Direccion':
-                    profile_data['direccion'] = value
-                elif name == 'Provincia':
-                    profile_data['provincia'] = value
-                elif name == 'Ciudad':
-                    profile_data['ciudad'] = value
-                elif name == 'Cp':
-                    profile_data['codigo_postal'] = value
-                elif name == 'Pais':
-                    profile_data['pais'] = value
-                elif name == 'Telefono':
-                    profile_data['telefono'] = value
-                elif name == 'Fax':
-                    profile_data['fax'] = value
-                elif name == 'Telefono_movil':
-                    profile_data['telefono_movil'] = value
-                elif name == 'Url':
-                    profile_data['url'] = value
-                elif name == 'Email':
-                    profile_data['email'] = value
-                elif name == 'NumDomains':
-                    profile_data['num_dominios'] = value
-                elif name == 'UrlAdminWordPress':
-                    profile_data['wordpress_url'] = value
-                elif name == 'id_gp':
-                    if element.name == 'select':
-                        selected = element.find('option', selected=True)
-                        if selected:
-                            profile_data['gestor_proyecto'] = selected.get_text(strip=True)
+            profile_data = parse_empresa_profile(self.driver.page_source)
             
             return profile_data
             
@@ -335,7 +287,9 @@ class GeneraWebDudaScraperContinuar:
         
         try:
             # Login
-            if not self.login("almudena.roman@nlocal.es", "aroman246"):
+            # Reutiliza la sesión guardada si sigue valiendo; si no, login
+            if not self.sessions.driver_login(self.session_site, self.driver, self.login_url,
+                                              lambda: self.login("almudena.roman@nlocal.es", "aroman246")):
                 logger.error("No se pudo realizar el login")
                 return 0
             
@@ -366,8 +320,9 @@ class GeneraWebDudaScraperContinuar:
                 url = f"{self.base_empresas_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
                 
                 logger.info(f"Navegando a página {page_num}: {url}")
-                self.driver.get(url)
-                time.sleep(8)
+                self.rate_limiter.navigate(self.driver, url)
+                # Hasta que el número de filas deje de crecer (antes una pausa fija de 8 s)
+                self.waits.stable(self.driver, self.ROWS_SELECTOR, stable_ms=500)
                 
                 # Esperar a que cargue la tabla de resultados
                 try:
@@ -383,20 +338,19 @@ class GeneraWebDudaScraperContinuar:
                     logger.warning(f"No se encontró tabla en página {page_num}, continuando...")
                     continue
                 
-                # Extraer empresas de la página actual
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                table = soup.find('table', class_='table')
-                if not table:
+                # Extraer empresas de la página actual: solo se parsea la tabla, en streaming,
+                # y de cada fila se conservan sus datos, no su árbol
+                table_html = extract_table_html(self.driver.page_source, 'table')
+                if table_html is None:
                     logger.warning(f"No se encontró tabla en página {page_num}")
                     continue
                 
-                rows = table.find_all('tr', class_='new_platform')
+                rows = [self.extract_empresa_data(row) for row in iter_table_rows(table_html, row_class='new_platform')]
                 logger.info(f"Encontradas {len(rows)} empresas en la página {page_num}")
                 
                 empresas_nuevas_pagina = 0
                 
-                for i, row in enumerate(rows, 1):
-                    empresa_data = self.extract_empresa_data(row)
+                for i, empresa_data in enumerate(rows, 1):
                     if not empresa_data or not empresa_data.get('id'):
                         continue
                     
@@ -421,9 +375,6 @@ class GeneraWebDudaScraperContinuar:
                     self.save_empresa_incremental(empresa_data)
                     empresas_nuevas_pagina += 1
                     total_empresas_nuevas += 1
-                    
-                    # Pausa entre empresas
-                    time.sleep(2)
                 
                 logger.info(f"✓ Página {page_num} completada: {empresas_nuevas_pagina} empresas nuevas procesadas")
                 
@@ -431,11 +382,6 @@ class GeneraWebDudaScraperContinuar:
                 if empresas_nuevas_pagina == 0:
                     logger.info("No hay empresas nuevas en esta página, continuando...")
                     continue
-                
-                # Pausa entre páginas
-                if page_num < 4:
-                    logger.info("Esperando antes de procesar la siguiente página...")
-                    time.sleep(3)
             
             logger.info(f"\n{'='*60}")
             logger.info(f"SCRAPING COMPLETADO")
@@ -448,6 +394,8 @@ class GeneraWebDudaScraperContinuar:
             logger.error(f"Error durante el scraping: {e}")
             return 0
         finally:
+            if self.waits.durations:
+                logger.info(self.waits.summary())
             self.close_driver()
 
 def main():
@@ -6,25 +6,37 @@ Este scrapper extrae información de dominios desde la sección domain_queue
 """
 
 import csv
-import time
 import logging
 import os
-from urllib.parse import urljoin
-from selenium import webdriver
+import re
+import sys
+from concurrent.futures import Future
+from functools import partial
+from urllib.parse import urljoin, urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core import AdaptiveRateLimiter, PageWaits, ParsePool, SessionStore, driver_ttfb
+from scraping_core.chrome import create_scraping_driver
+from scraping_core.schema import element_text
+from scraping_core.tables import extract_table_html, find_with_class, iter_table_rows
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from perfil_empresa import parse_empresa_profile
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class GeneraWebDudaScraperDominios:
-    def __init__(self, base_url="http://generawebduda.nlocal.com", headless=True):
+    # Filas de la tabla de resultados: la página ha cargado cuando su número deja de crecer
+    ROWS_SELECTOR = 'table.table tr'
+    
+    def __init__(self, base_url="http://generawebduda.nlocal.com", headless=True, parse_workers=1):
         self.base_url = base_url
         self.login_url = urljoin(base_url, "/index.php")
         self.base_dominios_url = urljoin(base_url, "/index.php")
@@ -32,23 +44,22 @@ class GeneraWebDudaScraperDominios:
         self.profile_base_url = "http://generawebduda.nlocal.com"
         self.driver = None
         self.headless = headless
+        # Ritmo por host ajustado según el TTFB de cada página (sustituye a las pausas fijas)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=0.5, max_rate=4.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.waits = PageWaits()
+        # Cookies de la sesión guardadas entre ejecuciones: solo se hace login si han caducado
+        self.sessions = SessionStore()
+        self.session_site = urlparse(base_url).netloc
         self.csv_filename = 'generaweb_duda_dominios.csv'
+        # Procesos que parsean la tabla de una página mientras el navegador carga la siguiente (0 = aquí mismo)
+        self.parse_workers = parse_workers
         
     def init_driver(self):
         """Inicializa el driver de Selenium"""
         try:
-            chrome_options = Options()
-            
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
+            # Perfil ligero: headless nuevo, sin imágenes, fuentes, CSS ni analítica
+            self.driver = create_scraping_driver(headless=self.headless)
             logger.info("✓ Driver de Chrome inicializado correctamente")
             return True
             
@@ -101,7 +112,7 @@ class GeneraWebDudaScraperDominios:
         try:
             logger.info(f"Iniciando sesión en: {self.login_url}")
             self.driver.get(self.login_url)
-            time.sleep(5)
+            self.waits.ready(self.driver)
             
             # Debug: imprimir el HTML para ver la estructura
             logger.info("Analizando estructura de la página de login...")
@@ -193,14 +204,13 @@ class GeneraWebDudaScraperDominios:
                     logger.warning(f"Error buscando botón con selector {selector}: {e}")
                     continue
             
+            # Enviar y esperar a que cargue la página siguiente
             if login_button:
-                login_button.click()
+                self.waits.new_page(self.driver, login_button.click)
                 logger.info("✓ Botón de login clickeado")
             else:
                 logger.info("No se encontró botón, intentando con Enter")
-                password_field.send_keys(Keys.RETURN)
-            
-            time.sleep(8)
+                self.waits.new_page(self.driver, lambda: password_field.send_keys(Keys.RETURN))
             
             # Verificar login exitoso
             current_url = self.driver.current_url
@@ -332,67 +342,63 @@ class GeneraWebDudaScraperDominios:
             return None
     
     def extract_table_data_from_html(self, html_content):
-        """Extrae datos de la tabla HTML específica con estructura de dominios"""
+        """Extrae datos de la tabla HTML específica con estructura de dominios
+
+        Solo se parsea el HTML de <table class="table">, en streaming con lxml,
+        y cada fila se libera en cuanto se han extraído sus datos.
+        """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            table = soup.find('table', class_='table')
+            table_html = extract_table_html(html_content, 'table')
             
-            if not table:
+            if table_html is None:
                 logger.warning("No se encontró tabla con class 'table'")
                 return []
             
             dominios = []
             
-            # Buscar todas las filas de datos (excluyendo el header)
-            rows = table.find_all('tr')
-            
-            for row in rows:
-                # Saltar el header y filas vacías
-                if not row.find('td', class_='line'):
-                    continue
-                
+            # Recorrer todas las filas (el header no tiene celdas td.line)
+            for row in iter_table_rows(table_html):
                 # Extraer datos de cada fila
-                cells = row.find_all('td', class_='line')
+                cells = find_with_class(row, 'td', 'line')
                 
                 if len(cells) >= 6:  # Verificar que tenga todas las columnas necesarias
                     dominio = {
-                        'id': cells[0].get_text(strip=True),
-                        'empresa': cells[1].get_text(strip=True),
+                        'id': element_text(cells[0]),
+                        'empresa': element_text(cells[1]),
                         'dominio': '',
-                        'principal': cells[3].get_text(strip=True),
+                        'principal': element_text(cells[3]),
                         'plataforma_correo': '',
                         'cuentas_correo': '',
                         'url_perfil': ''
                     }
                     
                     # Extraer dominio del enlace
-                    dominio_link = cells[2].find('a')
-                    if dominio_link:
-                        dominio['dominio'] = dominio_link.get_text(strip=True)
+                    dominio_link = next(cells[2].iter('a'), None)
+                    if dominio_link is not None:
+                        dominio['dominio'] = element_text(dominio_link)
                         dominio['url_web'] = dominio_link.get('href', '')
                     
                     # Extraer información de plataforma de correo
-                    select_element = cells[4].find('select')
-                    if select_element:
-                        selected_option = select_element.find('option', selected=True)
-                        if selected_option:
-                            dominio['plataforma_correo'] = selected_option.get_text(strip=True)
+                    select_element = next(cells[4].iter('select'), None)
+                    if select_element is not None:
+                        selected_option = next((option for option in select_element.iter('option')
+                                                if option.get('selected') is not None), None)
+                        if selected_option is not None:
+                            dominio['plataforma_correo'] = element_text(selected_option)
                     
                     # Extraer número de cuentas de correo
-                    texto_plataforma = cells[4].get_text(strip=True)
+                    texto_plataforma = element_text(cells[4])
                     if '(' in texto_plataforma and ')' in texto_plataforma:
-                        import re
                         match = re.search(r'\((\d+)\s+cuentas?\)', texto_plataforma)
                         if match:
                             dominio['cuentas_correo'] = match.group(1)
                     
                     # Extraer URL del perfil
-                    perfil_link = cells[5].find('a')
-                    if perfil_link:
+                    perfil_link = next(cells[5].iter('a'), None)
+                    if perfil_link is not None:
                         onclick = perfil_link.get('onclick', '')
                         if 'domain_profile' in onclick:
                             # Extraer ID del dominio del onclick
-                            import re
                             match = re.search(r"id=(\d+)", onclick)
                             if match:
                                 dominio_id = match.group(1)
@@ -413,67 +419,15 @@ class GeneraWebDudaScraperDominios:
             logger.info(f"Extrayendo perfil de empresa ID: {empresa_id}")
             
             # Abrir perfil en nueva ventana
+            self.rate_limiter.acquire(profile_url)
             self.driver.execute_script(f"window.open('{profile_url}', '_blank');")
             self.driver.switch_to.window(self.driver.window_handles[-1])
             
             # Esperar a que cargue
-            time.sleep(3)
+            self.waits.ready(self.driver)
+            self.rate_limiter.record(profile_url, latency=driver_ttfb(self.driver))
             
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            profile_data = {}
-            
-            # Extraer todos los campos del perfil
-            form_elements = soup.find_all(['input', 'select', 'textarea'])
-            
-            for element in form_elements:
-                name = element.get('name', '')
-                value = element.get('value', '') or element.get_text(strip=True)
-                
-                # Mapear nombres exactos de campos
-                if name == 'Id':
-                    profile_data['id'] = value
-                elif name == 'Nombre':
-                    profile_data['nombre'] = value
-                elif name == 'Apellidos':
-                    profile_data['apellidos'] = value
-                elif name == 'RazonSocial':
-                    profile_data['razon_social'] = value
-                elif name == 'Login':
-                    profile_data['login'] = value
-                elif name == 'Password_No_Encriptado':
-                    profile_data['password'] = value
-                elif name == 'NifCif':
-                    profile_data['cif_nif'] = value
-                elif name == 'Direccion':
-                    profile_data['direccion'] = value
-                elif name == 'Provincia':
-                    profile_data['provincia'] = value
-                elif name == 'Ciudad':
-                    profile_data['ciudad'] = value
-                elif name == 'Cp':
-                    profile_data['codigo_postal'] = value
-                elif name == 'Pais':
-                    profile_data['pais'] = value
-                elif name == 'Telefono':
-                    profile_data['telefono'] = value
-                elif name == 'Fax':
-                    profile_data['fax'] = value
-                elif name == 'Telefono_movil':
-                    profile_data['telefono_movil'] = value
-                elif name == 'Url':
-                    profile_data['url'] = value
-                elif name == 'Email':
-                    profile_data['email'] = value
-                elif name == 'NumDomains':
-                    profile_data['num_dominios'] = value
-                elif name == 'UrlAdminWordPress':
-                    profile_data['wordpress_url'] = value
-                elif name == 'id_gp':
-                    if element.name == 'select':
-                        selected = element.find('option', selected=True)
-                        if selected:
-                            profile_data['gestor_proyecto'] = selected.get_text(strip=True)
+            profile_data = parse_empresa_profile(self.driver.page_source)
             
             return profile_data
             
@@ -488,6 +442,37 @@ class GeneraWebDudaScraperDominios:
             except:
                 pass
     
+    def guardar_dominios_pagina(self, page_num, dominios_pagina, processed_ids):
+        """Guarda los dominios nuevos de una página ya parseada (lista o Future del pool); devuelve cuántos"""
+        if isinstance(dominios_pagina, Future):
+            dominios_pagina = dominios_pagina.result()
+        logger.info(f"Encontrados {len(dominios_pagina)} dominios en la página {page_num}")
+        
+        dominios_nuevos_pagina = 0
+        
+        for i, dominio_data in enumerate(dominios_pagina, 1):
+            if not dominio_data or not dominio_data.get('id'):
+                continue
+            
+            dominio_id = int(dominio_data['id'])
+            
+            # Verificar si ya fue procesado
+            if dominio_id in processed_ids:
+                logger.info(f"Dominio {dominio_id} ya procesado, saltando...")
+                continue
+            
+            logger.info(f"Procesando dominio nuevo {i}/{len(dominios_pagina)}: {dominio_data.get('empresa', 'Sin empresa')} - {dominio_data.get('dominio', 'Sin dominio')} (ID: {dominio_id})")
+            
+            # Guardar dominio inmediatamente usando la función específica para tabla
+            self.save_table_dominios_incremental([dominio_data])
+            dominios_nuevos_pagina += 1
+        
+        logger.info(f"✓ Página {page_num} completada: {dominios_nuevos_pagina} dominios nuevos procesados")
+        
+        if dominios_nuevos_pagina == 0:
+            logger.info("No hay dominios nuevos en esta página, continuando...")
+        return dominios_nuevos_pagina
+    
     def scrape_dominios(self, start_page=1):
         """Extrae información de dominios desde la sección domain_queue"""
         if not self.init_driver():
@@ -495,7 +480,9 @@ class GeneraWebDudaScraperDominios:
         
         try:
             # Login
-            if not self.login("almudena.roman@nlocal.es", "aroman246"):
+            # Reutiliza la sesión guardada si sigue valiendo; si no, login
+            if not self.sessions.driver_login(self.session_site, self.driver, self.login_url,
+                                              lambda: self.login("almudena.roman@nlocal.es", "aroman246")):
                 logger.error("No se pudo realizar el login")
                 return 0
             
@@ -505,81 +492,65 @@ class GeneraWebDudaScraperDominios:
             
             total_empresas_nuevas = 0
             
-            # Procesar páginas desde donde se quedó
-            for page_num in range(start_page, 5):  # Páginas 1-4
-                logger.info(f"\n{'='*50}")
-                logger.info(f"PROCESANDO PÁGINA {page_num}")
-                logger.info(f"{'='*50}")
-                
-                # Construir URL para la página específica de dominios
-                params = {
-                    'ids': '',
-                    'searchCondition': 'CO',
-                    'name': '',
-                    'domain': '',
-                    'count': str(self.count),
-                    'search': 'Buscar',
-                    's': 'domain_queue',
-                    'page': str(page_num)
-                }
-                url = f"{self.base_dominios_url}?" + "&".join([f"{k}={v}" for k, v in params.items()]) + "#empresas"
-                
-                logger.info(f"Navegando a página {page_num}: {url}")
-                self.driver.get(url)
-                time.sleep(8)
-                
-                # Esperar a que cargue la tabla de resultados
-                try:
-                    WebDriverWait(self.driver, 15).until(
-                        EC.any_of(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")),
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "table.tablebackg")),
-                            EC.presence_of_element_located((By.TAG_NAME, "table"))
-                        )
-                    )
-                    logger.info(f"✓ Página {page_num} cargada correctamente")
-                except TimeoutException:
-                    logger.warning(f"No se encontró tabla en página {page_num}, continuando...")
-                    continue
-                
-                # Extraer dominios de la página actual usando la nueva función
-                dominios_pagina = self.extract_table_data_from_html(self.driver.page_source)
-                logger.info(f"Encontrados {len(dominios_pagina)} dominios en la página {page_num}")
-                
-                dominios_nuevos_pagina = 0
-                
-                for i, dominio_data in enumerate(dominios_pagina, 1):
-                    if not dominio_data or not dominio_data.get('id'):
-                        continue
+            # La tabla de cada página se parsea en el pool mientras el navegador
+            # carga la siguiente; sus dominios se guardan después de esa carga
+            pool = ParsePool(partial(type(self), base_url=self.base_url), self.parse_workers) if self.parse_workers else None
+            pendiente = None
+            try:
+                # Procesar páginas desde donde se quedó
+                for page_num in range(start_page, 5):  # Páginas 1-4
+                    logger.info(f"\n{'='*50}")
+                    logger.info(f"PROCESANDO PÁGINA {page_num}")
+                    logger.info(f"{'='*50}")
                     
-                    dominio_id = int(dominio_data['id'])
+                    # Construir URL para la página específica de dominios
+                    params = {
+                        'ids': '',
+                        'searchCondition': 'CO',
+                        'name': '',
+                        'domain': '',
+                        'count': str(self.count),
+                        'search': 'Buscar',
+                        's': 'domain_queue',
+                        'page': str(page_num)
+                    }
+                    url = f"{self.base_dominios_url}?" + "&".join([f"{k}={v}" for k, v in params.items()]) + "#empresas"
+                    
+                    logger.info(f"Navegando a página {page_num}: {url}")
+                    self.rate_limiter.navigate(self.driver, url)
+                    # Hasta que el número de filas deje de crecer (antes una pausa fija de 8 s)
+                    self.waits.stable(self.driver, self.ROWS_SELECTOR, stable_ms=500)
                     
-                    # Verificar si ya fue procesado
-                    if dominio_id in processed_ids:
-                        logger.info(f"Dominio {dominio_id} ya procesado, saltando...")
+                    # Esperar a que cargue la tabla de resultados
+                    try:
+                        WebDriverWait(self.driver, 15).until(
+                            EC.any_of(
+                                EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")),
+                                EC.presence_of_element_located((By.CSS_SELECTOR, "table.tablebackg")),
+                                EC.presence_of_element_located((By.TAG_NAME, "table"))
+                            )
+                        )
+                        logger.info(f"✓ Página {page_num} cargada correctamente")
+                    except TimeoutException:
+                        logger.warning(f"No se encontró tabla en página {page_num}, continuando...")
                         continue
                     
-                    logger.info(f"Procesando dominio nuevo {i}/{len(dominios_pagina)}: {dominio_data.get('empresa', 'Sin empresa')} - {dominio_data.get('dominio', 'Sin dominio')} (ID: {dominio_id})")
+                    # Extraer dominios de la página actual (en el pool si lo hay)
+                    if pool:
+                        dominios_pagina = pool.submit('extract_table_data_from_html', self.driver.page_source)
+                    else:
+                        dominios_pagina = self.extract_table_data_from_html(self.driver.page_source)
                     
-                    # Guardar dominio inmediatamente usando la función específica para tabla
-                    self.save_table_dominios_incremental([dominio_data])
-                    dominios_nuevos_pagina += 1
-                    total_empresas_nuevas += 1
+                    if pendiente:
+                        total_empresas_nuevas += self.guardar_dominios_pagina(*pendiente, processed_ids)
+                    pendiente = (page_num, dominios_pagina)
                     
-                    # Pausa entre dominios
-                    time.sleep(2)
-                
-                logger.info(f"✓ Página {page_num} completada: {dominios_nuevos_pagina} dominios nuevos procesados")
-                
-                # Si no hay dominios nuevos en esta página, continuar con la siguiente
-                if dominios_nuevos_pagina == 0:
-                    logger.info("No hay dominios nuevos en esta página, continuando...")
-                    continue
-                
-                # Pausa entre páginas
-                if page_num < 4:
-                    logger.info("Esperando antes de procesar la siguiente página...")
-                    time.sleep(3)
+                if pendiente:
+                    total_empresas_nuevas += self.guardar_dominios_pagina(*pendiente, processed_ids)
+            finally:
+                if pool:
+                    logger.info(pool.summary())
+                    pool.close()
             
             logger.info(f"\n{'='*60}")
             logger.info(f"SCRAPING DE DOMINIOS COMPLETADO")
@@ -592,6 +563,8 @@ class GeneraWebDudaScraperDominios:
             logger.error(f"Error durante el scraping: {e}")
             return 0
         finally:
+            if self.waits.durations:
+                logger.info(self.waits.summary())
             self.close_driver()
     
     def scrape_dominios_from_url(self, url):
@@ -601,13 +574,16 @@ class GeneraWebDudaScraperDominios:
         
         try:
             # Login
-            if not self.login("almudena.roman@nlocal.es", "aroman246"):
+            # Reutiliza la sesión guardada si sigue valiendo; si no, login
+            if not self.sessions.driver_login(self.session_site, self.driver, self.login_url,
+                                              lambda: self.login("almudena.roman@nlocal.es", "aroman246")):
                 logger.error("No se pudo realizar el login")
                 return 0
             
             logger.info(f"Navegando a URL: {url}")
-            self.driver.get(url)
-            time.sleep(8)
+            self.rate_limiter.navigate(self.driver, url)
+            # Hasta que el número de filas deje de crecer (antes una pausa fija de 8 s)
+            self.waits.stable(self.driver, self.ROWS_SELECTOR, stable_ms=500)
             
             # Esperar a que cargue la tabla de resultados
             try:
@@ -638,6 +614,8 @@ class GeneraWebDudaScraperDominios:
             logger.error(f"Error durante el scraping: {e}")
             return 0
         finally:
+            if self.waits.durations:
+                logger.info(self.waits.summary())
             self.close_driver()
 
 def main():
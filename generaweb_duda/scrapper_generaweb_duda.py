@@ -7,24 +7,95 @@ URL: http://generawebduda.nlocal.com/index.php
 """
 
 import csv
-import time
 import logging
 import os
-from urllib.parse import urljoin
-from selenium import webdriver
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core import (AdaptiveRateLimiter, DriverPool, FormLogin, PageWaits, adopt_driver_session, create_fetcher,
+                           SessionStore, driver_cookies, driver_ttfb)
+from scraping_core.chrome import create_scraping_driver
+from scraping_core.in_page_fetch import fetch_in_page
+from scraping_core.schema import element_text
+from scraping_core.tables import extract_table_html, find_with_class, iter_table_rows
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from perfil_empresa import PROFILE_FIELD_NAMES, parse_empresa_profile, profile_from_controls
+
+# Filas de la tabla de empresas y texto de paginación extraídos en el navegador
+# (modo js_rows): mismas reglas que iter_empresas/extract_empresa_data y
+# get_pagination_info, pero solo viaja un JSON compacto en lugar de page_source
+EMPRESAS_JS = r"""
+function text(element) {
+    // Como element_text: textos recortados y unidos, sin los de script/style/template
+    var walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT, {acceptNode: function (node) {
+        return /^(SCRIPT|STYLE|TEMPLATE)$/.test(node.parentNode.nodeName) ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT;
+    }});
+    var parts = [], node;
+    while ((node = walker.nextNode())) parts.push(node.nodeValue.trim());
+    return parts.join('');
+}
+
+var table = document.querySelector('table.table'), rows = [];
+if (table) {
+    for (var i = 0; i < table.rows.length; i++) {
+        var row = table.rows[i];
+        if (!row.classList.contains('new_platform')) continue;
+        var first = row.querySelector('td.first_td'), cells = row.querySelectorAll('td.line');
+        var empresa = {id: first ? text(first) : '', entrada: '', empresa: '', estado: '',
+                       url_perfil: '', url_web: '', url_panel: ''};
+        if (cells.length >= 4) {
+            empresa.entrada = text(cells[1]);
+            empresa.empresa = text(cells[2]);
+            empresa.estado = text(cells[3]);
+        }
+        row.querySelectorAll('a').forEach(function (link) {
+            var href = link.getAttribute('href');
+            if (!href) return;
+            if (href.indexOf('user_profile') >= 0) empresa.url_perfil = href;
+            else if (href.indexOf('http://www.') >= 0 || href.indexOf('https://www.') >= 0) empresa.url_web = href;
+            else if (href.indexOf('panelcontrol') >= 0) empresa.url_panel = href;
+        });
+        rows.push(empresa);
+    }
+}
+
+// Paginación: texto de table.tablebackg o, si no está, solo los fragmentos que busca get_pagination_info
+var pagination = document.querySelector('table.tablebackg'), paginationText;
+if (pagination) {
+    paginationText = pagination.textContent;
+} else {
+    var pageText = document.documentElement.textContent;
+    paginationText = [/Total:\s*\d+\s*Empresas/, /Página\s*\d+\s*de\s*\d+/].map(function (pattern) {
+        var match = pageText.match(pattern);
+        return match ? match[0] : '';
+    }).join(' ');
+}
+return {table: table !== null, rows: rows, pagination_table: pagination !== null, pagination: paginationText};
+"""
+
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class GeneraWebDudaScraper:
+    # Campos del formulario de login: si una página los trae, la sesión ha caducado
+    LOGIN_USER_RE = re.compile(rb'name=["\']usuario["\']', re.I)
+    LOGIN_PASSWORD_RE = re.compile(rb'name=["\']password["\']', re.I)
+    # Los mismos dos campos como selectores, para comprobarlo en el navegador (fetch_in_page)
+    LOGIN_SELECTORS = ("[name='usuario']", "[name='password']")
+    # Filas de datos de la tabla de empresas (las que lee iter_empresas)
+    EMPRESAS_ROWS_SELECTOR = 'table.table tr.new_platform'
+    
     def __init__(self, base_url="http://generawebduda.nlocal.com", headless=True):
         self.base_url = base_url
         self.login_url = urljoin(base_url, "/index.php")
@@ -35,23 +106,28 @@ class GeneraWebDudaScraper:
         self.profile_base_url = "http://generawebduda.nlocal.com"
         self.driver = None
         self.headless = headless
+        # Ritmo por host ajustado según el TTFB de cada página (sustituye a las pausas fijas)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=0.5, max_rate=4.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.waits = PageWaits()
+        # Descargas y login por HTTP (modo http de scrape_empresas_incremental)
+        self.fetcher = None
+        self.form_login = None
+        # Navegadores para abrir perfiles en paralelo (profile_workers de scrape_empresas_incremental)
+        self.driver_pool = None
+        # Cookies de la sesión guardadas entre ejecuciones: solo se hace login si han caducado
+        self.sessions = SessionStore()
+        self.session_site = urlparse(base_url).netloc
         
+    def build_driver(self, headless=None):
+        """Crea un driver de Chrome con el perfil ligero de scraping (sin imágenes, fuentes, CSS ni analítica)"""
+        return create_scraping_driver(headless=self.headless if headless is None else headless)
+    
     def init_driver(self):
         """Inicializa el driver de Selenium"""
         try:
-            chrome_options = Options()
-            
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
             # Intentar inicializar el driver
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = self.build_driver()
             logger.info("✓ Driver de Chrome inicializado correctamente")
             return True
             
@@ -72,7 +148,7 @@ class GeneraWebDudaScraper:
         try:
             logger.info(f"Iniciando sesión en: {self.login_url}")
             self.driver.get(self.login_url)
-            time.sleep(5)
+            self.waits.ready(self.driver)
             
             # Debug: imprimir el HTML para ver la estructura
             logger.info("Analizando estructura de la página de login...")
@@ -165,17 +241,15 @@ class GeneraWebDudaScraper:
                 except NoSuchElementException:
                     continue
             
+            # Enviar y esperar a que cargue la página después del login
             if login_button:
-                login_button.click()
+                self.waits.new_page(self.driver, login_button.click)
                 logger.info("✓ Formulario de login enviado")
             else:
                 # Si no encuentra botón, intentar con Enter
-                password_field.send_keys(Keys.RETURN)
+                self.waits.new_page(self.driver, lambda: password_field.send_keys(Keys.RETURN))
                 logger.info("✓ Login enviado con Enter")
             
-            # Esperar a que cargue la página después del login
-            time.sleep(5)
-            
             # Verificar si el login fue exitoso
             current_url = self.driver.current_url
             page_source = self.driver.page_source.lower()
@@ -210,16 +284,15 @@ class GeneraWebDudaScraper:
         try:
             logger.info(f"Navegando a: {self.empresas_url}")
             self.driver.get(self.empresas_url)
-            time.sleep(3)
+            self.waits.ready(self.driver)
             
             # Buscar y hacer clic en el botón de búsqueda si existe
             try:
                 search_button = WebDriverWait(self.driver, 5).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "input[type='submit'][value*='Buscar']"))
                 )
-                search_button.click()
+                self.waits.new_page(self.driver, search_button.click)
                 logger.info("✓ Botón de búsqueda presionado")
-                time.sleep(3)
             except TimeoutException:
                 logger.info("No se encontró botón de búsqueda, continuando...")
             
@@ -238,58 +311,49 @@ class GeneraWebDudaScraper:
             logger.error(f"Error navegando a empresas: {e}")
             return False
     
-    def get_pagination_info(self):
-        """Obtiene información sobre la paginación"""
+    def get_pagination_info(self, page=None):
+        """Obtiene información sobre la paginación
+        
+        Args:
+            page: Resultado de extract_page_in_browser para no volver a leer page_source
+        """
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # Buscar información de paginación en la tabla de navegación
-            pagination_table = soup.find('table', class_='tablebackg')
-            if pagination_table:
-                # Buscar texto que contenga "Total:" y números de página
-                pagination_text = pagination_table.get_text()
-                logger.info(f"Texto de paginación encontrado: {pagination_text[:200]}...")
-                
-                # Extraer total de empresas
-                import re
-                total_match = re.search(r'Total:\s*(\d+)\s*Empresas', pagination_text)
-                total_empresas = int(total_match.group(1)) if total_match else 0
-                
-                # Extraer página actual y total de páginas
-                page_match = re.search(r'Página\s*(\d+)\s*de\s*(\d+)', pagination_text)
-                current_page = int(page_match.group(1)) if page_match else 1
-                total_pages = int(page_match.group(2)) if page_match else 1
-                
-                logger.info(f"Paginación detectada: {total_empresas} empresas en {total_pages} páginas")
-                return {
-                    'total_empresas': total_empresas,
-                    'current_page': current_page,
-                    'total_pages': total_pages
-                }
+            if page is not None:
+                pagination_text = page['pagination']
+                alternative = not page['pagination_table']
             else:
+                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+                # Buscar información de paginación en la tabla de navegación
+                pagination_table = soup.find('table', class_='tablebackg')
+                alternative = pagination_table is None
+                # Sin la tabla de navegación se busca en toda la página
+                pagination_text = soup.get_text() if alternative else pagination_table.get_text()
+            
+            if alternative:
                 logger.warning("No se encontró la tabla de paginación con class 'tablebackg'")
-                # Buscar en toda la página
-                page_text = soup.get_text()
-                logger.info(f"Buscando en toda la página: {page_text[:500]}...")
-                
-                # Buscar patrones alternativos
-                import re
-                total_match = re.search(r'Total:\s*(\d+)\s*Empresas', page_text)
-                total_empresas = int(total_match.group(1)) if total_match else 0
-                
-                page_match = re.search(r'Página\s*(\d+)\s*de\s*(\d+)', page_text)
-                current_page = int(page_match.group(1)) if page_match else 1
-                total_pages = int(page_match.group(2)) if page_match else 1
-                
-                if total_empresas > 0:
-                    logger.info(f"Paginación detectada (método alternativo): {total_empresas} empresas en {total_pages} páginas")
-                    return {
-                        'total_empresas': total_empresas,
-                        'current_page': current_page,
-                        'total_pages': total_pages
-                    }
+                logger.info(f"Buscando en toda la página: {pagination_text[:500]}...")
+            else:
+                # Buscar texto que contenga "Total:" y números de página
+                logger.info(f"Texto de paginación encontrado: {pagination_text[:200]}...")
             
-            return None
+            # Extraer total de empresas
+            total_match = re.search(r'Total:\s*(\d+)\s*Empresas', pagination_text)
+            total_empresas = int(total_match.group(1)) if total_match else 0
+            
+            # Extraer página actual y total de páginas
+            page_match = re.search(r'Página\s*(\d+)\s*de\s*(\d+)', pagination_text)
+            current_page = int(page_match.group(1)) if page_match else 1
+            total_pages = int(page_match.group(2)) if page_match else 1
+            
+            if alternative and total_empresas == 0:
+                return None
+            metodo = " (método alternativo)" if alternative else ""
+            logger.info(f"Paginación detectada{metodo}: {total_empresas} empresas en {total_pages} páginas")
+            return {
+                'total_empresas': total_empresas,
+                'current_page': current_page,
+                'total_pages': total_pages
+            }
             
         except Exception as e:
             logger.error(f"Error obteniendo información de paginación: {e}")
@@ -314,21 +378,8 @@ class GeneraWebDudaScraper:
             url = f"{base_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
             
             logger.info(f"Navegando a página {page_number}: {url}")
-            self.driver.get(url)
-            time.sleep(8)  # Tiempo para cargar 1000 empresas
-            
-            # Esperar a que cargue la tabla de resultados
-            try:
-                WebDriverWait(self.driver, 15).until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")),
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "table.tablebackg")),
-                        EC.presence_of_element_located((By.TAG_NAME, "table"))
-                    )
-                )
-                logger.info(f"✓ Página {page_number} cargada correctamente")
-            except TimeoutException:
-                logger.warning(f"No se encontró tabla en página {page_number}, continuando...")
+            self.rate_limiter.navigate(self.driver, url)
+            self.wait_empresas_table(page_number)
             
             return True
             
@@ -339,36 +390,70 @@ class GeneraWebDudaScraper:
             logger.error(f"Error navegando a página {page_number}: {e}")
             return False
     
-    def extract_empresas_table(self):
-        """Extrae los datos de la tabla de empresas"""
+    def wait_empresas_table(self, page_num):
+        """Espera a que la tabla de empresas termine de cargarse (hasta 1000 filas)"""
+        # Hasta que el número de filas deje de crecer (antes una pausa fija de 8 s)
+        filas = self.waits.stable(self.driver, self.EMPRESAS_ROWS_SELECTOR, stable_ms=500)
+        if filas:
+            logger.info(f"✓ Página {page_num} cargada correctamente ({filas} filas)")
+        else:
+            logger.warning(f"No se encontró tabla en página {page_num}, continuando...")
+        return filas
+    
+    def extract_empresas_table(self, js_rows=False):
+        """Extrae los datos de la tabla de empresas
+        
+        Con js_rows=True las filas se extraen en el navegador (extract_page_in_browser)
+        en lugar de transferir y analizar page_source.
+        """
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            empresas = []
-            
-            # Buscar la tabla
-            table = soup.find('table', class_='table')
-            if not table:
-                logger.error("No se encontró la tabla de empresas")
-                return empresas
-            
-            # Buscar filas de datos (excluyendo el header)
-            rows = table.find_all('tr', class_='new_platform')
-            
-            logger.info(f"Encontradas {len(rows)} empresas en la tabla")
-            
-            for row in rows:
-                empresa_data = self.extract_empresa_data(row)
-                if empresa_data:
-                    empresas.append(empresa_data)
-            
+            if js_rows:
+                empresas = self.extract_page_in_browser()['rows']
+            else:
+                empresas = list(self.iter_empresas(self.driver.page_source))
+            if empresas:
+                logger.info(f"Encontradas {len(empresas)} empresas en la tabla")
             return empresas
             
         except Exception as e:
             logger.error(f"Error extrayendo datos de la tabla: {e}")
             return []
     
+    def extract_page_in_browser(self):
+        """Filas de empresas y paginación extraídas en el navegador con un solo execute_script
+        
+        Devuelve el diccionario de EMPRESAS_JS con las filas ya en el formato de
+        extract_empresa_data (URLs de perfil y panel absolutas).
+        """
+        page = self.driver.execute_script(EMPRESAS_JS)
+        if not page['table']:
+            logger.error("No se encontró la tabla de empresas")
+        for empresa in page['rows']:
+            for key in ('url_perfil', 'url_panel'):
+                if empresa[key]:
+                    empresa[key] = urljoin(self.base_url, empresa[key])
+            logger.info(f"Extraída empresa: {empresa['empresa']} (ID: {empresa['id']})")
+        return page
+    
+    def iter_empresas(self, html_content):
+        """Genera los datos de cada fila de la tabla de empresas
+
+        Solo se parsea el HTML de <table class="table">, en streaming con lxml,
+        y cada fila se libera en cuanto se han extraído sus datos.
+        """
+        table_html = extract_table_html(html_content, 'table')
+        if table_html is None:
+            logger.error("No se encontró la tabla de empresas")
+            return
+        
+        # Filas de datos (el header no tiene la clase new_platform)
+        for row in iter_table_rows(table_html, row_class='new_platform'):
+            empresa_data = self.extract_empresa_data(row)
+            if empresa_data:
+                yield empresa_data
+    
     def extract_empresa_data(self, row):
-        """Extrae datos de una fila de empresa"""
+        """Extrae datos de una fila de empresa (elemento <tr> de lxml)"""
         try:
             empresa = {
                 'id': '',
@@ -381,29 +466,28 @@ class GeneraWebDudaScraper:
             }
             
             # Extraer ID
-            id_cell = row.find('td', class_='first_td')
-            if id_cell:
-                empresa['id'] = id_cell.get_text(strip=True)
+            id_cells = find_with_class(row, 'td', 'first_td')
+            if id_cells:
+                empresa['id'] = element_text(id_cells[0])
             
             # Extraer datos de las celdas
-            cells = row.find_all('td', class_='line')
+            cells = find_with_class(row, 'td', 'line')
             
             if len(cells) >= 4:
                 # Entrada (segunda celda)
                 if len(cells) > 1:
-                    empresa['entrada'] = cells[1].get_text(strip=True)
+                    empresa['entrada'] = element_text(cells[1])
                 
                 # Empresa (tercera celda)
                 if len(cells) > 2:
-                    empresa['empresa'] = cells[2].get_text(strip=True)
+                    empresa['empresa'] = element_text(cells[2])
                 
                 # Estado (cuarta celda)
                 if len(cells) > 3:
-                    empresa['estado'] = cells[3].get_text(strip=True)
+                    empresa['estado'] = element_text(cells[3])
             
             # Extraer URLs de los enlaces
-            links = row.find_all('a', href=True)
-            for link in links:
+            for link in row.iter('a'):
                 href = link.get('href')
                 if href:
                     if 'user_profile' in href:
@@ -426,77 +510,15 @@ class GeneraWebDudaScraper:
             logger.info(f"Extrayendo perfil de empresa ID: {empresa_id}")
             
             # Abrir perfil en nueva ventana
+            self.rate_limiter.acquire(profile_url)
             self.driver.execute_script(f"window.open('{profile_url}', '_blank');")
             self.driver.switch_to.window(self.driver.window_handles[-1])
             
             # Esperar a que cargue
-            time.sleep(3)
-            
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            profile_data = {}
-            
-            # Extraer todos los campos del perfil usando los nombres exactos del HTML
-            # Buscar todos los inputs y selects en el formulario
-            form_elements = soup.find_all(['input', 'select', 'textarea'])
-            
-            logger.info(f"Total de elementos encontrados: {len(form_elements)}")
-            
-            # Log de depuración: mostrar todos los elementos encontrados
-            for i, element in enumerate(form_elements[:10]):  # Solo los primeros 10
-                name = element.get('name', '')
-                value = element.get('value', '') or element.get_text(strip=True)
-                logger.info(f"Elemento {i+1}: name='{name}', value='{value[:50]}...'")
+            self.waits.ready(self.driver)
+            self.rate_limiter.record(profile_url, latency=driver_ttfb(self.driver))
             
-            for element in form_elements:
-                name = element.get('name', '')
-                value = element.get('value', '') or element.get_text(strip=True)
-                
-                # Mapear nombres exactos de campos según el HTML proporcionado
-                if name == 'Id':
-                    profile_data['id'] = value
-                elif name == 'Nombre':
-                    profile_data['nombre'] = value
-                elif name == 'Apellidos':
-                    profile_data['apellidos'] = value
-                elif name == 'RazonSocial':
-                    profile_data['razon_social'] = value
-                elif name == 'Login':
-                    profile_data['login'] = value
-                elif name == 'Password_No_Encriptado':
-                    profile_data['password'] = value
-                elif name == 'NifCif':
-                    profile_data['cif_nif'] = value
-                elif name == 'Direccion':
-                    profile_data['direccion'] = value
-                elif name == 'Provincia':
-                    profile_data['provincia'] = value
-                elif name == 'Ciudad':
-                    profile_data['ciudad'] = value
-                elif name == 'Cp':
-                    profile_data['codigo_postal'] = value
-                elif name == 'Pais':
-                    profile_data['pais'] = value
-                elif name == 'Telefono':
-                    profile_data['telefono'] = value
-                elif name == 'Fax':
-                    profile_data['fax'] = value
-                elif name == 'Telefono_movil':
-                    profile_data['telefono_movil'] = value
-                elif name == 'Url':
-                    profile_data['url'] = value
-                elif name == 'Email':
-                    profile_data['email'] = value
-                elif name == 'NumDomains':
-                    profile_data['num_dominios'] = value
-                elif name == 'UrlAdminWordPress':
-                    profile_data['wordpress_url'] = value
-                elif name == 'id_gp':
-                    # Gestor de proyecto
-                    if element.name == 'select':
-                        selected = element.find('option', selected=True)
-                        if selected:
-                            profile_data['gestor_proyecto'] = selected.get_text(strip=True)
+            profile_data = parse_empresa_profile(self.driver.page_source)
             
             # Log de depuración para ver qué se extrajo
             logger.info(f"Datos extraídos del perfil: {profile_data}")
@@ -515,16 +537,194 @@ class GeneraWebDudaScraper:
             except:
                 pass
     
-    def scrape_empresas_incremental(self, max_empresas=None, max_pages=None):
-        """Función principal para hacer scraping de empresas con guardado incremental"""
-        if not self.init_driver():
-            return []
+    def extract_profile_in_driver(self, driver, empresa_id):
+        """Perfil de una empresa abierto en un navegador del pool (driver_pool)"""
+        profile_url = f"{self.profile_base_url}/index.php?s=user_profile&id={empresa_id}"
+        self.driver_pool.navigate(driver, profile_url)
+        html_content = driver.page_source
+        if self.is_login_page(html_content.encode('utf-8')):
+            logger.error(f"Sesión caducada al abrir el perfil {empresa_id}")
+            return None
+        profile_data = parse_empresa_profile(html_content)
+        logger.info(f"Perfil extraído para {profile_data.get('razon_social', 'Empresa sin nombre')}")
+        return profile_data
+    
+    def fetch_profiles_in_page(self, ids, batch_size=50, concurrency=4, raw_html=False):
+        """Perfiles de las empresas descargados con fetch() en la página del navegador principal
+        
+        Un execute_async_script por lote de batch_size perfiles (concurrency a la
+        vez dentro del navegador) en lugar de abrir cada perfil en una pestaña.
+        Por defecto el navegador devuelve solo los campos del formulario ya
+        extraídos; con raw_html=True devuelve el HTML y se analiza aquí.
+        Devuelve un diccionario id -> perfil (None si falló).
+        """
+        perfiles = {}
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            urls = [f"{self.profile_base_url}/index.php?s=user_profile&id={empresa_id}" for empresa_id in batch]
+            try:
+                results = fetch_in_page(self.driver, urls, concurrency=concurrency,
+                                        fields=None if raw_html else PROFILE_FIELD_NAMES,
+                                        check_selector=self.LOGIN_SELECTORS, rate_limiter=self.rate_limiter)
+            except Exception as e:
+                logger.error(f"Error descargando el lote de perfiles {batch[0]}-{batch[-1]}: {e}")
+                results = [{'error': str(e)}] * len(batch)
+            for empresa_id, result in zip(batch, results):
+                if result.get('error') or result.get('status') != 200:
+                    logger.error(f"Error descargando el perfil {empresa_id}: {result.get('error') or result.get('status')}")
+                    perfiles[empresa_id] = None
+                elif result.get('matched'):
+                    logger.error(f"Sesión caducada al descargar el perfil {empresa_id}")
+                    perfiles[empresa_id] = None
+                else:
+                    perfiles[empresa_id] = (parse_empresa_profile(result['html']) if raw_html
+                                            else profile_from_controls(result['controls']))
+            logger.info(f"✓ Lote de {len(batch)} perfiles descargado en el navegador")
+        return perfiles
+    
+    def open_driver_pool(self, size):
+        """Arranca size navegadores headless con la sesión del navegador principal"""
+        self.driver_pool = DriverPool(
+            lambda: self.build_driver(headless=True),
+            size=size,
+            max_per_host=size,
+            rate_limiter=self.rate_limiter,
+            cookies=self.driver.get_cookies(),
+            cookie_url=self.base_url,
+        ).start()
+    
+    def close_driver_pool(self):
+        if self.driver_pool is not None:
+            logger.info(self.driver_pool.summary())
+            self.driver_pool.close()
+            self.driver_pool = None
+    
+    def empresas_page_url(self, page_num):
+        """URL del listado de empresas (1000 por página) de la página page_num"""
+        params = {
+            'ids': '',
+            'searchCondition': 'CO',
+            'name': '',
+            'count': str(self.count),
+            'dateNewFrom': '',
+            'dateNewTo': '',
+            'search': 'Buscar',
+            's': 'home',
+            'page': str(page_num)
+        }
+        return f"{self.base_empresas_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
+    
+    def is_login_page(self, content):
+        """True si el HTML (bytes) es el formulario de login: trae los campos de usuario y contraseña"""
+        return bool(self.LOGIN_USER_RE.search(content) and self.LOGIN_PASSWORD_RE.search(content))
+    
+    def session_expired(self, response):
+        """La aplicación responde con el formulario de login (y un 200) cuando la sesión caduca"""
+        return self.is_login_page(response.content)
+    
+    def renew_session(self, username, password):
+        """Repite el login (por HTTP, o en el navegador si se usó para el primero) y devuelve las cookies nuevas"""
+        logger.info("Sesión caducada: repitiendo el login")
+        if self.driver is None:
+            cookies = self.form_login.login()
+            if cookies:
+                self.sessions.save(self.session_site, cookies)
+            return cookies or {}
+        if not self.login(username, password):
+            logger.error("No se pudo renovar la sesión")
+            return {}
+        self.sessions.save(self.session_site, self.driver.get_cookies())
+        return driver_cookies(self.driver)
+    
+    def start_http_session(self, username, password):
+        """Crea el Fetcher de requests e inicia sesión con él
+        
+        Se reutiliza la sesión guardada de la ejecución anterior si sigue valiendo;
+        si no, el login se hace enviando el formulario por HTTP, sin navegador, y
+        solo si eso falla se abre Chrome para hacerlo y se copia su sesión al Fetcher.
+        """
+        self.fetcher = create_fetcher(
+            timeout=(5, 60),  # Los listados de 1000 empresas tardan en generarse
+            cache_dir=None,
+            dead_letter_file='generaweb_fallidos.jsonl',
+            initial_rate=0.5,
+            max_rate=4.0,
+            cookie_provider=lambda: self.renew_session(username, password),
+            cookie_expired=self.session_expired,
+        )
+        self.form_login = FormLogin(self.fetcher.session, self.login_url, username, password, user_fields=('usuario',))
+        if self.sessions.fetcher_login(self.session_site, self.fetcher, self.login_url, self.form_login.login,
+                                       self.session_expired):
+            return True
+        
+        logger.warning("Login por HTTP fallido: se hace con el navegador")
+        if not self.init_driver() or not self.login(username, password):
+            return False
+        self.sessions.save(self.session_site, self.driver.get_cookies())
+        adopt_driver_session(self.fetcher, self.driver)
+        logger.info(f"✓ Sesión copiada a requests ({len(self.fetcher.cookies.cookies)} cookies)")
+        return True
+    
+    def fetch_html(self, url):
+        """HTML de una página por HTTP, o None si falla o la sesión sigue caducada tras renovarla"""
+        try:
+            response = self.fetcher.get(url)
+        except Exception as e:
+            logger.error(f"Error al acceder a {url}: {e}")
+            return None
+        if self.session_expired(response):
+            logger.error(f"Sesión caducada al acceder a {url}")
+            return None
+        return getattr(response, 'html', None) or response.text
+    
+    def fetch_empresa_profile(self, empresa_id):
+        """Perfil de una empresa descargado por HTTP (modo http)"""
+        profile_url = f"{self.profile_base_url}/index.php?s=user_profile&id={empresa_id}"
+        html_content = self.fetch_html(profile_url)
+        if html_content is None:
+            return None
+        profile_data = parse_empresa_profile(html_content)
+        logger.info(f"Perfil extraído para {profile_data.get('razon_social', 'Empresa sin nombre')}")
+        return profile_data
+    
+    def scrape_empresas_incremental(self, max_empresas=None, max_pages=None, http=False, max_workers=4, profile_workers=1,
+                                    profile_batch=0, js_rows=False):
+        """Función principal para hacer scraping de empresas con guardado incremental
+        
+        Con http=True no se usa el navegador: el login se hace enviando el
+        formulario con requests (Chrome solo si eso falla), y los listados y los
+        perfiles se descargan por HTTP (max_workers perfiles a la vez, al ritmo
+        que marque el limitador). La sesión se renueva sola si caduca.
         
+        Con el navegador, profile_workers > 1 abre los perfiles en un pool de
+        navegadores headless con la sesión del principal, como mucho
+        profile_workers a la vez contra el servidor.
+        
+        Con profile_batch > 0 los perfiles se descargan con fetch() dentro del
+        navegador principal, profile_batch por cada execute_async_script
+        (fetch_profiles_in_page), sin pestañas ni pool.
+        
+        Con js_rows=True las filas de cada listado se extraen en el navegador y
+        llegan como JSON, sin transferir ni analizar page_source.
+        """
         try:
             # Login
-            if not self.login("almudena.roman@nlocal.es", "aroman246"):
+            username, password = "almudena.roman@nlocal.es", "aroman246"
+            if http:
+                if not self.start_http_session(username, password):
+                    logger.error("No se pudo realizar el login")
+                    return []
+            elif not self.init_driver():
+                return []
+            elif not self.sessions.driver_login(self.session_site, self.driver, self.login_url,
+                                                lambda: self.login(username, password), self.session_expired):
                 logger.error("No se pudo realizar el login")
                 return []
+            elif profile_workers > 1 and not profile_batch:
+                try:
+                    self.open_driver_pool(profile_workers)
+                except Exception as e:
+                    logger.warning(f"No se pudo arrancar el pool de navegadores, se abren los perfiles de uno en uno: {e}")
             
             total_empresas = 0
             
@@ -535,44 +735,41 @@ class GeneraWebDudaScraper:
                 logger.info(f"{'='*50}")
                 
                 # Construir URL para la página específica
-                params = {
-                    'ids': '',
-                    'searchCondition': 'CO',
-                    'name': '',
-                    'count': str(self.count),
-                    'dateNewFrom': '',
-                    'dateNewTo': '',
-                    'search': 'Buscar',
-                    's': 'home',
-                    'page': str(page_num)
-                }
-                url = f"{self.base_empresas_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
-                
-                logger.info(f"Navegando a página {page_num}: {url}")
-                self.driver.get(url)
-                time.sleep(8)  # Tiempo para cargar 1000 empresas
+                url = self.empresas_page_url(page_num)
                 
-                # Esperar a que cargue la tabla de resultados
-                try:
-                    WebDriverWait(self.driver, 15).until(
-                        EC.any_of(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")),
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "table.tablebackg")),
-                            EC.presence_of_element_located((By.TAG_NAME, "table"))
-                        )
-                    )
-                    logger.info(f"✓ Página {page_num} cargada correctamente")
-                except TimeoutException:
-                    logger.warning(f"No se encontró tabla en página {page_num}, continuando...")
-                
-                # Extraer empresas de la página actual
-                empresas_pagina = self.extract_empresas_table()
+                if http:
+                    logger.info(f"Descargando página {page_num}: {url}")
+                    html_content = self.fetch_html(url)
+                    empresas_pagina = list(self.iter_empresas(html_content)) if html_content else []
+                else:
+                    logger.info(f"Navegando a página {page_num}: {url}")
+                    self.rate_limiter.navigate(self.driver, url)
+                    self.wait_empresas_table(page_num)
+                    
+                    # Extraer empresas de la página actual
+                    empresas_pagina = self.extract_empresas_table(js_rows=js_rows)
                 if not empresas_pagina:
                     logger.warning(f"No se encontraron empresas en la página {page_num}")
                     continue
                 
                 logger.info(f"✓ Extraídas {len(empresas_pagina)} empresas de la página {page_num}")
                 
+                perfiles = {}
+                if http:
+                    # Perfiles de toda la página en paralelo; se guardan después en orden
+                    ids = [empresa['id'] for empresa in empresas_pagina if empresa.get('id')]
+                    logger.info(f"Descargando {len(ids)} perfiles ({max_workers} a la vez)")
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        perfiles = dict(zip(ids, executor.map(self.fetch_empresa_profile, ids)))
+                elif profile_batch:
+                    ids = [empresa['id'] for empresa in empresas_pagina if empresa.get('id')]
+                    logger.info(f"Descargando {len(ids)} perfiles con fetch() en el navegador ({profile_batch} por lote)")
+                    perfiles = self.fetch_profiles_in_page(ids, batch_size=profile_batch, concurrency=max_workers)
+                elif self.driver_pool is not None:
+                    ids = [empresa['id'] for empresa in empresas_pagina if empresa.get('id')]
+                    logger.info(f"Abriendo {len(ids)} perfiles en {profile_workers} navegadores")
+                    perfiles = dict(zip(ids, self.driver_pool.map(self.extract_profile_in_driver, ids)))
+                
                 # Procesar todos los registros de la página con guardado incremental
                 empresas_procesadas = 0
                 for i, empresa in enumerate(empresas_pagina, 1):
@@ -580,11 +777,14 @@ class GeneraWebDudaScraper:
                     
                     # Extraer datos del perfil si existe
                     if empresa.get('id'):
-                        # Construir URL del perfil con la nueva base URL
-                        profile_url = f"{self.profile_base_url}/index.php?s=user_profile&id={empresa['id']}"
-                        logger.info(f"Extrayendo perfil desde: {profile_url}")
-                        
-                        profile_data = self.extract_empresa_profile(empresa['id'], profile_url)
+                        if http or profile_batch or self.driver_pool is not None:
+                            profile_data = perfiles.get(empresa['id'])
+                        else:
+                            # Construir URL del perfil con la nueva base URL
+                            profile_url = f"{self.profile_base_url}/index.php?s=user_profile&id={empresa['id']}"
+                            logger.info(f"Extrayendo perfil desde: {profile_url}")
+                            
+                            profile_data = self.extract_empresa_profile(empresa['id'], profile_url)
                         if profile_data:
                             empresa.update(profile_data)
                             logger.info("✓ Datos del perfil extraídos correctamente")
@@ -595,22 +795,18 @@ class GeneraWebDudaScraper:
                     self.save_empresa_incremental(empresa)
                     empresas_procesadas += 1
                     total_empresas += 1
-                    
-                    # Pausa entre empresas para no sobrecargar el servidor
-                    time.sleep(2)
             
                 logger.info(f"✓ Página {page_num} completada: {empresas_procesadas} empresas procesadas y guardadas")
-                
-                # Pausa entre páginas
-                if page_num < 4:  # Solo pausar si no es la última página
-                    logger.info("Esperando antes de procesar la siguiente página...")
-                    time.sleep(3)
             
             logger.info(f"\n{'='*60}")
             logger.info(f"SCRAPING COMPLETADO")
             logger.info(f"{'='*60}")
             logger.info(f"Total de empresas extraídas: {total_empresas}")
             logger.info(f"Páginas procesadas: 4 (todas las páginas)")
+            if self.fetcher is not None:
+                logger.info(self.fetcher.summary())
+            if self.waits.durations:
+                logger.info(self.waits.summary())
             
             return total_empresas
             
@@ -618,6 +814,7 @@ class GeneraWebDudaScraper:
             logger.error(f"Error durante el scraping: {e}")
             return []
         finally:
+            self.close_driver_pool()
             self.close_driver()
     
     def save_to_csv(self, empresas, filename='generaweb_duda_empresas.csv'):
@@ -693,7 +890,16 @@ def main():
     
     # Realizar scraping completo con guardado incremental
     # Procesar todas las páginas (1-4) con guardado inmediato
-    total_empresas = scraper.scrape_empresas_incremental(max_empresas=None, max_pages=4)  # Todas las empresas de 4 páginas
+    # --http: login y descargas con requests, sin abrir Chrome
+    # --pool N: con el navegador, los perfiles se abren en N navegadores headless a la vez
+    #   (por defecto 1: sin pool, en pestañas del navegador del login)
+    # --js-rows: las filas de los listados se extraen en el navegador (JSON en lugar de page_source)
+    # --in-page: los perfiles se descargan con fetch() en el navegador del login, 50 por lote
+    profile_workers = int(sys.argv[sys.argv.index('--pool') + 1]) if '--pool' in sys.argv else 1
+    total_empresas = scraper.scrape_empresas_incremental(max_empresas=None, max_pages=4,  # Todas las empresas de 4 páginas
+                                                         http='--http' in sys.argv, profile_workers=profile_workers,
+                                                         profile_batch=50 if '--in-page' in sys.argv else 0,
+                                                         js_rows='--js-rows' in sys.argv)
     
     if total_empresas > 0:
         logger.info("")
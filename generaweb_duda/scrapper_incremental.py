@@ -7,9 +7,9 @@ URL: http://generawebduda.nlocal.com/index.php
 """
 
 import csv
-import time
 import logging
 import os
+import sys
 from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -18,13 +18,20 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core import AdaptiveRateLimiter, PageWaits
+from scraping_core.schema import element_text
+from scraping_core.tables import extract_table_html, find_with_class, iter_table_rows
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class GeneraWebDudaScraperIncremental:
+    # Filas de la tabla de resultados: la página ha cargado cuando su número deja de crecer
+    ROWS_SELECTOR = 'table.table tr.new_platform'
+    
     def __init__(self, base_url="http://generawebduda.nlocal.com", headless=True):
         self.base_url = base_url
         self.login_url = urljoin(base_url, "/index.php")
@@ -33,6 +40,10 @@ class GeneraWebDudaScraperIncremental:
         self.profile_base_url = "http://generawebduda.nlocal.com"
         self.driver = None
         self.headless = headless
+        # Ritmo por host ajustado según el TTFB de cada página (sustituye a las pausas fijas)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=0.5, max_rate=4.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.waits = PageWaits()
         self.csv_filename = 'generaweb_duda_empresas.csv'
         self.file_exists = os.path.exists(self.csv_filename)
         
@@ -69,7 +80,7 @@ class GeneraWebDudaScraperIncremental:
         try:
             logger.info(f"Iniciando sesión en: {self.login_url}")
             self.driver.get(self.login_url)
-            time.sleep(5)
+            self.waits.ready(self.driver)
             
             # Buscar campos de login
             username_field = None
@@ -122,12 +133,11 @@ class GeneraWebDudaScraperIncremental:
                 except:
                     continue
             
+            # Enviar y esperar a que cargue la página siguiente
             if login_button:
-                login_button.click()
+                self.waits.new_page(self.driver, login_button.click)
             else:
-                password_field.send_keys(Keys.RETURN)
-            
-            time.sleep(5)
+                self.waits.new_page(self.driver, lambda: password_field.send_keys(Keys.RETURN))
             
             # Verificar login exitoso
             current_url = self.driver.current_url
@@ -186,8 +196,9 @@ class GeneraWebDudaScraperIncremental:
             url = f"{self.base_empresas_url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
             
             logger.info(f"Navegando a página {page_number}: {url}")
-            self.driver.get(url)
-            time.sleep(8)
+            self.rate_limiter.navigate(self.driver, url)
+            # Hasta que el número de filas deje de crecer (antes una pausa fija de 8 s)
+            self.waits.stable(self.driver, self.ROWS_SELECTOR, stable_ms=500)
             
             # Esperar tabla de resultados
             try:
@@ -215,29 +226,24 @@ class GeneraWebDudaScraperIncremental:
     def extract_and_save_empresas_incremental(self):
         """Extrae empresas de la tabla y las guarda una por una"""
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
             empresas_procesadas = 0
             
-            table = soup.find('table', class_='table')
-            if not table:
+            # Solo se parsea la tabla, en streaming; cada fila se libera al guardarla
+            table_html = extract_table_html(self.driver.page_source, 'table')
+            if table_html is None:
                 logger.error("No se encontró la tabla de empresas")
                 return 0
             
-            rows = table.find_all('tr', class_='new_platform')
-            logger.info(f"Encontradas {len(rows)} empresas en la tabla")
-            
-            for i, row in enumerate(rows, 1):
-                logger.info(f"Procesando empresa {i}/{len(rows)}")
+            for i, row in enumerate(iter_table_rows(table_html, row_class='new_platform'), 1):
+                logger.info(f"Procesando empresa {i}")
                 
                 empresa_data = self.extract_empresa_data(row)
                 if empresa_data:
                     # Guardar inmediatamente
                     self.save_empresa_incremental(empresa_data)
                     empresas_procesadas += 1
-                    
-                    # Pausa entre empresas
-                    time.sleep(1)
             
+            logger.info(f"Procesadas {empresas_procesadas} empresas de la tabla")
             return empresas_procesadas
             
         except Exception as e:
@@ -245,7 +251,7 @@ class GeneraWebDudaScraperIncremental:
             return 0
     
     def extract_empresa_data(self, row):
-        """Extrae datos de una fila de empresa"""
+        """Extrae datos de una fila de empresa (elemento <tr> de lxml)"""
         try:
             empresa = {
                 'id': '',
@@ -258,24 +264,23 @@ class GeneraWebDudaScraperIncremental:
             }
             
             # Extraer ID
-            id_cell = row.find('td', class_='first_td')
-            if id_cell:
-                empresa['id'] = id_cell.get_text(strip=True)
+            id_cells = find_with_class(row, 'td', 'first_td')
+            if id_cells:
+                empresa['id'] = element_text(id_cells[0])
             
             # Extraer datos de las celdas
-            cells = row.find_all('td', class_='line')
+            cells = find_with_class(row, 'td', 'line')
             
             if len(cells) >= 4:
                 if len(cells) > 1:
-                    empresa['entrada'] = cells[1].get_text(strip=True)
+                    empresa['entrada'] = element_text(cells[1])
                 if len(cells) > 2:
-                    empresa['empresa'] = cells[2].get_text(strip=True)
+                    empresa['empresa'] = element_text(cells[2])
                 if len(cells) > 3:
-                    empresa['estado'] = cells[3].get_text(strip=True)
+                    empresa['estado'] = element_text(cells[3])
             
             # Extraer URLs
-            links = row.find_all('a', href=True)
-            for link in links:
+            for link in row.iter('a'):
                 href = link.get('href')
                 if href:
                     if 'user_profile' in href:
@@ -329,11 +334,6 @@ def main():
             
             empresas_pagina = scraper.scrape_page_incremental(page_num)
             total_empresas += empresas_pagina
-            
-            # Pausa entre páginas
-            if page_num < end_page:
-                logger.info("Esperando antes de procesar la siguiente página...")
-                time.sleep(3)
         
         logger.info(f"\n{'='*60}")
         logger.info(f"SCRAPING COMPLETADO")
@@ -344,6 +344,8 @@ def main():
     except Exception as e:
         logger.error(f"Error durante el scraping: {e}")
     finally:
+        if scraper.waits.durations:
+            logger.info(scraper.waits.summary())
         scraper.close_driver()
 
 if __name__ == "__main__":
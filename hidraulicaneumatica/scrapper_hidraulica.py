@@ -6,99 +6,98 @@ URL: https://www.hidraulicaneumatica.es/es/productos
 Productos industriales de hidráulica y neumática
 """
 
-import base64
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from bs4 import SoupStrainer
 import csv
 import time
 import os
+import sys
 from urllib.parse import urljoin, urlparse
 import logging
-import gzip
-import zlib
-import chardet
-import brotli
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraping_core import (AsyncFetchEngine, SitemapDiscovery, canonicalize_url, category_from_url,
+                           ParsedPage, create_fetcher, href_contains, load_csv_items, merge_items)
+from scraping_core.schema import Field, ItemSchema, absolute_url, detail_link, file_name, non_empty, truncate
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class HidraulicaNeumatiaScraper:
-    def __init__(self, base_url="https://www.hidraulicaneumatica.es"):
+    # Ruta común de las páginas de listado de categorías
+    LISTING_PATH = '/es/productos/List/listing/'
+    # Filtro compartido: al ser el mismo objeto, ParsedPage memoriza sus búsquedas
+    LISTING_HREF = href_contains(LISTING_PATH)
+    # Subárbol que se construye cuando extract_categories parsea la página por su cuenta
+    CATEGORY_STRAINER = SoupStrainer('a', href=LISTING_HREF)
+    
+    # Productos en <li class="list_index_item" id="iid_XXX"> (o solo por id)
+    ITEM_SCHEMA = ItemSchema(
+        items=['li.list_index_item[id^=iid_]', 'li[id^=iid_]'],
+        fields=[
+            Field('codigo', '. @id'),
+            # Título y enlace en h3.list_index_item_h3 > a o h3 > a
+            Field('titulo', ['h3.list_index_item_h3 / a', 'h3.list_index_item_h3', 'h3 / a', 'h3']),
+            Field('enlace_detalle', ['h3.list_index_item_h3 / a @href', 'h3 / a @href'], post=detail_link),
+            Field('enlace_detalle', 'a[href] @href', post=detail_link, unless=['enlace_detalle']),
+            Field('url_imagen_principal', 'p.image / img @src', post=absolute_url),
+            Field('imagen_principal', 'p.image / img @src', post=file_name),
+            Field('precio', 'p.price / strong'),
+            # Código tras <strong>Código:</strong>
+            Field('codigo', 'p.sku / strong ::tail', post=non_empty),
+            Field('descripcion_corta', 'div.text / p', post=truncate(200)),
+        ],
+        defaults={
+            'titulo': '', 'codigo': '', 'imagen_principal': '', 'url_imagen_principal': '', 'precio': '',
+            'enlace_detalle': '', 'descripcion_corta': '', 'marca': 'Hidráulica Neumática', 'categoria': '',
+        },
+    )
+    
+    def __init__(self, base_url="https://www.hidraulicaneumatica.es", max_concurrency=32, max_per_host=4, offline=False, cache_dir='.http_cache', dead_letter_file='dead_letters.jsonl'):
         self.base_url = base_url
         self.productos_url = urljoin(base_url, "/es/productos")
-        self.session = requests.Session()
-        # Headers para parecer un navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Núcleo de descarga compartido: caché, limitador, reintentos y decodificación
+        self.fetcher = create_fetcher(offline=offline, cache_dir=cache_dir, dead_letter_file=dead_letter_file)
+        # Motor asíncrono que ejecuta get_page_content con límites de concurrencia
+        self.fetch_engine = AsyncFetchEngine(self.get_page_content, max_concurrency, max_per_host)
         
     def get_page_content(self, url):
         """Obtiene el contenido HTML real (descomprimido y decodificado correctamente)."""
-        try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-
-            raw_data = response.content
-
-            # Detectar compresión
-            content_encoding = response.headers.get('Content-Encoding', '').lower()
-
-            if 'gzip' in content_encoding:
-                try:
-                    raw_data = gzip.decompress(raw_data)
-                except Exception:
-                    pass
-
-            elif 'deflate' in content_encoding:
-                try:
-                    raw_data = zlib.decompress(raw_data)
-                except Exception:
-                    pass
-            elif 'br' in content_encoding:
-                try:
-                    raw_data = brotli.decompress(raw_data)
-                except Exception:
-                    pass
-
-            # Detectar si el cuerpo parece base64
-            try:
-                if all(c.isalnum() or c in '+/=\n\r' for c in raw_data.decode('ascii', errors='ignore')[:200]):
-                    decoded = base64.b64decode(raw_data)
-                    if b'<html' in decoded.lower():
-                        raw_data = decoded
-            except Exception:
-                pass
-
-            # Detectar codificación de texto
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding') or response.apparent_encoding or 'utf-8'
-
-            html = raw_data.decode(encoding, errors='replace')
-
-            return html
+        return self.fetcher.get_html(url)
+    
+    async def get_page_content_async(self, url):
+        """Versión awaitable de get_page_content sobre el motor asíncrono"""
+        return await self.fetch_engine.fetch(url)
+    
+    async def retry_dead_letters_async(self):
+        """Reintenta las URLs de este sitio que fallaron en ejecuciones anteriores
 
-        except requests.RequestException as e:
-            logger.error(f"Error al acceder a {url}: {e}")
-            return None
+        Las que se recuperan quedan en la caché, así que el crawl posterior no
+        vuelve a descargarlas; las que fallan de nuevo vuelven a la lista.
+        """
+        if self.fetcher.cache is not None and self.fetcher.cache.offline:
+            return
+        pending = self.fetcher.dead_letters.take(urlparse(self.base_url).netloc)
+        if not pending:
+            return
+        logger.info(f"Reintentando {len(pending)} URLs fallidas en ejecuciones anteriores")
+        results = await self.fetch_engine.fetch_all([entry['url'] for entry in pending])
+        logger.info(f"✓ Recuperadas {sum(1 for html in results if html)}/{len(pending)} URLs")
     
     def extract_categories(self, html_content, parent_category=''):
-        """Extrae las categorías y subcategorías desde una página"""
+        """Extrae las categorías y subcategorías desde una página (HTML o ParsedPage)"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        page = ParsedPage.of(html_content, self.CATEGORY_STRAINER)
         categories = []
         seen_urls = set()
         
         # Buscar enlaces de categorías en la estructura de Hidráulica Neumática
         # Las categorías están en enlaces que apuntan a /es/productos/List/listing/
-        category_links = soup.find_all('a', href=lambda x: x and '/es/productos/List/listing/' in x)
+        category_links = page.find_all('a', href=self.LISTING_HREF)
         
         for link in category_links:
             category_name = link.get_text(strip=True)
@@ -120,138 +119,136 @@ class HidraulicaNeumatiaScraper:
         return categories
     
     def extract_catalog_items(self, html_content):
-        """Extrae los productos desde el HTML - específico para Hidráulica Neumática"""
+        """Extrae los productos desde el HTML o ParsedPage - específico para Hidráulica Neumática"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        items = []
-        
-        # Buscar productos en <li class="list_index_item" id="iid_XXX">
-        product_items = soup.find_all('li', class_='list_index_item', id=lambda x: x and x.startswith('iid_'))
-        
-        if product_items:
-            logger.info(f"Encontrados {len(product_items)} productos en la página")
+        items = self.ITEM_SCHEMA.extract(ParsedPage.of(html_content).tree, self.base_url)
+        if items:
+            logger.info(f"Encontrados {len(items)} productos en la página")
         else:
-            # Fallback: buscar solo por id
-            product_items = soup.find_all('li', id=lambda x: x and x.startswith('iid_'))
-            if product_items:
-                logger.info(f"Encontrados {len(product_items)} productos (fallback)")
-        
-        if not product_items:
             logger.warning("No se encontraron productos")
         
-        for item_element in product_items:
-            item_data = self.extract_item_data(item_element)
-            if item_data and (item_data['titulo'] or item_data['imagen_principal']):
-                items.append(item_data)
-        
+        return [item for item in items if item['titulo'] or item['imagen_principal']]
+    
+    def scrape_catalog(self, max_categories=None, max_subcategories_per_category=10, max_depth=2):
+        """Función principal para hacer scraping del catálogo"""
+        items = asyncio.run(self.scrape_catalog_async(max_categories, max_subcategories_per_category, max_depth))
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
         return items
     
-    def extract_item_data(self, element):
-        """Extrae datos de un elemento de producto"""
-        item = {
-            'titulo': '',
-            'codigo': '',
-            'imagen_principal': '',
-            'url_imagen_principal': '',
-            'precio': '',
-            'enlace_detalle': '',
-            'descripcion_corta': '',
-            'marca': 'Hidráulica Neumática',
-            'categoria': ''
-        }
-        
-        try:
-            # Extraer ID del elemento como código
-            element_id = element.get('id', '')
-            if element_id:
-                item['codigo'] = element_id
-            
-            # Extraer título en h3 > a o h3.list_index_item_h3 > a
-            title_elem = element.find('h3', class_='list_index_item_h3')
-            if not title_elem:
-                title_elem = element.find('h3')
-            
-            if title_elem:
-                link = title_elem.find('a')
-                if link:
-                    item['titulo'] = link.get_text(strip=True)
-                    href = link.get('href')
-                    if href and not href.startswith('#'):
-                        item['enlace_detalle'] = urljoin(self.base_url, href)
+    def parse_listing(self, html_content):
+        """Productos y enlaces de categoría de una página de listado
+
+        Se usa con fetch_engine.fetch_parsed, así que una página enlazada desde
+        varios padres se parsea una sola vez por crawl; los nombres de las
+        categorías se completan después con with_parent. Ambos extractores
+        comparten la misma ParsedPage: los productos salen de su árbol lxml y
+        las categorías de un árbol BeautifulSoup limitado a su bloque.
+        """
+        page = ParsedPage(html_content, self.CATEGORY_STRAINER)
+        return self.extract_catalog_items(page), self.extract_categories(page)
+    
+    def with_parent(self, categories, parent_category):
+        """Copia de las categorías de parse_listing con el nombre completo bajo su padre"""
+        return [dict(category, nombre=f"{parent_category} > {category['nombre_corto']}") for category in categories]
+    
+    async def scrape_subcategory_async(self, subcat, max_depth):
+        """Descarga una subcategoría (y su tercer nivel si max_depth > 2) y devuelve sus productos"""
+        items = []
+        
+        listing = await self.fetch_engine.fetch_parsed(subcat['url'], self.parse_listing)
+        if not listing:
+            return items
+        sub_items, sub_subcategories = listing
+        
+        if sub_items:
+            logger.info(f"    ✓ {len(sub_items)} productos en {subcat['nombre_corto']}")
+            # Los productos parseados se comparten entre padres: se copian antes de etiquetarlos
+            items.extend(dict(item, categoria=subcat['nombre']) for item in sub_items)
+        
+        # Solo procesar tercer nivel si max_depth > 2
+        if max_depth > 2:
+            sub_subcategories = self.with_parent(sub_subcategories, subcat['nombre'])
+            if sub_subcategories:
+                # Limitar sub-subcategorías
+                if len(sub_subcategories) > 10:
+                    logger.info(f"    → {len(sub_subcategories)} sub-subcategorías (limitando a 10)")
+                    sub_subcategories = sub_subcategories[:10]
                 else:
-                    item['titulo'] = title_elem.get_text(strip=True)
-            
-            # Si aún no hay enlace, buscar el primer enlace
-            if not item['enlace_detalle']:
-                link_elem = element.find('a', href=True)
-                if link_elem:
-                    href = link_elem.get('href')
-                    if href and not href.startswith('#'):
-                        item['enlace_detalle'] = urljoin(self.base_url, href)
-            
-            # Extraer imagen principal desde p class="image"
-            image_p = element.find('p', class_='image')
-            if image_p:
-                img = image_p.find('img')
-                if img:
-                    img_src = img.get('src')
-                    if img_src:
-                        item['url_imagen_principal'] = urljoin(self.base_url, img_src)
-                        item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
-            
-            # Extraer precio
-            price_elem = element.find('p', class_='price')
-            if price_elem:
-                price_strong = price_elem.find('strong')
-                if price_strong:
-                    item['precio'] = price_strong.get_text(strip=True)
-            
-            # Extraer código del producto
-            sku_elem = element.find('p', class_='sku')
-            if sku_elem:
-                strong_elem = sku_elem.find('strong')
-                if strong_elem and strong_elem.next_sibling:
-                    codigo_text = str(strong_elem.next_sibling).strip()
-                    if codigo_text:
-                        item['codigo'] = codigo_text
-            
-            # Extraer descripción corta
-            text_div = element.find('div', class_='text')
-            if text_div:
-                desc_p = text_div.find('p')
-                if desc_p:
-                    item['descripcion_corta'] = desc_p.get_text(strip=True)[:200]
-            
-            if item['titulo']:
-                logger.info(f"Extraído: {item['titulo'][:50]} - Código: {item['codigo']}")
-            
-            return item
+                    logger.info(f"    → {len(sub_subcategories)} sub-subcategorías")
+                
+                # parse_listing y no extract_catalog_items: si la página también es
+                # subcategoría de otro padre, se reutiliza el mismo parseo
+                pages = await asyncio.gather(*(
+                    self.fetch_engine.fetch_parsed(sub_subcat['url'], self.parse_listing)
+                    for sub_subcat in sub_subcategories
+                ))
+                for sub_subcat, sub_listing in zip(sub_subcategories, pages):
+                    sub_sub_items = sub_listing[0] if sub_listing else []
+                    if sub_sub_items:
+                        logger.info(f"        ✓ {len(sub_sub_items)} productos en {sub_subcat['nombre_corto']}")
+                        items.extend(dict(item, categoria=sub_subcat['nombre']) for item in sub_sub_items)
+        
+        return items
+    
+    async def scrape_category_async(self, category, max_subcategories_per_category, max_depth):
+        """Descarga una categoría con sus subcategorías y devuelve sus productos en orden"""
+        category_items = []
+        
+        listing = await self.fetch_engine.fetch_parsed(category['url'], self.parse_listing)
+        
+        if not listing:
+            logger.warning(f"No se pudo obtener contenido de: {category['nombre']}")
+            return category_items
+        items, subcategories = listing
+        
+        # Extraer productos de esta categoría
+        if items:
+            logger.info(f"✓ {len(items)} productos en nivel actual de {category['nombre_corto']}")
+            category_items.extend(dict(item, categoria=category['nombre']) for item in items)
+        
+        # Buscar subcategorías (limitar cantidad)
+        subcategories = self.with_parent(subcategories, category['nombre_corto'])
+        if subcategories:
+            # Limitar subcategorías por categoría
+            if max_subcategories_per_category and len(subcategories) > max_subcategories_per_category:
+                logger.info(f"→ {len(subcategories)} subcategorías encontradas (limitando a {max_subcategories_per_category})")
+                subcategories = subcategories[:max_subcategories_per_category]
+            else:
+                logger.info(f"→ {len(subcategories)} subcategorías encontradas")
             
-        except Exception as e:
-            logger.error(f"Error extrayendo datos del elemento: {e}")
-            return None
+            results = await asyncio.gather(*(self.scrape_subcategory_async(subcat, max_depth) for subcat in subcategories))
+            for sub_items in results:
+                category_items.extend(sub_items)
+        
+        if not items and not subcategories:
+            logger.info(f"Sin productos ni subcategorías en: {category['nombre_corto']}")
+        
+        return category_items
     
-    def scrape_catalog(self, max_categories=None, max_subcategories_per_category=10, max_depth=2):
-        """Función principal para hacer scraping del catálogo"""
+    async def scrape_catalog_async(self, max_categories=None, max_subcategories_per_category=10, max_depth=2):
+        """Variante asíncrona de scrape_catalog: categorías y subcategorías se descargan en paralelo"""
+        await self.retry_dead_letters_async()
         all_items = []
         
         logger.info(f"Iniciando scraping de: {self.productos_url}")
         
         # Obtener la página principal de productos
-        html_content = self.get_page_content(self.productos_url)
+        html_content = await self.get_page_content_async(self.productos_url)
         
         if not html_content:
             logger.error("No se pudo obtener el contenido de la página")
             return all_items
         
-        # Extraer las categorías
-        categories = self.extract_categories(html_content)
+        # Extraer las categorías (el mismo árbol sirve para buscar productos si no hay)
+        page = ParsedPage(html_content, self.CATEGORY_STRAINER)
+        categories = self.extract_categories(page)
         
         if not categories:
             logger.warning("No se encontraron categorías, intentando extraer productos de la página principal")
-            items = self.extract_catalog_items(html_content)
+            items = self.extract_catalog_items(page)
             if items:
                 for item in items:
                     item['categoria'] = 'General'
@@ -265,87 +262,21 @@ class HidraulicaNeumatiaScraper:
             categories = categories[:max_categories]
             logger.info(f"Limitando a las primeras {max_categories} categorías")
         
-        # Recorrer cada categoría
-        for i, category in enumerate(categories, 1):
-            logger.info("")
-            logger.info(f"{'='*60}")
-            logger.info(f"Procesando categoría {i}/{len(categories)}: {category['nombre_corto']}")
-            logger.info(f"{'='*60}")
-            
-            category_html = self.get_page_content(category['url'])
-            
-            if not category_html:
-                logger.warning(f"No se pudo obtener contenido de: {category['nombre']}")
-                continue
-            
-            # Extraer productos de esta categoría
-            items = self.extract_catalog_items(category_html)
-            
-            if items:
-                logger.info(f"✓ {len(items)} productos en nivel actual")
-                for item in items:
-                    item['categoria'] = category['nombre']
-                    all_items.append(item)
-            
-            # Buscar subcategorías (limitar cantidad)
-            subcategories = self.extract_categories(category_html, parent_category=category['nombre_corto'])
-            if subcategories:
-                # Limitar subcategorías por categoría
-                if max_subcategories_per_category and len(subcategories) > max_subcategories_per_category:
-                    logger.info(f"→ {len(subcategories)} subcategorías encontradas (limitando a {max_subcategories_per_category})")
-                    subcategories = subcategories[:max_subcategories_per_category]
-                else:
-                    logger.info(f"→ {len(subcategories)} subcategorías encontradas")
-                
-                for j, subcat in enumerate(subcategories, 1):
-                    logger.info(f"  [{j}/{len(subcategories)}] {subcat['nombre_corto']}")
-                    
-                    subcat_html = self.get_page_content(subcat['url'])
-                    if subcat_html:
-                        sub_items = self.extract_catalog_items(subcat_html)
-                        if sub_items:
-                            logger.info(f"    ✓ {len(sub_items)} productos")
-                            for item in sub_items:
-                                item['categoria'] = subcat['nombre']
-                                all_items.append(item)
-                        
-                        # Solo procesar tercer nivel si max_depth > 2
-                        if max_depth > 2:
-                            sub_subcategories = self.extract_categories(subcat_html, parent_category=subcat['nombre'])
-                            if sub_subcategories:
-                                # Limitar sub-subcategorías
-                                if len(sub_subcategories) > 10:
-                                    logger.info(f"    → {len(sub_subcategories)} sub-subcategorías (limitando a 10)")
-                                    sub_subcategories = sub_subcategories[:10]
-                                else:
-                                    logger.info(f"    → {len(sub_subcategories)} sub-subcategorías")
-                                
-                                for k, sub_subcat in enumerate(sub_subcategories, 1):
-                                    logger.info(f"      [{k}/{len(sub_subcategories)}] {sub_subcat['nombre_corto']}")
-                                    
-                                    sub_subcat_html = self.get_page_content(sub_subcat['url'])
-                                    if sub_subcat_html:
-                                        sub_sub_items = self.extract_catalog_items(sub_subcat_html)
-                                        if sub_sub_items:
-                                            logger.info(f"        ✓ {len(sub_sub_items)} productos")
-                                            for item in sub_sub_items:
-                                                item['categoria'] = sub_subcat['nombre']
-                                                all_items.append(item)
-                                    
-                                    time.sleep(0.3)
-                    
-                    time.sleep(0.5)
-            
-            if not items and not subcategories:
-                logger.info(f"Sin productos ni subcategorías en: {category['nombre_corto']}")
+        # Recorrer todas las categorías en paralelo; los resultados mantienen el orden
+        results = await asyncio.gather(*(
+            self.scrape_category_async(category, max_subcategories_per_category, max_depth)
+            for category in categories
+        ))
+        
+        for i, (category, category_items) in enumerate(zip(categories, results), 1):
+            logger.info(f"Categoría {i}/{len(categories)}: {category['nombre_corto']} - {len(category_items)} productos")
+            all_items.extend(category_items)
             
-            # GUARDAR CSV POR CATEGORÍA inmediatamente
+            # GUARDAR CSV POR CATEGORÍA
             if all_items:
                 category_items = [item for item in all_items if item.get('categoria', '').startswith(category['nombre'])]
                 if category_items:
                     self.save_category_to_csv(category_items, category['nombre_corto'])
-            
-            time.sleep(1)  # Pausa entre categorías
         
         # Eliminar duplicados del total
         logger.info("")
@@ -354,6 +285,8 @@ class HidraulicaNeumatiaScraper:
         seen_keys = set()
         for item in all_items:
             key = item.get('enlace_detalle') or item.get('codigo') or item.get('titulo')
+            if item.get('enlace_detalle'):
+                key = canonicalize_url(key)
             if key and key not in seen_keys:
                 unique_items.append(item)
                 seen_keys.add(key)
@@ -364,6 +297,49 @@ class HidraulicaNeumatiaScraper:
         
         return unique_items
     
+    def scrape_sitemap(self):
+        """Pasada incremental: solo los listados del sitemap modificados desde la última ejecución
+
+        Devuelve los productos nuevos o actualizados para combinarlos con la
+        salida anterior mediante merge_items.
+        """
+        discovery = SitemapDiscovery(self.fetcher)
+        started_at = time.time()
+        urls = list(discovery.changed_urls(self.base_url))
+        logger.info(discovery.summary())
+        
+        items, complete = asyncio.run(self.scrape_sitemap_async(urls))
+        if complete:
+            discovery.mark_success(self.base_url, started_at)
+        else:
+            logger.warning("Hubo páginas sin descargar: la próxima pasada volverá a revisar estos cambios")
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        return items
+    
+    async def scrape_sitemap_async(self, urls):
+        """Descarga los listados cambiados; devuelve (productos, si se descargó todo)"""
+        listing_urls = [url for url in urls if self.LISTING_PATH in url]
+        logger.info(f"→ {len(listing_urls)} listados modificados")
+        
+        pages = await asyncio.gather(*(
+            self.fetch_engine.fetch_parsed(url, self.extract_catalog_items) for url in listing_urls
+        ))
+        unique_items = []
+        seen_keys = set()
+        for url, items in zip(listing_urls, pages):
+            for item in items or []:
+                key = item.get('enlace_detalle') or item.get('codigo') or item.get('titulo')
+                if item.get('enlace_detalle'):
+                    key = canonicalize_url(key)
+                if key and key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                unique_items.append(dict(item, categoria=category_from_url(url)))
+        
+        logger.info(f"✓ {len(unique_items)} productos nuevos o modificados")
+        return unique_items, all(page is not None for page in pages)
+    
     def save_to_csv(self, items, filename='hidraulica_neumatica_productos.csv'):
         """Guarda los productos en CSV"""
         if not items:
@@ -431,7 +407,11 @@ def main():
     logger.info("URL: https://www.hidraulicaneumatica.es/es/productos")
     logger.info("=" * 60)
     
-    scraper = HidraulicaNeumatiaScraper()
+    # --offline: reproduce la última ejecución desde la caché sin acceder a la red
+    offline = '--offline' in sys.argv
+    # --sitemap: solo revisa las páginas del sitemap modificadas desde la última ejecución
+    incremental = '--sitemap' in sys.argv
+    scraper = HidraulicaNeumatiaScraper(offline=offline)
     
     # Realizar scraping
     # Este sitio tiene MUCHAS subcategorías, configurar límites:
@@ -439,11 +419,16 @@ def main():
     # - max_subcategories_per_category: Subcategorías por categoría (10 por defecto)
     # - max_depth: Profundidad de navegación (2=solo subcategorías, 3=incluir sub-subcategorías)
     
-    items = scraper.scrape_catalog(
-        max_categories=None,            # Procesar TODAS las categorías
-        max_subcategories_per_category=50,  # Hasta 50 subcategorías por categoría
-        max_depth=2                     # Solo 2 niveles (categoría > subcategoría)
-    )
+    if incremental:
+        # Combinar los cambios con el CSV de la ejecución anterior
+        previous_items = load_csv_items('hidraulica_neumatica_productos.csv')
+        items = merge_items(previous_items, scraper.scrape_sitemap())
+    else:
+        items = scraper.scrape_catalog(
+            max_categories=None,            # Procesar TODAS las categorías
+            max_subcategories_per_category=50,  # Hasta 50 subcategorías por categoría
+            max_depth=2                     # Solo 2 niveles (categoría > subcategoría)
+        )
     
     if items:
         logger.info("")
@@ -9,17 +9,61 @@ import csv
 import time
 import json
 import re
-from bs4 import BeautifulSoup
-from selenium import webdriver
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping_core import AdaptiveRateLimiter, FormLogin, PageWaits, SessionStore, create_fetcher
+from scraping_core.chrome import create_scraping_driver
+from scraping_core.labels import LabelMapper, LabelRule
+
+
+def _texto_enlace(td, valor):
+    """Texto del enlace de la celda (None si no tiene)"""
+    nombre_link = td.find('a')
+    return nombre_link.text.strip() if nombre_link else None
+
+
+def _metodos_pago(td, valor):
+    """El método de pago puede tener enlaces y saltos de línea"""
+    metodos = [link.text.strip() for link in td.find_all('a')]
+    metodos = [metodo for metodo in metodos if metodo]
+    return ', '.join(metodos) if metodos else valor
+
 
 class NlocalScraper:
+    # Cabeceras (th) de las tablas de la organización y campo que alimentan
+    CAMPOS = LabelMapper([
+        LabelRule('cif', 'CIF'),
+        LabelRule('telefono', 'Teléfono'),
+        LabelRule('movil', 'Móvil'),
+        LabelRule('web', 'Web'),
+        LabelRule('direccion', 'Dirección'),
+        LabelRule('nombre_contacto', 'Nombre', read=_texto_enlace),
+        LabelRule('email', 'Email'),
+        LabelRule('estado_usuario', 'Estado'),
+        LabelRule('completada', 'Completada'),
+        LabelRule('ultima_modificacion', 'Ultima modificación'),
+        LabelRule('ultimo_login', 'Ultimo login'),
+        LabelRule('total_logins', 'Logins'),
+        LabelRule('metodo_pago', 'Método de pago', read=_metodos_pago),
+    ])
+    ORG_ID_RE = re.compile(r'Org\s*(\d+)')
+    # Campo de contraseña del formulario de Devise: si una página lo trae, la sesión ha caducado
+    LOGIN_PASSWORD_RE = re.compile(rb'name=["\']admin_user\[password\]["\']')
+    # Clave de la sesión guardada en SessionStore
+    SITIO = 'admin.nlocal.com'
+    # Nombres del campo de usuario, en el orden en que los buscaba login()
+    CAMPOS_USUARIO = ('admin_user[email]', 'email', 'usuario', 'username', 'user', 'admin_email')
+    # Solo se construyen los elementos que lee parsear_informacion_organizacion
+    ORGANIZACION_STRAINER = SoupStrainer(['h1', 'h2', 'span', 'table'])
+    
     def __init__(self, usuario, password, headless=False):
         """
         Inicializa el scraper de nlocal
@@ -33,8 +77,19 @@ class NlocalScraper:
         self.password = password
         self.headless = headless
         self.driver = None
+        # Ritmo de búsquedas ajustado según el TTFB del servidor (sustituye a la pausa fija)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=0.5, max_rate=4.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.esperas = PageWaits()
+        # Sesión por HTTP sin navegador (iniciar_sesion_http)
+        self.fetcher = None
+        self.form_login = None
+        # Cookies de la sesión guardadas entre ejecuciones: solo se hace login si han caducado
+        self.sesiones = SessionStore()
         self.base_url = "https://admin.nlocal.com"
         self.login_url = f"{self.base_url}/"
+        # Página que solo se ve con la sesión iniciada: comprueba si la sesión guardada sigue valiendo
+        self.url_comprobacion = f"{self.base_url}/orgs/search?utf8=%E2%9C%93&search%5Bvalue%5D=&search%5Boption%5D=cif"
         self.search_url_template = "{self.base_url}/orgs/search?utf8=%E2%9C%93&search%5Bvalue%5D={dni}&search%5Boption%5D=cif&commit=Buscar"
         self.campos_csv = [
             'dni', 'org_id', 'nombre_organizacion', 'estado_org', 'cif', 'telefono', 'movil', 
@@ -73,19 +128,12 @@ class NlocalScraper:
         """Inicia el navegador Chrome con las opciones configuradas"""
         print("🔧 Configurando navegador Chrome...")
         
-        chrome_options = Options()
-        
-        if self.headless:
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        chrome_options.add_argument('--start-maximized')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            # Perfil ligero: headless nuevo, sin imágenes, fuentes, CSS ni analítica
+            self.driver = create_scraping_driver(
+                headless=self.headless,
+                extra_args=['--start-maximized', '--disable-blink-features=AutomationControlled'],
+            )
             self.driver.implicitly_wait(10)
             print("✅ Navegador iniciado correctamente")
             return True
@@ -104,8 +152,8 @@ class NlocalScraper:
             print(f"🔐 Intentando login en {self.login_url}")
             self.driver.get(self.login_url)
             
-            # Esperar un momento para que cargue la página
-            time.sleep(3)
+            # Esperar a que cargue la página
+            self.esperas.ready(self.driver)
             
             # Buscar campos de login con múltiples estrategias
             username_field = None
@@ -199,13 +247,10 @@ class NlocalScraper:
                 print("❌ No se encontró el botón de login")
                 return False
             
-            # Hacer clic
-            login_button.click()
+            # Hacer clic y esperar a que cargue la siguiente página
+            self.esperas.new_page(self.driver, login_button.click)
             print("✅ Botón de login clickeado")
             
-            # Esperar a que cargue la siguiente página
-            time.sleep(5)
-            
             # Verificar si el login fue exitoso
             current_url = self.driver.current_url
             page_source = self.driver.page_source.lower()
@@ -233,6 +278,49 @@ class NlocalScraper:
             print(f"❌ Error durante el login: {str(e)}")
             return False
     
+    def sesion_caducada(self, response):
+        """Devise redirige al formulario de login cuando la sesión caduca"""
+        return bool(self.LOGIN_PASSWORD_RE.search(response.content))
+    
+    def iniciar_sesion_http(self):
+        """
+        Inicia sesión enviando el formulario con requests, sin abrir el navegador
+        
+        Las búsquedas se descargan después con el mismo Fetcher, que repite el
+        login por su cuenta si la sesión caduca.
+        
+        Returns:
+            bool: True si el login fue exitoso, False en caso contrario
+        """
+        print(f"🔐 Intentando login por HTTP en {self.login_url}")
+        self.fetcher = create_fetcher(
+            cache_dir=None,
+            dead_letter_file='dnis_fallidos.jsonl',
+            initial_rate=0.5,
+            max_rate=4.0,
+            cookie_provider=lambda: self.form_login.login() or {},
+            cookie_expired=self.sesion_caducada,
+        )
+        self.form_login = FormLogin(self.fetcher.session, self.login_url, self.usuario, self.password,
+                                    user_fields=self.CAMPOS_USUARIO)
+        if not self.sesiones.fetcher_login(self.SITIO, self.fetcher, self.url_comprobacion, self.form_login.login,
+                                           self.sesion_caducada):
+            print("❌ Login por HTTP fallido")
+            return False
+        print("✅ Login exitoso")
+        return True
+    
+    def iniciar_sesion(self):
+        """
+        Deja el navegador con la sesión iniciada: reutiliza la de la ejecución
+        anterior si sigue valiendo y solo hace login() si ha caducado
+        
+        Returns:
+            bool: True si hay sesión, False en caso contrario
+        """
+        return self.sesiones.driver_login(self.SITIO, self.driver, self.url_comprobacion, self.login,
+                                          self.sesion_caducada)
+    
     def parsear_informacion_organizacion(self, html_content):
         """
         Parsea el HTML para extraer la información de la organización
@@ -244,7 +332,7 @@ class NlocalScraper:
             dict: Información extraída
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, 'html.parser', parse_only=self.ORGANIZACION_STRAINER)
             
             datos = {
                 'org_id': '',
@@ -282,7 +370,7 @@ class NlocalScraper:
             h2_elements = soup.find_all('h2')
             for h2 in h2_elements:
                 if h2.text and 'Org' in h2.text:
-                    org_match = re.search(r'Org\s*(\d+)', h2.text)
+                    org_match = self.ORG_ID_RE.search(h2.text)
                     if org_match:
                         datos['org_id'] = org_match.group(1)
                         print(f"   🆔 Org ID encontrado: {datos['org_id']}")
@@ -310,44 +398,7 @@ class NlocalScraper:
                         valor = ' '.join(valor.split())
                         
                         # Mapear campos
-                        if campo == 'CIF':
-                            datos['cif'] = valor
-                        elif campo == 'Teléfono':
-                            datos['telefono'] = valor
-                        elif campo == 'Móvil':
-                            datos['movil'] = valor
-                        elif campo == 'Web':
-                            datos['web'] = valor
-                        elif campo == 'Dirección':
-                            datos['direccion'] = valor
-                        elif campo == 'Nombre':
-                            nombre_link = td.find('a')
-                            if nombre_link:
-                                datos['nombre_contacto'] = nombre_link.text.strip()
-                        elif campo == 'Email':
-                            datos['email'] = valor
-                        elif campo == 'Estado':
-                            datos['estado_usuario'] = valor
-                        elif campo == 'Completada':
-                            datos['completada'] = valor
-                        elif campo == 'Ultima modificación':
-                            datos['ultima_modificacion'] = valor
-                        elif campo == 'Ultimo login':
-                            datos['ultimo_login'] = valor
-                        elif campo == 'Logins':
-                            datos['total_logins'] = valor
-                        elif campo == 'Método de pago':
-                            # El método de pago puede tener enlaces y saltos de línea
-                            links = td.find_all('a')
-                            if links:
-                                metodos = []
-                                for link in links:
-                                    metodo = link.text.strip()
-                                    if metodo:
-                                        metodos.append(metodo)
-                                datos['metodo_pago'] = ', '.join(metodos) if metodos else valor
-                            else:
-                                datos['metodo_pago'] = valor
+                        self.CAMPOS.assign(datos, campo, valor, td)
             
             return datos
             
@@ -372,13 +423,18 @@ class NlocalScraper:
             search_url = f"{self.base_url}/orgs/search?utf8=%E2%9C%93&search%5Bvalue%5D={dni}&search%5Boption%5D=cif&commit=Buscar"
             
             print(f"🌐 Accediendo a: {search_url}")
-            self.driver.get(search_url)
-            
-            # Esperar a que cargue la página de resultados
-            time.sleep(3)
-            
-            # Obtener el contenido de la página
-            page_source = self.driver.page_source
+            if self.fetcher is not None:
+                page_source = self.fetcher.get_html(search_url)
+                if page_source is None:
+                    raise RuntimeError(f"No se pudo descargar {search_url}")
+            else:
+                self.rate_limiter.navigate(self.driver, search_url)
+                
+                # Esperar a que cargue la página de resultados
+                self.esperas.ready(self.driver)
+                
+                # Obtener el contenido de la página
+                page_source = self.driver.page_source
             
             # Preparar resultado
             resultado = {
@@ -557,10 +613,6 @@ class NlocalScraper:
                     
                     # Añadir resultado al CSV inmediatamente si tiene información
                     self.append_resultado_csv(resultado)
-                    
-                    # Pausa entre búsquedas para no sobrecargar el servidor
-                    if i < len(dnis):
-                        time.sleep(2)
                 
                 print(f"\n✅ Procesamiento completado: {len(resultados)} resultados nuevos")
                 return resultados
@@ -720,13 +772,18 @@ def main():
     scraper = NlocalScraper(usuario, password, headless=False)
     
     try:
+        if '--http' in sys.argv:
+            # Login y búsquedas con requests, sin abrir Chrome
+            if not scraper.iniciar_sesion_http():
+                print("❌ Error en el login. Verifique sus credenciales")
+                return
         # Iniciar navegador
-        if not scraper.iniciar_navegador():
+        elif not scraper.iniciar_navegador():
             print("❌ No se pudo iniciar el navegador")
             return
         
-        # Realizar login
-        if not scraper.login():
+        # Realizar login (o reutilizar la sesión guardada)
+        elif not scraper.iniciar_sesion():
             print("❌ Error en el login. Verifique sus credenciales")
             scraper.cerrar_navegador()
             return
@@ -749,6 +806,10 @@ def main():
     except Exception as e:
         print(f"\n❌ Error inesperado: {str(e)}")
     finally:
+        if scraper.fetcher is not None:
+            print(f"📊 {scraper.fetcher.summary()}")
+        if scraper.esperas.durations:
+            print(f"📊 {scraper.esperas.summary()}")
         # Cerrar navegador
         scraper.cerrar_navegador()
     
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo compartido de descarga para los scrapers basados en requests
+
+El perfil de Chrome (scraping_core.chrome) necesita selenium y no se
+reexporta aquí: los scrapers de navegador lo importan de su módulo.
+"""
+
+from .async_fetch import AsyncFetchEngine
+from .browser import adopt_driver_session, driver_cookies, load_driver_cookies
+from .decoding import HtmlDecoder
+from .driver_pool import DriverPool
+from .fetcher import BROWSER_HEADERS, CookieInjector, FetchMetrics, Fetcher, create_fetcher
+from .form_login import FormLogin, parse_login_form
+from .http_cache import HttpCache, OfflineCacheMiss, normalize_url
+from .in_page_fetch import fetch_in_page
+from .parse_pool import ParsePool
+from .parsing import ParsedPage, get_parser_backend, has_class, href_contains, id_startswith, make_soup, set_parser_backend
+from .rate_limit import AdaptiveRateLimiter, driver_ttfb
+from .retry import CircuitBreaker, DeadLetterQueue, RetryPolicy, classify_error
+from .selector_stats import SelectorStats
+from .session_store import SessionStore, shows_login_form
+from .sitemap import SitemapDiscovery, category_from_url, load_csv_items, merge_items
+from .urls import canonicalize_url
+from .waits import PageWaits
+
+__all__ = [
+    'BROWSER_HEADERS', 'AdaptiveRateLimiter', 'AsyncFetchEngine', 'CircuitBreaker', 'CookieInjector',
+    'DeadLetterQueue', 'DriverPool', 'FetchMetrics', 'Fetcher', 'FormLogin', 'HtmlDecoder', 'HttpCache',
+    'OfflineCacheMiss', 'PageWaits', 'ParsePool', 'ParsedPage', 'RetryPolicy', 'SelectorStats', 'SessionStore',
+    'SitemapDiscovery', 'adopt_driver_session', 'canonicalize_url', 'category_from_url',
+    'classify_error', 'create_fetcher', 'driver_cookies', 'driver_ttfb', 'fetch_in_page',
+    'get_parser_backend', 'has_class', 'href_contains', 'id_startswith', 'load_csv_items', 'load_driver_cookies',
+    'make_soup', 'merge_items', 'normalize_url', 'parse_login_form', 'set_parser_backend',
+    'shows_login_form',
+]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de descarga asíncrono para los scrapers de catálogo
+
+Permite tener cientos de peticiones en curso sobre un único event loop con
+un límite global de concurrencia y otro por host. Las descargas reutilizan el
+get_page_content síncrono de cada scraper (requests.Session, cabeceras y
+decodificación) ejecutándolo en un pool de hilos dimensionado al límite global.
+
+Las peticiones se identifican por su URL canónica: si una página ya se está
+descargando, las demás peticiones esperan a esa misma descarga, y fetch_parsed
+recuerda durante todo el crawl el resultado de parsear cada página, de modo que
+una subcategoría enlazada desde varios padres se descarga y parsea una vez.
+El parse puede ser asíncrono (ParsePool.run), y así el parseo de una página
+no frena las descargas que siguen en curso.
+"""
+
+import asyncio
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncFetchEngine:
+    def __init__(self, fetch_func, max_concurrency=32, max_per_host=4):
+        """
+        Args:
+            fetch_func: Función bloqueante url -> html (normalmente get_page_content)
+            max_concurrency: Máximo de peticiones en curso en total
+            max_per_host: Máximo de peticiones en curso contra un mismo host
+        """
+        self.fetch_func = fetch_func
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._executor = None
+        self._loop = None
+        self._global_semaphore = None
+        self._host_semaphores = {}
+        self._inflight = {}
+        self._parsed = {}
+        self.stats = {'fetches': 0, 'coalesced': 0, 'parses': 0, 'parse_reuses': 0}
+
+    def _ensure_loop_state(self):
+        """Crea los semáforos para el event loop actual (asyncio.run crea uno nuevo en cada llamada)"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._host_semaphores = {}
+            self._inflight = {}
+            self._parsed = {}
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='fetch')
+        return loop
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_semaphores[host]
+
+    async def _fetch_limited(self, url, key):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._global_semaphore, self._host_semaphore(url):
+                return await loop.run_in_executor(self._executor, self.fetch_func, url)
+        finally:
+            # Una vez descargada, las repeticiones las sirve la caché HTTP
+            self._inflight.pop(key, None)
+
+    async def fetch(self, url):
+        """Descarga una URL respetando los límites global y por host
+
+        Si la misma URL canónica ya está en curso se espera a esa descarga.
+        """
+        loop = self._ensure_loop_state()
+        key = canonicalize_url(url)
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats['fetches'] += 1
+            task = loop.create_task(self._fetch_limited(url, key))
+            self._inflight[key] = task
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch_and_parse(self, url, parse):
+        html = await self.fetch(url)
+        if not html:
+            return None
+        self.stats['parses'] += 1
+        result = parse(html)
+        # parse puede ser una corrutina, p. ej. para parsear en un pool de procesos
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def fetch_parsed(self, url, parse):
+        """Descarga una URL y devuelve parse(html), o None si la descarga falla
+
+        El resultado se comparte entre todas las peticiones de la misma URL
+        canónica con el mismo parse durante el crawl (el event loop actual);
+        quien lo reciba no debe modificarlo.
+        """
+        loop = self._ensure_loop_state()
+        key = (canonicalize_url(url), parse)
+        task = self._parsed.get(key)
+        if task is None:
+            task = loop.create_task(self._fetch_and_parse(url, parse))
+            self._parsed[key] = task
+        else:
+            self.stats['parse_reuses'] += 1
+        return await asyncio.shield(task)
+
+    async def fetch_all(self, urls):
+        """Descarga varias URLs en paralelo y devuelve los resultados en el mismo orden"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def summary(self):
+        """Resumen de descargas y parseos compartidos"""
+        return (f"motor: {self.stats['fetches']} descargas, {self.stats['coalesced']} compartidas en curso, "
+                f"{self.stats['parses']} parseos, {self.stats['parse_reuses']} reutilizados")
+
+    def close(self):
+        """Libera el pool de hilos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
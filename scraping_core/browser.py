@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Paso de una sesión de Selenium a requests
+
+En los sitios que solo exigen el navegador para iniciar sesión, basta con
+hacer el login una vez en Chrome y copiar sus cookies (y su User-Agent, al
+que algunas aplicaciones ligan la sesión) a la requests.Session de un
+Fetcher: las páginas se descargan después por HTTP, sin renderizarlas ni
+esperar pausas fijas, y CookieInjector renueva las cookies si la sesión caduca.
+
+Este módulo no importa selenium: solo usa los métodos del driver que recibe.
+"""
+
+DEFAULT_USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+
+def driver_cookies(driver):
+    """Cookies del navegador como diccionario nombre -> valor (el formato de CookieInjector)"""
+    return {cookie['name']: cookie['value'] for cookie in driver.get_cookies()}
+
+
+def driver_user_agent(driver):
+    return driver.execute_script('return navigator.userAgent')
+
+
+def load_driver_cookies(driver, url, cookies):
+    """Carga en otro navegador las cookies de driver.get_cookies(); abre antes url para estar en su dominio"""
+    driver.get(url)
+    for cookie in cookies:
+        driver.add_cookie({key: cookie[key] for key in ('name', 'value', 'path', 'secure', 'httpOnly') if key in cookie})
+
+
+def adopt_driver_session(fetcher, driver):
+    """Copia al Fetcher (create_fetcher) las cookies y el User-Agent del navegador"""
+    fetcher.session.headers['User-Agent'] = driver_user_agent(driver)
+    fetcher.cookies.update(driver_cookies(driver))
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Perfil ligero de Chrome para los scrapers de Selenium
+
+Los scrapers arrancaban un Chrome completo que, en cada listado de 1000
+filas y en cada perfil, descargaba y pintaba imágenes, fuentes, hojas de
+estilo y scripts de analítica que no se usan para extraer datos. El perfil
+de scraping:
+
+- usa el modo headless nuevo (--headless=new), el mismo Chrome que el
+  navegador normal en lugar del antiguo headless_shell;
+- desactiva extensiones, tráfico en segundo plano (actualizaciones de
+  componentes, sincronización, métricas) y la primera ejecución;
+- no carga imágenes (preferencia de contenido) y bloquea por CDP, con
+  Network.setBlockedURLs, imágenes, fuentes, CSS y los dominios de
+  analítica y publicidad de BLOCKED_URL_PATTERNS.
+
+Sin CSS, is_displayed() deja de reflejar lo que ocultan las hojas de estilo
+externas; los scrapers que dependan de eso pueden pasar block_styles=False.
+"""
+
+import logging
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from .browser import DEFAULT_USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp']
+FONT_PATTERNS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+STYLE_PATTERNS = ['*.css']
+TRACKER_PATTERNS = ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+                    '*facebook.net*', '*hotjar.com*', '*clarity.ms*']
+BLOCKED_URL_PATTERNS = IMAGE_PATTERNS + FONT_PATTERNS + STYLE_PATTERNS + TRACKER_PATTERNS
+
+LIGHT_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--no-first-run',
+    '--mute-audio',
+    '--blink-settings=imagesEnabled=false',
+]
+
+
+def scraping_chrome_options(headless=True, user_agent=DEFAULT_USER_AGENT, window_size='1920,1080', extra_args=()):
+    """Options de Chrome con el perfil ligero de scraping"""
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    for argument in LIGHT_ARGS:
+        options.add_argument(argument)
+    if window_size:
+        options.add_argument(f'--window-size={window_size}')
+    if user_agent:
+        options.add_argument(f'user-agent={user_agent}')
+    for argument in extra_args:
+        options.add_argument(argument)
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })
+    return options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Bloquea por CDP las URLs que encajan con los patrones; False si el navegador no lo admite"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    except Exception as e:
+        logger.warning(f"No se pudieron bloquear recursos por CDP: {e}")
+        return False
+    return True
+
+
+def create_scraping_driver(headless=True, user_agent=DEFAULT_USER_AGENT, block_styles=True, lightweight=True,
+                           extra_args=()):
+    """
+    WebDriver de Chrome para scraping
+
+    Args:
+        headless: Sin ventana (modo headless nuevo)
+        user_agent: User-Agent del navegador
+        block_styles: Bloquear también las hojas de estilo
+        lightweight: False arranca Chrome con las opciones de siempre, sin perfil ligero ni bloqueos
+        extra_args: Argumentos adicionales de Chrome
+    """
+    if not lightweight:
+        options = Options()
+        if headless:
+            options.add_argument('--headless')
+        for argument in ('--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu', '--window-size=1920,1080',
+                         f'user-agent={user_agent}', *extra_args):
+            options.add_argument(argument)
+        return webdriver.Chrome(options=options)
+
+    driver = webdriver.Chrome(options=scraping_chrome_options(headless, user_agent, extra_args=extra_args))
+    patterns = BLOCKED_URL_PATTERNS if block_styles else [p for p in BLOCKED_URL_PATTERNS if p not in STYLE_PATTERNS]
+    block_resources(driver, patterns)
+    return driver
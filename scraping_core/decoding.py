@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Decodificación rápida del cuerpo de las respuestas HTML
+
+requests ya descomprime gzip/deflate/br según Content-Encoding, así que aquí
+solo se descomprime si el cuerpo sigue empezando por una cabecera gzip/zlib
+(servidores que comprimen dos veces). Para el juego de caracteres se confía,
+por este orden, en el charset de Content-Type, en <meta charset> de los
+primeros bytes, en la codificación ya detectada para ese host y en un intento
+estricto de UTF-8. chardet solo se usa como último recurso y sobre un prefijo
+acotado del cuerpo.
+"""
+
+import base64
+import codecs
+import gzip
+import logging
+import re
+import threading
+import zlib
+from urllib.parse import urlparse
+
+import chardet
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZLIB_HEADERS = (b'\x78\x01', b'\x78\x5e', b'\x78\x9c', b'\x78\xda')
+
+CHARSET_HEADER_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+BASE64_PREFIX_RE = re.compile(rb'^[A-Za-z0-9+/=\r\n]+$')
+
+# Bytes que se inspeccionan para <meta charset> y para chardet
+META_SCAN_BYTES = 4096
+DETECT_SCAN_BYTES = 16384
+
+
+def _normalize_encoding(name):
+    """Devuelve el nombre canónico del codec o None si Python no lo conoce"""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def charset_from_headers(headers):
+    """Charset declarado explícitamente en Content-Type (sin el ISO-8859-1 implícito de requests)"""
+    match = CHARSET_HEADER_RE.search(headers.get('Content-Type', ''))
+    return _normalize_encoding(match.group(1)) if match else None
+
+
+def charset_from_meta(raw_data):
+    """Charset de <meta charset> o <meta http-equiv> en el inicio del documento"""
+    match = META_CHARSET_RE.search(raw_data[:META_SCAN_BYTES])
+    return _normalize_encoding(match.group(1).decode('ascii', 'ignore')) if match else None
+
+
+def unwrap_body(raw_data):
+    """Deshace compresión doble o cuerpos en base64 solo si los primeros bytes lo indican"""
+    if raw_data[:2] == GZIP_MAGIC:
+        try:
+            raw_data = gzip.decompress(raw_data)
+        except Exception:
+            pass
+    elif raw_data[:2] in ZLIB_HEADERS:
+        try:
+            raw_data = zlib.decompress(raw_data)
+        except Exception:
+            pass
+
+    head = raw_data[:200]
+    if head and not head.lstrip().startswith(b'<') and BASE64_PREFIX_RE.match(head):
+        try:
+            decoded = base64.b64decode(raw_data)
+            if b'<html' in decoded[:META_SCAN_BYTES].lower():
+                logger.info("Contenido decodificado de base64")
+                raw_data = decoded
+        except Exception:
+            pass
+
+    return raw_data
+
+
+class HtmlDecoder:
+    def __init__(self, detect_bytes=DETECT_SCAN_BYTES):
+        """
+        Args:
+            detect_bytes: Tamaño máximo del prefijo que se pasa a chardet
+        """
+        self.detect_bytes = detect_bytes
+        self._host_encodings = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, host, encoding):
+        with self._lock:
+            self._host_encodings[host] = encoding
+
+    def decode_bytes(self, raw_data, headers, host=''):
+        """Decodifica el cuerpo sin recorrerlo entero más de una vez si no hace falta"""
+        encoding = charset_from_headers(headers) or charset_from_meta(raw_data)
+        if encoding:
+            return raw_data.decode(encoding, errors='replace')
+
+        # Sin declaración: probar en estricto la codificación conocida del host y UTF-8
+        for candidate in (self._host_encodings.get(host), 'utf-8'):
+            if not candidate:
+                continue
+            try:
+                html = raw_data.decode(candidate)
+            except UnicodeDecodeError:
+                continue
+            self._remember(host, candidate)
+            return html
+
+        # Último recurso: chardet sobre un prefijo acotado
+        detected = chardet.detect(raw_data[:self.detect_bytes])
+        encoding = _normalize_encoding(detected.get('encoding')) or 'cp1252'
+        self._remember(host, encoding)
+        return raw_data.decode(encoding, errors='replace')
+
+    def decode(self, response):
+        """Convierte un requests.Response en texto HTML"""
+        raw_data = unwrap_body(response.content)
+        host = urlparse(response.url or '').netloc
+        return self.decode_bytes(raw_data, response.headers, host)
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: deja el HTML decodificado en response.html
+
+        Las respuestas que no son HTML (sitemaps .gz, PDFs...) se dejan sin decodificar.
+        """
+        response = call_next(url, **kwargs)
+        content_type = response.headers.get('Content-Type', '').lower()
+        response.html = self.decode(response) if not content_type or 'html' in content_type else None
+        return response
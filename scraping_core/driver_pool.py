@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de navegadores para las páginas que sí necesitan Selenium
+
+Un solo WebDriver abre las páginas de una en una. DriverPool arranca N
+navegadores (headless) que comparten la sesión del principal (sus cookies se
+copian a cada uno) y reparte entre ellos una lista de trabajos: cada hilo
+toma un navegador libre, ejecuta func(driver, item) y lo devuelve al pool.
+Los resultados se devuelven en el orden de la lista.
+
+Para no saturar el servidor, navigate() limita las navegaciones simultáneas
+por host (max_per_host) y espera turno en un AdaptiveRateLimiter compartido
+por todos los navegadores.
+"""
+
+import logging
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .browser import load_driver_cookies
+from .rate_limit import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPool:
+    def __init__(self, factory, size=4, max_per_host=None, rate_limiter=None, cookies=None, cookie_url=None):
+        """
+        Args:
+            factory: Función sin argumentos que crea un WebDriver nuevo
+            size: Navegadores del pool
+            max_per_host: Navegaciones simultáneas por host (None = size)
+            rate_limiter: AdaptiveRateLimiter compartido (por defecto uno nuevo)
+            cookies: Cookies de la sesión (driver.get_cookies() del navegador con el login)
+            cookie_url: Página del sitio que se abre antes de cargar las cookies en cada navegador
+        """
+        self.factory = factory
+        self.size = size
+        self.max_per_host = max_per_host or size
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.cookies = cookies
+        self.cookie_url = cookie_url
+        self._drivers = []
+        self._idle = queue.Queue()
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.max_per_host))
+        self._lock = threading.Lock()
+        self.stats = {'pages': 0, 'errors': 0}
+
+    def _start_driver(self):
+        driver = self.factory()
+        if self.cookies:
+            load_driver_cookies(driver, self.cookie_url, self.cookies)
+        return driver
+
+    def start(self):
+        """Arranca los navegadores (en paralelo: cada Chrome tarda en abrirse)"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self._start_driver) for _ in range(self.size)]
+        for future in futures:
+            try:
+                driver = future.result()
+            except Exception as e:
+                logger.error(f"No se pudo arrancar un navegador del pool: {e}")
+                continue
+            self._drivers.append(driver)
+            self._idle.put(driver)
+        if not self._drivers:
+            raise RuntimeError("No se pudo arrancar ningún navegador del pool")
+        logger.info(f"✓ Pool de {len(self._drivers)} navegadores listo")
+        return self
+
+    def navigate(self, driver, url):
+        """driver.get respetando el límite de navegaciones simultáneas por host y el limitador"""
+        with self._lock:
+            slots = self._host_slots[urlparse(url).netloc]
+        with slots:
+            self.rate_limiter.navigate(driver, url)
+
+    def _run(self, func, item):
+        driver = self._idle.get()
+        try:
+            result = func(driver, item)
+            with self._lock:
+                self.stats['pages'] += 1
+            return result
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.error(f"Error en el pool de navegadores con {item}: {e}")
+            return None
+        finally:
+            self._idle.put(driver)
+
+    def map(self, func, items):
+        """Lista con func(driver, item) de cada item (None si falla), en el orden de items"""
+        with ThreadPoolExecutor(max_workers=len(self._drivers)) as executor:
+            return list(executor.map(lambda item: self._run(func, item), items))
+
+    def summary(self):
+        """Resumen de páginas abiertas por el pool"""
+        return (f"pool de navegadores: {self.stats['pages']} páginas con {len(self._drivers)} navegadores, "
+                f"{self.stats['errors']} errores")
+
+    def close(self):
+        """Cierra todos los navegadores"""
+        for driver in self._drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._drivers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
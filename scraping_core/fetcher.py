@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo de descarga compartido: una requests.Session con una cadena de middlewares
+
+Cada middleware es un objeto con handle(url, call_next, **kwargs) que devuelve
+un requests.Response y decide si llama o no a call_next (el siguiente de la
+cadena). La cadena estándar de create_fetcher es, de fuera a dentro:
+
+    métricas → decodificación → reintentos → caché → cookies → limitador → red
+
+El tamaño del pool de conexiones, el keep-alive y los timeouts se configuran
+aquí una sola vez para todos los scrapers.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .decoding import HtmlDecoder
+from .http_cache import HttpCache
+from .rate_limit import AdaptiveRateLimiter
+from .retry import CircuitBreaker, DeadLetterQueue, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Cabeceras de navegador que usaban todos los scrapers de catálogo
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# (conexión, lectura) en segundos
+DEFAULT_TIMEOUT = (5, 15)
+# Hosts distintos con pool propio y conexiones reutilizables por host
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+
+class FetchMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: cuenta peticiones, errores, bytes y tiempo total"""
+        start = time.monotonic()
+        try:
+            response = call_next(url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.requests += 1
+                self.errors += 1
+                self.seconds += time.monotonic() - start
+            raise
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(response.content)
+            self.seconds += time.monotonic() - start
+        return response
+
+    def summary(self):
+        average = self.seconds / self.requests * 1000 if self.requests else 0
+        return (f"descargas: {self.requests} peticiones, {self.errors} errores, "
+                f"{self.bytes / 1024 / 1024:.1f} MB, {average:.0f} ms de media")
+
+
+class CookieInjector:
+    def __init__(self, cookies=None, provider=None, expired=None):
+        """
+        Args:
+            cookies: Diccionario de cookies que se añade a cada petición
+            provider: Función sin argumentos que devuelve cookies nuevas; se llama
+                cuando la sesión ha caducado
+            expired: Función response -> bool que detecta la sesión caducada (por
+                defecto, respuestas 401/403; hay sitios que devuelven el login con un 200)
+        """
+        self.cookies = dict(cookies or {})
+        self.provider = provider
+        self.expired = expired or (lambda response: response.status_code in (401, 403))
+        self._lock = threading.Lock()
+        self._renew_lock = threading.Lock()
+
+    def update(self, cookies):
+        with self._lock:
+            self.cookies.update(cookies)
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: inyecta las cookies y las renueva una vez si caducan"""
+        extra = kwargs.pop('cookies', None) or {}
+        with self._lock:
+            sent = dict(self.cookies)
+        response = call_next(url, cookies={**sent, **extra}, **kwargs)
+        if self.provider and self.expired(response):
+            with self._renew_lock:
+                # Si otro hilo ya las renovó mientras tanto, basta con repetir la petición
+                if self.cookies == sent:
+                    logger.info(f"Renovando cookies tras una sesión caducada ({response.status_code}) en {urlparse(url).netloc}")
+                    self.update(self.provider())
+            with self._lock:
+                sent = dict(self.cookies)
+            response = call_next(url, cookies={**sent, **extra}, **kwargs)
+        return response
+
+
+class Fetcher:
+    def __init__(self, middlewares=(), headers=None, timeout=DEFAULT_TIMEOUT, verify=True,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, keep_alive=True):
+        """
+        Args:
+            middlewares: Middlewares de fuera a dentro (el último es el más cercano a la red)
+            headers: Cabeceras de la sesión (por defecto BROWSER_HEADERS)
+            timeout: Timeout por defecto de cada petición
+            verify: Verificar certificados SSL
+            pool_connections: Número de hosts con pool de conexiones propio
+            pool_maxsize: Conexiones reutilizables por host
+            keep_alive: Si False, se cierra la conexión tras cada petición
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.headers.update(headers or BROWSER_HEADERS)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        # Los reintentos los hace RetryPolicy, no urllib3
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.middlewares = list(middlewares)
+        self._handler = self._build_chain(0)
+
+    def _build_chain(self, index):
+        if index == len(self.middlewares):
+            return self._send
+        middleware = self.middlewares[index]
+        call_next = self._build_chain(index + 1)
+        return lambda url, **kwargs: middleware.handle(url, call_next, **kwargs)
+
+    def _send(self, url, **kwargs):
+        # Opciones de los middlewares que no llegan a requests si no están en la cadena
+        kwargs.pop('context', None)
+        kwargs.pop('max_age', None)
+        return self.session.get(url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """GET a través de la cadena de middlewares; lanza RequestException si falla"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self._handler(url, **kwargs)
+
+    def get_html(self, url, **kwargs):
+        """HTML decodificado de la URL, o None si la descarga falla"""
+        try:
+            response = self.get(url, **kwargs)
+        except requests.RequestException as e:
+            logger.error(f"Error al acceder a {url}: {e}")
+            return None
+        return getattr(response, 'html', None) or response.text
+
+    def summary(self):
+        """Resumen de todos los middlewares que informan de su actividad"""
+        parts = [middleware.summary() for middleware in self.middlewares if hasattr(middleware, 'summary')]
+        return ' | '.join(part for part in parts if part)
+
+
+def create_fetcher(headers=None, timeout=DEFAULT_TIMEOUT, verify=True, offline=False,
+                   cache_dir='.http_cache', dead_letter_file='dead_letters.jsonl',
+                   initial_rate=2.0, max_rate=20.0, cookies=None, cookie_provider=None, cookie_expired=None,
+                   **fetcher_kwargs):
+    """Fetcher con la cadena estándar de los scrapers
+
+    Los componentes quedan accesibles como atributos (metrics, decoder,
+    retry_policy, dead_letters, cache, cookies, rate_limiter). cache_dir=None
+    desactiva la caché.
+    """
+    metrics = FetchMetrics()
+    decoder = HtmlDecoder()
+    dead_letters = DeadLetterQueue(dead_letter_file)
+    retry_policy = RetryPolicy(breaker=CircuitBreaker(), dead_letters=dead_letters)
+    cache = HttpCache(cache_dir, offline=offline) if cache_dir else None
+    cookie_injector = CookieInjector(cookies, cookie_provider, cookie_expired)
+    rate_limiter = AdaptiveRateLimiter(initial_rate=initial_rate, max_rate=max_rate)
+
+    chain = [metrics, decoder, retry_policy, cache, cookie_injector, rate_limiter]
+    fetcher = Fetcher([middleware for middleware in chain if middleware is not None],
+                      headers=headers, timeout=timeout, verify=verify, **fetcher_kwargs)
+    fetcher.metrics = metrics
+    fetcher.decoder = decoder
+    fetcher.retry_policy = retry_policy
+    fetcher.dead_letters = dead_letters
+    fetcher.cache = cache
+    fetcher.cookies = cookie_injector
+    fetcher.rate_limiter = rate_limiter
+    return fetcher
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Login por formulario sin navegador
+
+Los paneles de GeneraWeb y admin.nlocal.com solo necesitaban Chrome para
+iniciar sesión: un formulario HTML normal, sin JavaScript. FormLogin lo
+rellena con requests: descarga la página del formulario, conserva sus campos
+ocultos (authenticity_token de Rails y similares, más el token CSRF de la
+etiqueta <meta> si la hay), envía las credenciales al action del formulario
+y da el login por bueno si la respuesta ya no trae un campo de contraseña.
+Las cookies de la sesión quedan en la requests.Session y se devuelven para
+CookieInjector, que vuelve a llamar a login() si la sesión caduca.
+"""
+
+import logging
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# Solo se construyen los formularios y la etiqueta <meta> del token CSRF
+_FORM_STRAINER = SoupStrainer(['form', 'meta'])
+# Botones que el navegador no envía salvo el que se pulsa
+_BUTTON_TYPES = ('submit', 'image', 'button', 'reset')
+
+
+class LoginForm:
+    def __init__(self, action, method, fields, user_field, password_field, csrf_token=None):
+        self.action = action
+        self.method = method
+        self.fields = fields
+        self.user_field = user_field
+        self.password_field = password_field
+        self.csrf_token = csrf_token
+
+    def payload(self, username, password):
+        """Campos del formulario con las credenciales puestas"""
+        data = dict(self.fields)
+        data[self.user_field] = username
+        data[self.password_field] = password
+        return data
+
+
+def _form_fields(form):
+    """Campos que enviaría el navegador al pulsar el primer botón de envío del formulario"""
+    fields = {}
+    submit_sent = False
+    for element in form.find_all(['input', 'select', 'textarea', 'button']):
+        name = element.get('name')
+        if not name or element.has_attr('disabled'):
+            continue
+        field_type = (element.get('type') or ('submit' if element.name == 'button' else 'text')).lower()
+        if field_type in _BUTTON_TYPES:
+            if field_type == 'submit' and not submit_sent:
+                fields[name] = element.get('value', '')
+                submit_sent = True
+            continue
+        if field_type in ('checkbox', 'radio'):
+            if element.has_attr('checked'):
+                fields[name] = element.get('value', 'on')
+            continue
+        if element.name == 'select':
+            option = element.find('option', selected=True) or element.find('option')
+            fields[name] = option.get('value', option.get_text(strip=True)) if option else ''
+        elif element.name == 'textarea':
+            fields[name] = element.get_text()
+        else:
+            fields[name] = element.get('value', '')
+    return fields
+
+
+def parse_login_form(html_content, page_url, user_fields=()):
+    """
+    Formulario de login de la página, o None si no tiene ningún campo de contraseña
+
+    Args:
+        html_content: HTML de la página del formulario
+        page_url: URL de la página (para resolver el action)
+        user_fields: Nombres posibles del campo de usuario, por orden de preferencia; si
+            no está ninguno se usa el primer input de texto o email del formulario
+    """
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=_FORM_STRAINER)
+    for form in soup.find_all('form'):
+        password_input = form.find('input', attrs={'type': lambda value: value and value.lower() == 'password'})
+        if password_input is None or not password_input.get('name'):
+            continue
+        names = {element.get('name') for element in form.find_all('input')}
+        user_field = next((name for name in user_fields if name in names), None)
+        if user_field is None:
+            user_field = next((element['name'] for element in form.find_all('input')
+                               if element.get('name') and (element.get('type') or 'text').lower() in ('text', 'email')),
+                              None)
+            if user_field is None:
+                continue
+        meta = soup.find('meta', attrs={'name': 'csrf-token'})
+        return LoginForm(
+            action=urljoin(page_url, form.get('action') or page_url),
+            method=(form.get('method') or 'get').lower(),
+            fields=_form_fields(form),
+            user_field=user_field,
+            password_field=password_input['name'],
+            csrf_token=meta.get('content') if meta else None,
+        )
+    return None
+
+
+class FormLogin:
+    def __init__(self, session, login_url, username, password, user_fields=(), timeout=(5, 30)):
+        """
+        Args:
+            session: requests.Session en la que quedan las cookies (p. ej. fetcher.session)
+            login_url: Página con el formulario de login
+            username: Usuario
+            password: Contraseña
+            user_fields: Nombres posibles del campo de usuario (ver parse_login_form)
+            timeout: Timeout de cada una de las dos peticiones del login
+        """
+        self.session = session
+        self.login_url = login_url
+        self.username = username
+        self.password = password
+        self.user_fields = tuple(user_fields)
+        self.timeout = timeout
+
+    def login(self):
+        """Inicia sesión; devuelve las cookies de la sesión (nombre -> valor) o None si falla"""
+        try:
+            response = self.session.get(self.login_url, timeout=self.timeout)
+            response.raise_for_status()
+            form = parse_login_form(response.text, response.url, self.user_fields)
+            if form is None:
+                logger.error(f"No se encontró el formulario de login en {self.login_url}")
+                return None
+
+            headers = {'Referer': response.url}
+            if form.csrf_token:
+                headers['X-CSRF-Token'] = form.csrf_token
+            payload = form.payload(self.username, self.password)
+            if form.method == 'post':
+                response = self.session.post(form.action, data=payload, headers=headers, timeout=self.timeout)
+            else:
+                response = self.session.get(form.action, params=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.error(f"Error durante el login en {self.login_url}: {e}")
+            return None
+
+        # Si la respuesta vuelve a pedir la contraseña, las credenciales no se aceptaron
+        if response.status_code >= 400 or parse_login_form(response.text, response.url, self.user_fields):
+            logger.error(f"Login rechazado en {self.login_url} ({response.status_code})")
+            return None
+        logger.info(f"✓ Sesión iniciada por HTTP en {self.login_url}")
+        return requests.utils.dict_from_cookiejar(self.session.cookies)
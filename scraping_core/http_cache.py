@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Caché HTTP persistente en disco con revalidación condicional
+
+Cada respuesta se guarda por URL normalizada (cuerpo + ETag + Last-Modified).
+Mientras la entrada es más joven que el TTL se sirve directamente desde disco;
+después se revalida con If-None-Match / If-Modified-Since y un 304 reutiliza
+el cuerpo guardado. En modo offline nunca se accede a la red.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .urls import DEFAULT_PORTS
+
+logger = logging.getLogger(__name__)
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """URL pedida en modo offline que no está en la caché"""
+
+
+def normalize_url(url):
+    """Normaliza una URL para usarla como clave de caché"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+class HttpCache:
+    def __init__(self, cache_dir='.http_cache', ttl=12 * 3600, max_size_mb=500, offline=False):
+        """
+        Args:
+            cache_dir: Carpeta donde se guardan las respuestas
+            ttl: Segundos durante los que una entrada se sirve sin revalidar
+            max_size_mb: Tamaño máximo de la caché; se eliminan las menos usadas
+            offline: Si True, solo se sirven respuestas guardadas (sin red)
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size_mb * 1024 * 1024
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_size = sum(entry['size'] for entry in self._scan())
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _paths(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + '.json', base + '.body'
+
+    def _scan(self):
+        """Lista las entradas guardadas con su tamaño y último acceso"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            body_path = meta_path[:-len('.json')] + '.body'
+            try:
+                size = os.path.getsize(body_path)
+                last_access = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            entries.append({'meta': meta_path, 'body': body_path, 'size': size, 'last_access': last_access})
+        return entries
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _touch(self, key, meta=None):
+        """Marca la entrada como usada (LRU) y opcionalmente reescribe sus metadatos"""
+        meta_path, _ = self._paths(key)
+        try:
+            if meta is not None:
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+            else:
+                os.utime(meta_path)
+        except OSError:
+            pass
+
+    def _store(self, key, response):
+        meta_path, body_path = self._paths(key)
+        body = response.content
+        meta = {
+            'url': key,
+            'stored_at': time.time(),
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+            'content_type': response.headers.get('Content-Type', ''),
+        }
+        with self._lock:
+            try:
+                old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+                with open(body_path, 'wb') as f:
+                    f.write(body)
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar en caché {key}: {e}")
+                return
+            self._total_size += len(body) - old_size
+            if self._total_size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo el límite"""
+        entries = sorted(self._scan(), key=lambda entry: entry['last_access'])
+        self._total_size = sum(entry['size'] for entry in entries)
+        for entry in entries:
+            if self._total_size <= self.max_size:
+                break
+            for path in (entry['meta'], entry['body']):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_size -= entry['size']
+
+    def _build_response(self, url, meta, body):
+        """Crea un requests.Response a partir de una entrada de la caché"""
+        response = requests.Response()
+        response._content = body
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict({'Content-Type': meta.get('content_type', '')})
+        if meta.get('etag'):
+            response.headers['ETag'] = meta['etag']
+        if meta.get('last_modified'):
+            response.headers['Last-Modified'] = meta['last_modified']
+        return response
+
+    def get(self, session, url, **kwargs):
+        """GET con caché: devuelve un requests.Response (de red o de disco)"""
+        return self.handle(url, session.get, **kwargs)
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: sirve desde disco o delega en call_next y guarda
+
+        kwargs['max_age'] sustituye al TTL para esta petición (0 = revalidar siempre).
+        """
+        max_age = kwargs.pop('max_age', None)
+        ttl = self.ttl if max_age is None else max_age
+        key = normalize_url(url)
+        meta, body = self._load(key)
+
+        if meta is not None:
+            fresh = time.time() - meta.get('stored_at', 0) < ttl
+            if fresh or self.offline:
+                self._count('hits')
+                self._touch(key)
+                return self._build_response(url, meta, body)
+
+        if self.offline:
+            self._count('misses')
+            raise OfflineCacheMiss(f"Modo offline: {url} no está en la caché")
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = call_next(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and meta is not None:
+            self._count('revalidated')
+            meta['stored_at'] = time.time()
+            self._touch(key, meta)
+            return self._build_response(url, meta, body)
+
+        self._count('misses')
+        if response.status_code == 200:
+            self._store(key, response)
+        return response
+
+    def summary(self):
+        """Resumen legible de la actividad de la caché"""
+        return (f"caché: {self.stats['hits']} aciertos, {self.stats['revalidated']} revalidadas (304), "
+                f"{self.stats['misses']} descargas, {self._total_size / 1024 / 1024:.1f} MB en disco")
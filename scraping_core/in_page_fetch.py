@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Descarga de páginas con fetch() dentro del navegador con la sesión iniciada
+
+Abrir cada página en una pestaña (window.open, cambiar de ventana, esperar
+la carga, leer page_source, cerrar y volver) cuesta media docena de viajes
+de ida y vuelta al WebDriver por página. fetch_in_page ejecuta un solo
+execute_async_script en la página ya abierta: el navegador descarga con
+fetch() el lote de URLs (concurrency a la vez, con las cookies de la
+sesión) y devuelve de una vez, en el orden de las URLs, el HTML de cada
+página o, si se indican los nombres de los campos, solo los controles de
+formulario que interesan, ya extraídos con DOMParser.
+
+Cada resultado es un diccionario con:
+
+    url         URL pedida
+    final_url   URL tras las redirecciones
+    status      Código HTTP (0 si la petición falló)
+    ms          Milisegundos hasta las cabeceras de la respuesta
+    html        HTML de la página (sin fields)
+    controls    Con fields: lista de {name, tag, value, selected} en el orden
+                del documento; value se calcula como en BeautifulSoup (atributo
+                value o texto) y selected es el texto de la opción marcada de
+                los select (None si no hay)
+    matched     Con check_selector: si el documento tiene algún elemento que
+                encaja con cada uno de los selectores (por ejemplo los campos
+                del formulario de login)
+    error       Mensaje si la petición falló
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_FETCH_JS = r"""
+var urls = arguments[0], limit = arguments[1], fields = arguments[2], checkSelectors = arguments[3],
+    timeoutMs = arguments[4], done = arguments[arguments.length - 1];
+var wanted = fields ? new Set(fields) : null, results = new Array(urls.length), next = 0;
+
+function text(element) {
+    // Como get_text(strip=True): textos de los nodos recortados y unidos sin separador
+    var walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT), parts = [], node;
+    while ((node = walker.nextNode())) {
+        var part = node.nodeValue.trim();
+        if (part) parts.push(part);
+    }
+    return parts.join('');
+}
+
+function controls(doc) {
+    var found = [];
+    doc.querySelectorAll('input, select, textarea').forEach(function (element) {
+        var name = element.getAttribute('name') || '';
+        if (!wanted.has(name)) return;
+        var tag = element.tagName.toLowerCase(), selected = null;
+        if (tag === 'select') {
+            var option = element.querySelector('option[selected]');
+            selected = option ? text(option) : null;
+        }
+        found.push({name: name, tag: tag, value: element.getAttribute('value') || text(element), selected: selected});
+    });
+    return found;
+}
+
+async function load(url) {
+    var controller = new AbortController(), timer = setTimeout(function () { controller.abort(); }, timeoutMs);
+    var start = performance.now();
+    try {
+        var response = await fetch(url, {credentials: 'same-origin', signal: controller.signal});
+        var result = {url: url, final_url: response.url, status: response.status,
+                      ms: Math.round(performance.now() - start)};
+        var html = await response.text();
+        if (!wanted && !checkSelectors) {
+            result.html = html;
+            return result;
+        }
+        var doc = new DOMParser().parseFromString(html, 'text/html');
+        if (wanted) result.controls = controls(doc); else result.html = html;
+        if (checkSelectors) result.matched = checkSelectors.every(function (selector) {
+            return doc.querySelector(selector) !== null;
+        });
+        return result;
+    } catch (e) {
+        return {url: url, status: 0, ms: Math.round(performance.now() - start), error: String(e)};
+    } finally {
+        clearTimeout(timer);
+    }
+}
+
+async function worker() {
+    while (next < urls.length) {
+        var i = next++;
+        results[i] = await load(urls[i]);
+    }
+}
+
+var workers = [];
+for (var w = 0; w < Math.min(limit, urls.length); w++) workers.push(worker());
+Promise.all(workers).then(function () { done(results); }, function (e) { done({error: String(e)}); });
+"""
+
+
+def fetch_in_page(driver, urls, concurrency=4, fields=None, check_selector=None, timeout=30, rate_limiter=None):
+    """
+    Descarga urls con fetch() en la página abierta en driver, en un solo execute_async_script
+
+    Args:
+        urls: URLs del lote (del mismo origen que la página abierta, para que lleven la sesión)
+        concurrency: Peticiones simultáneas dentro del navegador
+        fields: Nombres de los controles de formulario a extraer; None devuelve el HTML
+        check_selector: Selector CSS, o tupla de selectores que deben encajar todos, que se
+            busca en cada documento (resultado en 'matched')
+        timeout: Segundos máximos de cada petición
+        rate_limiter: AdaptiveRateLimiter: se pide turno para cada URL antes del lote y se
+            registra el resultado de cada una
+
+    Returns:
+        Lista de diccionarios (ver el docstring del módulo) en el orden de urls
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    if rate_limiter is not None:
+        for url in urls:
+            rate_limiter.acquire(url)
+    if isinstance(check_selector, str):
+        check_selector = [check_selector]
+    # El lote entero tiene que caber en el timeout de scripts del driver
+    rounds = -(-len(urls) // max(1, concurrency))
+    driver.set_script_timeout(timeout * rounds + 10)
+    results = driver.execute_async_script(_FETCH_JS, urls, max(1, concurrency),
+                                          list(fields) if fields is not None else None,
+                                          list(check_selector) if check_selector else None,
+                                          int(timeout * 1000))
+    if isinstance(results, dict):
+        raise RuntimeError(f"fetch() en el navegador falló: {results.get('error')}")
+    if rate_limiter is not None:
+        for result in results:
+            if result.get('error'):
+                rate_limiter.record(result['url'], failed=True)
+            else:
+                rate_limiter.record(result['url'], status_code=result['status'], latency=result['ms'] / 1000)
+    failed = sum(1 for result in results if result.get('error'))
+    if failed:
+        logger.warning(f"{failed} de {len(urls)} descargas con fetch() fallaron en el navegador")
+    return results
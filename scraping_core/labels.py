@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Asignación de etiquetas a campos a partir de una tabla de reglas
+
+Las fichas de empresa (einforma, nlocal, perfiles de GeneraWeb) son listas
+de pares etiqueta/valor que se volcaban en el diccionario de salida con
+largas cadenas if/elif de comparaciones de texto, compilando las
+expresiones regulares en cada llamada. LabelMapper recibe la tabla de
+reglas de cada fuente y resuelve cada etiqueta con un diccionario: las
+etiquetas exactas de la tabla se resuelven al crearlo y las demás (las que
+se buscan por contenido) se prueban contra las reglas en su orden, como el
+if/elif, una sola vez por etiqueta distinta. Los post-procesados con
+expresiones regulares se compilan al definir la regla.
+"""
+
+import re
+
+
+_GROUP_REF_RE = re.compile(r'\\(\d+)')
+_UNRESOLVED = object()
+
+
+def regex_value(pattern, template=r'\1', flags=0):
+    """Post-procesado: template (con referencias \\1, \\2...) rellenado con la primera coincidencia
+    de pattern, o el valor tal cual si no la hay"""
+    compiled = re.compile(pattern, flags)
+    # La plantilla se traduce una vez a formato de str.format: Match.expand la vuelve a analizar en cada llamada
+    fmt = _GROUP_REF_RE.sub(r'{\1}', template.replace('{', '{{').replace('}', '}}'))
+
+    def post(value):
+        match = compiled.search(value)
+        # Como Match.expand, un grupo opcional que no participa se sustituye por ''
+        return fmt.format(match.group(0), *(group or '' for group in match.groups())) if match else value
+    return post
+
+
+def regex_remove(pattern, flags=0):
+    """Post-procesado: quita del valor las coincidencias de pattern"""
+    compiled = re.compile(pattern, flags)
+    return lambda value: compiled.sub('', value)
+
+
+class LabelRule:
+    def __init__(self, field, label=None, contains=None, post=None, read=None):
+        """
+        Args:
+            field: Clave del campo en el diccionario de salida
+            label: Etiqueta exacta
+            contains: En lugar de label, texto o tupla de textos que la etiqueta debe contener
+            post: Función post(valor) aplicada al valor; si devuelve None el campo no se modifica
+            read: Función read(elemento, valor) para las filas en las que el texto de la
+                celda no basta (enlaces, selects...); si devuelve None el campo no se modifica
+        """
+        if (label is None) == (contains is None):
+            raise ValueError(f"La regla de {field} necesita label o contains")
+        self.field = field
+        self.label = label
+        self.contains = (contains,) if isinstance(contains, str) else contains
+        self.post = post
+        self.read = read
+
+    def matches(self, label):
+        if self.label is not None:
+            return label == self.label
+        return all(text in label for text in self.contains)
+
+
+class LabelMapper:
+    # Etiquetas distintas que se memorizan (las páginas traen siempre las mismas)
+    MAX_RESOLVED = 4096
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules: Lista de LabelRule; si varias encajan con una etiqueta gana la primera
+        """
+        self.rules = list(rules)
+        self._resolved = {}
+        for rule in self.rules:
+            known = rule.label if rule.label is not None else (rule.contains[0] if len(rule.contains) == 1 else None)
+            if known is not None and known not in self._resolved:
+                self._resolved[known] = self._scan(known)
+
+    def _scan(self, label):
+        for rule in self.rules:
+            if rule.matches(label):
+                return rule
+        return None
+
+    def resolve(self, label):
+        """Regla que se aplica a la etiqueta, o None si no se mapea"""
+        try:
+            return self._resolved[label]
+        except KeyError:
+            rule = self._scan(label)
+            if len(self._resolved) < self.MAX_RESOLVED:
+                self._resolved[label] = rule
+            return rule
+
+    def assign(self, data, label, value, element=None):
+        """Guarda value en el campo de la etiqueta; devuelve la regla aplicada o None"""
+        rule = self._resolved.get(label, _UNRESOLVED)
+        if rule is _UNRESOLVED:
+            rule = self.resolve(label)
+        if rule is None:
+            return None
+        if rule.read is not None:
+            value = rule.read(element, value)
+        if value is not None and rule.post is not None:
+            value = rule.post(value)
+        if value is not None:
+            data[rule.field] = value
+        return rule
+
+    def map(self, pairs, data=None):
+        """Vuelca pares (etiqueta, valor) o (etiqueta, valor, elemento) en data (o en un diccionario nuevo)"""
+        data = {} if data is None else data
+        for pair in pairs:
+            self.assign(data, *pair)
+        return data
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluación de muchos selectores CSS en un solo recorrido del árbol
+
+Las fichas de producto prueban decenas de selectores alternativos (galería,
+descripción, especificaciones...) y con select()/select_one() cada uno vuelve
+a recorrer el documento entero. SelectorSet registra todos los candidatos de
+antemano y los resuelve en una única pasada por el árbol lxml: cada elemento
+se compara solo con los pasos que pueden aplicarle (por id, clase, etiqueta o
+atributo) y los ancestros abiertos se llevan como contadores, sin volver a
+subir por el árbol.
+
+Subconjunto de CSS admitido: etiqueta o *, .clase, #id, [attr], [attr=v],
+[attr^=v], [attr$=v], [attr*=v], [attr~=v] (con el modificador ' i' para
+ignorar mayúsculas), el combinador descendiente (espacio) y listas separadas
+por comas, que se unen en orden del documento como en CSS.
+"""
+
+import re
+
+from lxml import etree
+
+_COMPOUND_RE = re.compile(r'^(?P<tag>[\w-]+|\*)?(?P<rest>.*)$')
+_PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+# Compuestos separados por espacios y alternativas por comas, salvo dentro de [...]
+_COMPOUND_SPLIT_RE = re.compile(r'(?:[^\s\[]|\[[^\]]*\])+')
+_LIST_SPLIT_RE = re.compile(r',(?![^\[]*\])')
+_ATTR_RE = re.compile(r'^\s*(?P<name>[\w-]+)\s*(?:(?P<op>[~^$*]?=)\s*'
+                      r'(?P<value>"[^"]*"|\'[^\']*\'|[^\s\]]+)(?P<flag>\s+[iI])?)?\s*$')
+
+
+def _attr_test(expression):
+    match = _ATTR_RE.match(expression)
+    if not match:
+        raise ValueError(f"Condición de atributo no válida: [{expression}]")
+    name, op, value, flag = match.group('name', 'op', 'value', 'flag')
+    name = name.lower()
+    if not op:
+        return lambda element: element.get(name) is not None
+    value = value.strip('\'"')
+    if flag:
+        value = value.lower()
+    compare = {
+        '=': lambda actual: actual == value,
+        '^=': lambda actual: bool(value) and actual.startswith(value),
+        '$=': lambda actual: bool(value) and actual.endswith(value),
+        '*=': lambda actual: bool(value) and value in actual,
+        '~=': lambda actual: value in actual.split(),
+    }[op]
+
+    def test(element):
+        actual = element.get(name)
+        if actual is None:
+            return False
+        return compare(actual.lower() if flag else actual)
+    return test
+
+
+def _compile_compound(compound):
+    """(clave de índice, comprobaciones) de un selector compuesto sin combinadores
+
+    La clave es la condición más selectiva que se puede buscar directamente
+    en un elemento: su id, una de sus clases, su etiqueta o un atributo que
+    debe tener. Solo los pasos sin ninguna de ellas se prueban en todos.
+    """
+    match = _COMPOUND_RE.match(compound)
+    tag, rest = match.group('tag'), match.group('rest')
+    tests, keys = [], []
+    position = 0
+    for part in _PART_RE.finditer(rest):
+        if part.start() != position:
+            raise ValueError(f"Selector no válido: {compound}")
+        position = part.end()
+        if part.group('cls'):
+            cls = part.group('cls')
+            keys.append((1, ('class', cls)))
+            tests.append(lambda element, cls=cls: cls in (element.get('class') or '').split())
+        elif part.group('id'):
+            element_id = part.group('id')
+            keys.append((0, ('id', element_id)))
+            tests.append(lambda element, element_id=element_id: element.get('id') == element_id)
+        else:
+            tests.append(_attr_test(part.group('attr')))
+            keys.append((3, ('attr', _ATTR_RE.match(part.group('attr')).group('name').lower())))
+    if position != len(rest) or (not tag and not tests):
+        raise ValueError(f"Selector no válido: {compound}")
+    if tag not in (None, '*'):
+        keys.append((2, ('tag', tag.lower())))
+    return (min(keys)[1] if keys else None), tests
+
+
+class _Chain:
+    """Un selector sin comas: pasos unidos por el combinador descendiente"""
+
+    def __init__(self, selector, index, slot):
+        self.steps = [_compile_compound(compound) for compound in _COMPOUND_SPLIT_RE.findall(selector)]
+        self.index = index
+        self.slot = slot
+
+
+class SelectorMatches:
+    def __init__(self, groups, selectors, stats=None):
+        # grupo -> lista (en orden de prioridad) de listas de elementos
+        self._groups = groups
+        self._selectors = selectors
+        self._stats = stats
+        self._recorded = set()
+
+    def used(self, name, index):
+        """Anota en las estadísticas que el grupo se resolvió con su selector index
+
+        Los selectores anteriores cuentan como fallos. all() y first() lo hacen
+        solos; quien recorre candidates() lo llama con el que acabó usando.
+        """
+        if self._stats is None or name in self._recorded:
+            return
+        self._recorded.add(name)
+        for selector in self._selectors[name][:index]:
+            self._stats.record(name, selector, False)
+        self._stats.record(name, self._selectors[name][index], True)
+
+    def candidates(self, name):
+        """Resultados de cada selector del grupo, en orden de prioridad (listas vacías incluidas)"""
+        return self._groups[name]
+
+    def all(self, name):
+        """Elementos del primer selector del grupo que encontró algo (equivale a select())"""
+        for index, elements in enumerate(self._groups[name]):
+            if elements:
+                self.used(name, index)
+                return elements
+        return []
+
+    def first(self, name):
+        """Primer elemento del primer selector del grupo que encontró algo (equivale a select_one())"""
+        elements = self.all(name)
+        return elements[0] if elements else None
+
+
+class SelectorSet:
+    def __init__(self, groups):
+        """
+        Args:
+            groups: Diccionario nombre -> lista de selectores CSS alternativos, de más
+                a menos prioritario (o un único selector)
+        """
+        self.groups = {name: [selectors] if isinstance(selectors, str) else list(selectors)
+                       for name, selectors in groups.items()}
+        self._compiled = None
+
+    def compile(self):
+        """Indexa los pasos de todos los selectores por id, clase, etiqueta o atributo (una vez por conjunto)"""
+        if self._compiled is None:
+            chains, slots = [], {}
+            for name, selectors in self.groups.items():
+                for index, selector in enumerate(selectors):
+                    for alternative in _LIST_SPLIT_RE.split(selector):
+                        chains.append(_Chain(alternative.strip(), len(chains), (name, index)))
+                    slots[(name, index)] = None
+            index = {}
+            for chain in chains:
+                for level, (key, _) in enumerate(chain.steps):
+                    index.setdefault(key, []).append((chain, level))
+            self._compiled = (chains, index, list(slots))
+        return self._compiled
+
+    def match(self, root, stats=None):
+        """Resuelve todos los selectores recorriendo una sola vez el árbol lxml de root
+
+        Con stats (SelectorStats.for_site) se anota en cada grupo consultado qué
+        selector se usó (acierto) y cuáles de más prioridad no sirvieron
+        (fallos). Aquí no se reordenan: todos se evalúan en el mismo recorrido,
+        así que el orden no cambia el coste y se conserva la prioridad declarada.
+        """
+        chains, index, slots = self.compile()
+        # Ancestros abiertos que cumplen cada paso intermedio de cada cadena
+        open_steps = [[0] * (len(chain.steps) - 1) for chain in chains]
+        universal = index.get(None, [])
+        found = {slot: [] for slot in slots}
+        seen = {slot: set() for slot in slots}
+        pushed = []
+
+        for event, element in etree.iterwalk(root, events=('start', 'end')):
+            if not isinstance(element.tag, str):
+                continue
+            if event == 'end':
+                for counts, level in pushed.pop():
+                    counts[level] -= 1
+                continue
+            opened = []
+            keys = [('tag', element.tag)] + [('attr', name) for name in element.keys()]
+            if element.get('id'):
+                keys.append(('id', element.get('id')))
+            keys.extend(('class', cls) for cls in set((element.get('class') or '').split()))
+            for entries in [index[key] for key in keys if key in index] + [universal]:
+                for chain, level in entries:
+                    counts = open_steps[chain.index]
+                    if level and not counts[level - 1]:
+                        continue
+                    _, tests = chain.steps[level]
+                    if not all(test(element) for test in tests):
+                        continue
+                    if level == len(chain.steps) - 1:
+                        # Con listas de selectores un elemento puede cumplir varias alternativas
+                        if element not in seen[chain.slot]:
+                            seen[chain.slot].add(element)
+                            found[chain.slot].append(element)
+                    else:
+                        opened.append((counts, level))
+            # Se suman después de comprobar todos los pasos: un elemento no es ancestro de sí mismo
+            for counts, level in opened:
+                counts[level] += 1
+            pushed.append(opened)
+
+        groups = {name: [found[(name, index)] for index in range(len(selectors))]
+                  for name, selectors in self.groups.items()}
+        return SelectorMatches(groups, self.groups, stats)
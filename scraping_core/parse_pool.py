@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Etapa de parseo en un pool de procesos, separada de la descarga
+
+Con la descarga ya concurrente, el cuello de botella pasa a ser el parseo:
+BeautifulSoup y lxml son CPU pura y, ejecutados en el event loop o en los
+hilos de descarga, se reparten un único núcleo por el GIL. ParsePool envía
+el HTML ya decodificado a un ProcessPoolExecutor y devuelve un futuro, de
+modo que mientras una página se parsea en otro núcleo el proceso principal
+sigue descargando la siguiente.
+
+Cada proceso crea una sola vez el objeto que tiene los extractores (el
+propio scraper, sin caché ni sesión útiles) con la factory indicada y los
+extractores se llaman por nombre de método. Si el objeto define
+worker_state(), lo que devuelva tras cada tarea (p. ej. los contadores de
+selectores acumulados) se entrega en el proceso principal a on_state.
+
+La factory y los argumentos deben poder serializarse con pickle: una clase
+del módulo (también del script principal) o un functools.partial sobre ella.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Objeto con los extractores en cada proceso del pool
+_worker = None
+
+
+def _init_worker(factory):
+    global _worker
+    _worker = factory()
+
+
+def _call(method, args):
+    start = time.process_time()
+    result = getattr(_worker, method)(*args)
+    worker_state = getattr(_worker, 'worker_state', None)
+    return result, (worker_state() if worker_state else None), time.process_time() - start
+
+
+class ParsePool:
+    def __init__(self, factory, max_workers=None, on_state=None):
+        """
+        Args:
+            factory: Callable sin argumentos que crea en cada proceso el objeto con los extractores
+            max_workers: Procesos del pool (None = un proceso por núcleo)
+            on_state: Función que recibe, en el proceso principal, el worker_state() de cada tarea
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.on_state = on_state
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                             initargs=(factory,))
+        self.stats = {'tasks': 0, 'errors': 0, 'cpu_seconds': 0.0}
+
+    def _done(self, inner, outer):
+        try:
+            result, state, cpu_seconds = inner.result()
+        except BaseException as e:
+            self.stats['errors'] += 1
+            outer.set_exception(e)
+            return
+        self.stats['tasks'] += 1
+        self.stats['cpu_seconds'] += cpu_seconds
+        if state is not None and self.on_state is not None:
+            self.on_state(state)
+        outer.set_result(result)
+
+    def submit(self, method, *args):
+        """Parsea en el pool con getattr(objeto, method)(*args); devuelve un concurrent.futures.Future"""
+        outer = Future()
+        inner = self._executor.submit(_call, method, args)
+        inner.add_done_callback(lambda inner: self._done(inner, outer))
+        return outer
+
+    async def run(self, method, *args):
+        """Versión awaitable de submit: el event loop sigue libre mientras se parsea"""
+        return await asyncio.wrap_future(self.submit(method, *args))
+
+    def summary(self):
+        """Resumen de páginas parseadas fuera del proceso principal"""
+        return (f"parseo: {self.stats['tasks']} páginas en {self.max_workers} procesos, "
+                f"{self.stats['cpu_seconds']:.1f}s de CPU fuera del proceso principal, "
+                f"{self.stats['errors']} errores")
+
+    def close(self):
+        """Espera a las tareas pendientes y termina los procesos"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
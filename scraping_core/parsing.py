@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Construcción de árboles BeautifulSoup con un backend de parseo configurable
+
+Por defecto se usa lxml, bastante más rápido que html.parser, y html.parser si
+lxml no está instalado. Con parse_only=SoupStrainer(...) solo se crean los
+subárboles que necesita el extractor (el bloque de productos, los enlaces de
+categorías...): el resto del documento se recorre pero no se convierte en
+objetos Tag, lo que reduce el tiempo y sobre todo la memoria por página.
+
+Cuando varios extractores leen la misma página, ParsedPage la parsea una sola
+vez y memoriza las búsquedas de los contenedores comunes. Los extractores que
+usan esquemas XPath (schema.py) leen en su lugar page.tree, un árbol lxml del
+documento completo; cada árbol se construye solo si algún extractor lo pide.
+"""
+
+import re
+from functools import partial
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_BACKEND = 'lxml'
+except ImportError:
+    DEFAULT_BACKEND = 'html.parser'
+
+_backend = DEFAULT_BACKEND
+
+# lxml no admite la declaración XML en cadenas ya decodificadas
+_XML_DECLARATION_RE = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+def set_parser_backend(name):
+    """Cambia el backend de make_soup ('lxml', 'html.parser', 'html5lib'...)"""
+    global _backend
+    if builder_registry.lookup(name) is None:
+        raise ValueError(f"Backend de parseo no disponible: {name}")
+    _backend = name
+
+
+def get_parser_backend():
+    return _backend
+
+
+def make_soup(html_content, parse_only=None, backend=None):
+    """BeautifulSoup con el backend configurado, opcionalmente limitado a un SoupStrainer"""
+    return BeautifulSoup(html_content, backend or _backend, parse_only=parse_only)
+
+
+def _has_class(name, value):
+    return value is not None and name in value.split()
+
+
+def _startswith(prefixes, value):
+    return value is not None and value.startswith(prefixes)
+
+
+def _contains(fragment, value):
+    return value is not None and fragment in value
+
+
+# Los filtros son partial y no lambdas para poder guardarlos como atributos de
+# clase de los scrapers sin que Python los convierta en métodos.
+
+def parse_tree(html_content):
+    """Árbol lxml (etree) del documento completo"""
+    from lxml import etree
+    return etree.fromstring(_XML_DECLARATION_RE.sub('', html_content, count=1), etree.HTMLParser())
+
+
+def has_class(name):
+    """Filtro de SoupStrainer para un atributo class que contiene name
+
+    Al parsear, SoupStrainer recibe el atributo class como una sola cadena
+    ("category_list clearfix"), no como lista: class_='category_list' no
+    encontraría ese elemento.
+    """
+    return partial(_has_class, name)
+
+
+def id_startswith(*prefixes):
+    """Filtro de atributo id que empieza por alguno de los prefijos"""
+    return partial(_startswith, prefixes)
+
+
+def href_contains(fragment):
+    """Filtro de atributo href que contiene fragment"""
+    return partial(_contains, fragment)
+
+
+class ParsedPage:
+    def __init__(self, html_content, parse_only=None, backend=None):
+        """Página parseada una sola vez y compartida por todos sus extractores
+
+        Las búsquedas de find, find_all, select y select_one se memorizan por
+        sus argumentos. Los filtros (id_startswith, href_contains...) deben
+        ser objetos reutilizados, p. ej. constantes de clase, para que dos
+        extractores compartan la misma búsqueda.
+
+        Args:
+            html_content: HTML de la página
+            parse_only: SoupStrainer para construir solo parte del documento (None = completo)
+            backend: Backend de parseo (por defecto el de set_parser_backend)
+        """
+        self.html = html_content
+        self.parse_only = parse_only
+        self.backend = backend
+        self._soup = None
+        self._tree = None
+        self._lookups = {}
+
+    @property
+    def soup(self):
+        """Árbol BeautifulSoup (limitado a parse_only), construido al primer uso"""
+        if self._soup is None:
+            self._soup = make_soup(self.html, self.parse_only, self.backend)
+        return self._soup
+
+    @property
+    def tree(self):
+        """Árbol lxml del documento completo para los esquemas XPath, construido al primer uso"""
+        if self._tree is None:
+            self._tree = parse_tree(self.html)
+        return self._tree
+
+    @classmethod
+    def of(cls, page_or_html, parse_only=None):
+        """Reutiliza una ParsedPage o parsea el HTML limitado a parse_only"""
+        if isinstance(page_or_html, cls):
+            return page_or_html
+        return cls(page_or_html, parse_only)
+
+    def with_scope(self, parse_only=None):
+        """La propia página si tiene el documento completo; si no, otro parseo con parse_only"""
+        if self.parse_only is None:
+            return self
+        key = ('with_scope', parse_only)
+        if key not in self._lookups:
+            self._lookups[key] = ParsedPage(self.html, parse_only)
+        return self._lookups[key]
+
+    def _memo(self, key, compute):
+        if key not in self._lookups:
+            self._lookups[key] = compute()
+        return self._lookups[key]
+
+    def find(self, name=None, **attrs):
+        key = ('find', name, tuple(sorted(attrs.items())))
+        return self._memo(key, lambda: self.soup.find(name, **attrs))
+
+    def find_all(self, name=None, **attrs):
+        key = ('find_all', name, tuple(sorted(attrs.items())))
+        return self._memo(key, lambda: self.soup.find_all(name, **attrs))
+
+    def select(self, selector):
+        return self._memo(('select', selector), lambda: self.soup.select(selector))
+
+    def select_one(self, selector):
+        return self._memo(('select_one', selector), lambda: self.soup.select_one(selector))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Limitador de peticiones adaptativo por host
+
+Cada host tiene un token bucket cuya tasa se ajusta al estilo AIMD: sube de
+forma aditiva mientras las respuestas llegan rápido y baja a la mitad ante un
+429/503, un error de red o un TTFB muy por encima de la media del host. Así se
+va tan rápido como tolera cada sitio en lugar de usar pausas fijas.
+
+Los scrapers con requests lo usan como middleware de Fetcher; los de Selenium
+llaman a navigate, que hace acquire/record alrededor de driver.get.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.exceptions import RequestException
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS = (429, 503)
+# Por debajo de este TTFB (segundos) no se considera que el host esté saturado
+SLOW_TTFB_FLOOR = 0.5
+
+
+def driver_ttfb(driver):
+    """TTFB (segundos) de la última navegación de un WebDriver según Navigation Timing"""
+    try:
+        ms = driver.execute_script(
+            "var t = window.performance.timing; return t.responseStart - t.requestStart;")
+    except Exception:
+        return None
+    return ms / 1000 if ms and ms > 0 else None
+
+
+class _HostBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.avg_latency = None
+        self.blocked_until = 0.0
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, initial_rate=2.0, min_rate=0.2, max_rate=20.0, burst=2,
+                 increase=0.25, decrease=0.5, latency_factor=2.0):
+        """
+        Args:
+            initial_rate: Peticiones por segundo con las que empieza cada host
+            min_rate: Tasa mínima a la que se puede reducir un host
+            max_rate: Tasa máxima a la que se puede subir un host
+            burst: Peticiones que se permiten seguidas sin esperar
+            increase: Incremento aditivo de la tasa tras una respuesta rápida
+            decrease: Factor multiplicativo de la tasa al detectar saturación
+            latency_factor: Un TTFB mayor que media * factor cuenta como saturación
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = _HostBucket(self.initial_rate, self.burst)
+        return self._buckets[host]
+
+    def set_max_rate(self, max_rate):
+        """Fija el tope de peticiones por segundo de cada host (también el de los hosts ya vistos)"""
+        with self._lock:
+            self.max_rate = max_rate
+            self.initial_rate = min(self.initial_rate, max_rate)
+            for bucket in self._buckets.values():
+                bucket.rate = min(bucket.rate, max_rate)
+
+    def reserve(self, url):
+        """Reserva un token del host de la URL y devuelve los segundos a esperar"""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            delay = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            return max(delay, bucket.blocked_until - now)
+
+    def acquire(self, url):
+        """Bloquea hasta que el host de la URL admita otra petición"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, status_code=None, latency=None, retry_after=None, failed=False):
+        """Ajusta la tasa del host según el resultado de una petición
+
+        Args:
+            status_code: Código HTTP (None si no se conoce, p. ej. en Selenium)
+            latency: Segundos hasta recibir la respuesta (TTFB)
+            retry_after: Valor de la cabecera Retry-After, si la hay
+            failed: True si la petición falló por un error de red
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            old_rate = bucket.rate
+            slow = (latency is not None and bucket.avg_latency is not None
+                    and latency > SLOW_TTFB_FLOOR
+                    and latency > bucket.avg_latency * self.latency_factor)
+
+            if failed or status_code in THROTTLE_STATUS or slow:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                if retry_after:
+                    try:
+                        bucket.blocked_until = time.monotonic() + float(retry_after)
+                    except ValueError:
+                        pass
+            elif status_code is None or status_code < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+            if latency is not None:
+                if bucket.avg_latency is None:
+                    bucket.avg_latency = latency
+                else:
+                    bucket.avg_latency = 0.8 * bucket.avg_latency + 0.2 * latency
+
+        if bucket.rate < old_rate:
+            logger.info(f"Reduciendo ritmo de {host}: {old_rate:.2f} → {bucket.rate:.2f} peticiones/s")
+
+    def navigate(self, driver, url):
+        """driver.get esperando turno en el limitador y registrando el TTFB de la página"""
+        self.acquire(url)
+        driver.get(url)
+        self.record(url, latency=driver_ttfb(driver))
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: espera turno y ajusta la tasa con el resultado"""
+        self.acquire(url)
+        try:
+            response = call_next(url, **kwargs)
+        except RequestException:
+            self.record(url, failed=True)
+            raise
+        # requests mide elapsed hasta recibir las cabeceras: es el TTFB
+        self.record(url, response.status_code, response.elapsed.total_seconds(),
+                    response.headers.get('Retry-After'))
+        return response
+
+    def summary(self):
+        """Tasa actual de cada host"""
+        with self._lock:
+            return 'ritmo: ' + ', '.join(f"{host}: {bucket.rate:.2f}/s" for host, bucket in self._buckets.items())
+
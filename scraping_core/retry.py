@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Reintentos con backoff exponencial, circuit breaker por host y lista de fallidos
+
+Cada tipo de error (timeout, error de conexión, 429/503, otros 5xx) tiene su
+propio número de intentos y su propio backoff exponencial con jitter. Los
+errores definitivos (404, 403, modo offline...) no se reintentan. Si un host
+acumula fallos seguidos, el circuit breaker detiene sus peticiones durante un
+tiempo en lugar de seguir golpeándolo. Las URLs que agotan los intentos se
+guardan en un fichero JSONL para que la siguiente ejecución las reintente.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from .http_cache import OfflineCacheMiss
+
+logger = logging.getLogger(__name__)
+
+# Intentos totales y backoff (segundos) por tipo de error
+DEFAULT_BACKOFF = {
+    'timeout': {'attempts': 4, 'base': 2.0, 'cap': 30.0},
+    'connection': {'attempts': 5, 'base': 1.0, 'cap': 30.0},
+    'throttled': {'attempts': 5, 'base': 5.0, 'cap': 120.0},
+    'server': {'attempts': 3, 'base': 1.0, 'cap': 15.0},
+}
+
+
+def classify_error(error):
+    """Tipo de error reintentable de una excepción de requests, o None si es definitivo"""
+    if isinstance(error, OfflineCacheMiss):
+        return None
+    if isinstance(error, requests.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.ConnectionError):
+        return 'connection'
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status in (429, 503):
+            return 'throttled'
+        if status >= 500:
+            return 'server'
+    return None
+
+
+def _retry_after(error):
+    """Segundos de Retry-After de la respuesta de un error HTTP, si los indica"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get('Retry-After', 0))
+    except ValueError:
+        return 0.0
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, cooldown=60.0):
+        """
+        Args:
+            failure_threshold: Fallos seguidos de un host que abren el circuito
+            cooldown: Segundos que se detienen las peticiones al host con el circuito abierto
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._open_until = {}
+
+    def wait(self, url):
+        """Bloquea mientras el circuito del host de la URL esté abierto"""
+        host = urlparse(url).netloc
+        with self._lock:
+            remaining = self._open_until.get(host, 0.0) - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def record_success(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            self._failures[host] = 0
+
+    def record_failure(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            if failures < self.failure_threshold:
+                self._failures[host] = failures
+                return
+            self._open_until[host] = time.monotonic() + self.cooldown
+            # Semiabierto: tras la pausa, un solo fallo más vuelve a abrirlo
+            self._failures[host] = self.failure_threshold - 1
+        logger.warning(f"Circuito abierto para {host}: pausa de {self.cooldown:.0f}s tras {failures} fallos seguidos")
+
+
+class DeadLetterQueue:
+    def __init__(self, path='dead_letters.jsonl'):
+        """
+        Args:
+            path: Fichero JSONL donde se guardan las URLs que fallaron definitivamente
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, url, error, **context):
+        """Añade una URL fallida junto con el error y datos para reintentarla"""
+        entry = {'url': url, 'error': error, 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+        entry.update(context)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._read())
+
+    def take(self, host=None):
+        """Saca de la lista (sin duplicados) las entradas de un host, o todas si host es None"""
+        with self._lock:
+            entries = self._read()
+            taken, kept, seen = [], [], set()
+            for entry in entries:
+                if host is None or urlparse(entry['url']).netloc == host:
+                    if entry['url'] not in seen:
+                        seen.add(entry['url'])
+                        taken.append(entry)
+                else:
+                    kept.append(entry)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                for entry in kept:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return taken
+
+    def summary(self):
+        pending = len(self)
+        return f"{pending} URLs fallidas en {self.path}" if pending else ''
+
+
+class RetryPolicy:
+    def __init__(self, backoff=None, breaker=None, dead_letters=None):
+        """
+        Args:
+            backoff: Intentos y backoff por tipo de error (por defecto DEFAULT_BACKOFF)
+            breaker: CircuitBreaker compartido por las peticiones (None para no usarlo)
+            dead_letters: DeadLetterQueue donde anotar las URLs que agotan los intentos
+        """
+        self.backoff = dict(DEFAULT_BACKOFF)
+        self.backoff.update(backoff or {})
+        self.breaker = breaker
+        self.dead_letters = dead_letters
+
+    def delay(self, error_class, attempt):
+        """Backoff exponencial con jitter completo para el intento dado (desde 1)"""
+        config = self.backoff[error_class]
+        return random.uniform(0, min(config['cap'], config['base'] * 2 ** (attempt - 1)))
+
+    def call(self, func, url, **context):
+        """Ejecuta func(url) reintentando los errores transitorios
+
+        func debe lanzar requests.RequestException ante fallo (p. ej. con
+        raise_for_status). Los kwargs de context se guardan en la lista de
+        fallidos si la URL agota los intentos.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker:
+                self.breaker.wait(url)
+            try:
+                result = func(url)
+            except requests.RequestException as e:
+                error_class = classify_error(e)
+                if error_class is None:
+                    raise
+                if self.breaker:
+                    self.breaker.record_failure(url)
+                if attempt >= self.backoff[error_class]['attempts']:
+                    logger.warning(f"{url} falló tras {attempt} intentos ({error_class}): {e}")
+                    if self.dead_letters is not None:
+                        self.dead_letters.add(url, error_class, **context)
+                    raise
+                wait = max(self.delay(error_class, attempt), _retry_after(e))
+                logger.info(f"Reintento {attempt}/{self.backoff[error_class]['attempts'] - 1} de {url} "
+                            f"en {wait:.1f}s ({error_class})")
+                time.sleep(wait)
+                continue
+            if self.breaker:
+                self.breaker.record_success(url)
+            return result
+
+    def handle(self, url, call_next, **kwargs):
+        """Middleware de Fetcher: reintenta call_next; kwargs['context'] va a la lista de fallidos"""
+        context = kwargs.pop('context', None) or {}
+
+        def attempt(attempt_url):
+            response = call_next(attempt_url, **kwargs)
+            response.raise_for_status()
+            return response
+
+        return self.call(attempt, url, **context)
+
+    def summary(self):
+        return self.dead_letters.summary() if self.dead_letters is not None else ''
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Esquemas declarativos de extracción compilados a XPath de lxml
+
+Cada sitio describe sus productos con un ItemSchema: qué elementos son
+productos y, para cada campo, una lista de selectores alternativos con el
+atributo a leer y un post-procesado. El esquema se compila una sola vez a
+expresiones etree.XPath y se evalúa sobre todos los productos de la página,
+sin recorrer el árbol desde Python como hacían las cadenas de find().
+
+Sintaxis de un selector (subconjunto de CSS):
+
+    h3 / a @href
+
+- Cada paso ('h3', 'p.price', 'div#id', '[class*=sku|code i]', '.' para el
+  propio elemento) elige el PRIMER descendiente que cumple el paso, igual
+  que una cadena de find() de BeautifulSoup. Los pasos se separan con ' / '.
+- Condiciones de atributo: [attr], [attr=v], [attr^=v], [attr*=v]; varios
+  valores separados por '|' son alternativas y el sufijo ' i' ignora
+  mayúsculas.
+- Al final, '@a|b' lee el primer atributo no vacío, '::tail' el texto que
+  sigue al elemento y, si no se indica nada, se toma el texto como
+  get_text(strip=True).
+
+Entre los selectores de un campo decide el primero cuyo elemento existe,
+aunque su valor quede vacío, como en los if/else de los extractores
+originales.
+"""
+
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+
+_STEP_RE = re.compile(r'^(?P<tag>[\w-]+|\*)?(?P<rest>.*)$')
+_PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[^\]]+)\]')
+_ATTR_RE = re.compile(r'^\s*(?P<name>[\w-]+)\s*(?:(?P<op>[*^]?=)\s*(?P<value>[^\]]*?)(?P<flag>\s+i)?)?\s*$')
+
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyz'
+
+# Texto visible: get_text de BeautifulSoup no incluye scripts, estilos ni plantillas
+_TEXT_XPATH = etree.XPath('descendant-or-self::text()[not(parent::script or parent::style or parent::template)]')
+
+
+def _literal(value):
+    if "'" not in value:
+        return f"'{value}'"
+    return 'concat(' + ', "\'", '.join(f"'{part}'" for part in value.split("'")) + ')'
+
+
+def _attr_condition(expression):
+    match = _ATTR_RE.match(expression)
+    if not match:
+        raise ValueError(f"Condición de atributo no válida: [{expression}]")
+    name, op, values, flag = match.group('name', 'op', 'value', 'flag')
+    if not op:
+        return f"@{name}"
+    attribute = f"@{name}"
+    if flag:
+        attribute = f"translate(@{name}, '{_UPPER}', '{_LOWER}')"
+    conditions = []
+    for value in values.strip('\'"').split('|'):
+        value = _literal(value.lower() if flag else value)
+        if op == '=':
+            conditions.append(f"{attribute}={value}")
+        elif op == '^=':
+            conditions.append(f"starts-with({attribute}, {value})")
+        else:
+            conditions.append(f"contains({attribute}, {value})")
+    return ' or '.join(conditions)
+
+
+def _compile_step(step):
+    """Un paso de selector como paso XPath sobre descendant:: (sin el [1])"""
+    if step == '.':
+        return 'self::*'
+    match = _STEP_RE.match(step)
+    tag, rest = match.group('tag') or '*', match.group('rest')
+    predicates = []
+    position = 0
+    for part in _PART_RE.finditer(rest):
+        if part.start() != position:
+            raise ValueError(f"Selector no válido: {step}")
+        position = part.end()
+        if part.group('cls'):
+            predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {part.group('cls')} ')")
+        elif part.group('id'):
+            predicates.append(f"@id={_literal(part.group('id'))}")
+        else:
+            predicates.append(_attr_condition(part.group('attr')))
+    if position != len(rest):
+        raise ValueError(f"Selector no válido: {step}")
+    return f"descendant::{tag}" + ''.join(f"[{predicate}]" for predicate in predicates)
+
+
+def compile_path(selector, first=True):
+    """Traduce los pasos de un selector a una expresión XPath
+
+    Con first=True cada paso se queda con su primer resultado; con
+    first=False el último paso devuelve todos (para localizar productos).
+    """
+    steps = [step.strip() for step in selector.split(' / ')]
+    compiled = []
+    for index, step in enumerate(steps):
+        xpath = _compile_step(step)
+        if step != '.' and (first or index < len(steps) - 1):
+            xpath += '[1]'
+        compiled.append(xpath)
+    return '/'.join(compiled)
+
+
+def element_text(element):
+    """Equivalente de get_text(strip=True) de BeautifulSoup para un elemento de lxml"""
+    return ''.join(text.strip() for text in _TEXT_XPATH(element))
+
+
+# Post-procesados habituales: reciben el valor y la URL base del sitio
+
+def absolute_url(value, base_url):
+    return urljoin(base_url, value)
+
+
+def detail_link(value, base_url):
+    """URL absoluta de un enlace, o vacío si es un ancla (#...)"""
+    return '' if value.startswith('#') else urljoin(base_url, value)
+
+
+def file_name(value, base_url):
+    """Nombre del fichero de una URL de imagen, sin parámetros"""
+    return value.split('/')[-1].split('?')[0]
+
+
+def non_empty(value, base_url):
+    """Descarta el valor si está vacío (el campo conserva lo que tuviera)"""
+    return value or None
+
+
+def truncate(length):
+    return lambda value, base_url: value[:length]
+
+
+class Field:
+    def __init__(self, name, selectors, post=None, unless=()):
+        """
+        Args:
+            name: Nombre del campo en el diccionario del producto
+            selectors: Selector o lista de selectores alternativos (ver el docstring del módulo)
+            post: Función post(valor, base_url); si devuelve None el campo no se modifica
+            unless: Campos que deben estar vacíos para evaluar este (p. ej. fallbacks)
+        """
+        self.name = name
+        self.selectors = [selectors] if isinstance(selectors, str) else list(selectors)
+        self.post = post
+        self.unless = tuple(unless)
+
+
+class _CompiledSelector:
+    def __init__(self, selector):
+        path, self.attributes, self.tail = selector, (), False
+        if ' @' in selector:
+            path, attributes = selector.rsplit(' @', 1)
+            self.attributes = tuple(attributes.split('|'))
+        elif selector.endswith('::tail'):
+            path, self.tail = selector[:-len('::tail')], True
+        self.xpath = etree.XPath(compile_path(path.strip()))
+
+    def evaluate(self, element):
+        """(encontrado, valor) del selector sobre un producto"""
+        found = self.xpath(element)
+        if not found:
+            return False, None
+        node = found[0]
+        if self.attributes:
+            for attribute in self.attributes:
+                value = node.get(attribute)
+                if value:
+                    return True, value
+            return True, None
+        if self.tail:
+            return True, node.tail.strip() if node.tail is not None else None
+        return True, element_text(node)
+
+
+class ItemSchema:
+    def __init__(self, items, fields, defaults=None):
+        """
+        Args:
+            items: Selector o lista de selectores alternativos de los productos; el
+                último paso devuelve todos los elementos. Gana el primero que encuentra
+                productos o cuyo contenedor (los pasos anteriores) existe.
+            fields: Lista de Field, que se evalúan en orden
+            defaults: Valores iniciales de cada producto (los campos sin valor quedan vacíos)
+        """
+        self.items = [items] if isinstance(items, str) else list(items)
+        self.fields = list(fields)
+        self.defaults = dict(defaults or {})
+        for field in self.fields:
+            self.defaults.setdefault(field.name, '')
+        self._compiled = None
+
+    def compile(self):
+        """Compila los selectores a XPath (una vez por esquema)"""
+        if self._compiled is None:
+            items = []
+            for selector in self.items:
+                steps = selector.split(' / ')
+                container = etree.XPath(compile_path(' / '.join(steps[:-1]))) if len(steps) > 1 else None
+                items.append((container, etree.XPath(compile_path(selector, first=False))))
+            fields = [(field, [_CompiledSelector(selector) for selector in field.selectors]) for field in self.fields]
+            self._compiled = (items, fields)
+        return self._compiled
+
+    def find_items(self, root, stats=None):
+        """Elementos de producto de la página según la primera alternativa que aplica
+
+        Con stats (SelectorStats.for_site) se cuentan los aciertos de cada
+        alternativa y se prueban primero las que ya han acertado en el sitio.
+        """
+        items, _ = self.compile()
+        candidates = list(zip(self.items, items))
+        if stats is not None:
+            candidates = stats.order('productos', candidates, key=lambda candidate: candidate[0])
+        for selector, (container, xpath) in candidates:
+            found = xpath(root)
+            hit = bool(found) or (container is not None and bool(container(root)))
+            if stats is not None:
+                stats.record('productos', selector, hit)
+            if hit:
+                return found
+        return []
+
+    def extract_item(self, element, base_url=''):
+        _, fields = self.compile()
+        item = dict(self.defaults)
+        for field, selectors in fields:
+            if any(item.get(name) for name in field.unless):
+                continue
+            for selector in selectors:
+                found, value = selector.evaluate(element)
+                if not found:
+                    continue
+                if value is not None and field.post is not None:
+                    value = field.post(value, base_url)
+                if value is not None:
+                    item[field.name] = value
+                break
+        return item
+
+    def extract(self, root, base_url='', stats=None):
+        """Diccionarios de todos los productos de un árbol lxml"""
+        return [self.extract_item(element, base_url) for element in self.find_items(root, stats)]
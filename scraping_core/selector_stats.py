@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Estadísticas de aciertos de los selectores alternativos, por sitio
+
+Las listas de selectores de reserva se prueban en orden fijo aunque en un
+sitio concreto acierte siempre el mismo. SelectorStats cuenta, para cada
+sitio y grupo de selectores, cuántas veces cada uno fue el que encontró algo
+(acierto) o se probó sin éxito (fallo), guarda los contadores en un JSON
+entre ejecuciones y reordena los candidatos para probar antes los que ya han
+acertado. El informe señala los selectores que nunca aciertan, candidatos a
+eliminarse de la lista.
+"""
+
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+
+class SelectorStats:
+    def __init__(self, state_file='.selector_stats.json'):
+        """
+        Args:
+            state_file: Fichero JSON con los contadores por sitio (None = solo en memoria)
+        """
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._stats = self._load()
+        # Contadores nuevos desde el último take_delta (para los procesos de parseo)
+        self._delta = {}
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self._stats, f, indent=2, ensure_ascii=False)
+
+    def for_site(self, base_url):
+        """Contadores de un sitio, para pasar a ItemSchema.extract o SelectorSet.match"""
+        return SiteSelectorStats(self, urlparse(base_url).netloc or base_url)
+
+    def _counters(self, site, group, selector):
+        return self._stats.setdefault(site, {}).setdefault(group, {}).setdefault(selector, {'hits': 0, 'misses': 0})
+
+    def record(self, site, group, selector, hit):
+        with self._lock:
+            self._counters(site, group, selector)['hits' if hit else 'misses'] += 1
+            counters = self._delta.setdefault(site, {}).setdefault(group, {}).setdefault(selector, {'hits': 0, 'misses': 0})
+            counters['hits' if hit else 'misses'] += 1
+
+    def take_delta(self):
+        """Contadores anotados desde la llamada anterior, que quedan a cero"""
+        with self._lock:
+            delta, self._delta = self._delta, {}
+        return delta
+
+    def merge(self, delta):
+        """Suma los contadores de otro proceso (el resultado de su take_delta)"""
+        with self._lock:
+            for site, groups in delta.items():
+                for group, selectors in groups.items():
+                    for selector, counts in selectors.items():
+                        counters = self._counters(site, group, selector)
+                        counters['hits'] += counts['hits']
+                        counters['misses'] += counts['misses']
+
+    def order(self, site, group, candidates, key=lambda candidate: candidate):
+        """Candidatos con los que ya han acertado en este sitio delante
+
+        Los que han acertado conservan su prioridad relativa: solo se adelantan
+        a los que nunca han encontrado nada, así que el resultado es el mismo
+        mientras esos sigan sin acertar.
+        """
+        with self._lock:
+            counters = self._stats.get(site, {}).get(group, {})
+            return sorted(candidates, key=lambda candidate: not counters.get(key(candidate), {}).get('hits'))
+
+    def report(self, site=None, candidates=None):
+        """Líneas de texto con los contadores de cada grupo y los selectores que nunca aciertan
+
+        Args:
+            site: URL del sitio (None = todos los sitios con contadores)
+            candidates: Diccionario grupo -> selectores, para incluir también los
+                que nunca se han llegado a probar
+        """
+        lines = []
+        with self._lock:
+            sites = [urlparse(site).netloc or site] if site else sorted(self._stats)
+            for site_name in sites:
+                groups = {group: dict(selectors) for group, selectors in self._stats.get(site_name, {}).items()}
+                for group, selectors in (candidates or {}).items():
+                    for selector in selectors:
+                        groups.setdefault(group, {}).setdefault(selector, {'hits': 0, 'misses': 0})
+                lines.append(f"Selectores de {site_name}:")
+                for group, selectors in groups.items():
+                    lines.append(f"  {group}:")
+                    for selector, counters in sorted(selectors.items(), key=lambda entry: -entry[1]['hits']):
+                        mark = '' if counters['hits'] else '  ← nunca acierta'
+                        lines.append(f"    {counters['hits']:6d} aciertos {counters['misses']:6d} fallos  {selector}{mark}")
+        return lines
+
+
+class SiteSelectorStats:
+    """Vista de SelectorStats limitada a un sitio"""
+
+    def __init__(self, stats, site):
+        self.stats = stats
+        self.site = site
+
+    def record(self, group, selector, hit):
+        self.stats.record(self.site, group, selector, hit)
+
+    def order(self, group, candidates, key=lambda candidate: candidate):
+        return self.stats.order(self.site, group, candidates, key)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Sesiones guardadas entre ejecuciones, por sitio
+
+Cada ejecución de los scrapers con login arrancaba Chrome e iniciaba sesión
+de nuevo (10 segundos o más), aunque la sesión de la ejecución anterior
+siguiera viva. SessionStore guarda en un JSON las cookies de cada sitio
+tras el login y, en la siguiente ejecución, comprueba con una sola petición
+HTTP (sin navegador) si siguen valiendo: si la respuesta no es el formulario
+de login se reutilizan, y solo si han caducado se vuelve a iniciar sesión.
+
+El fichero contiene cookies de sesión: se crea solo legible por el usuario
+y no debe subirse al repositorio.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import requests
+
+from .browser import DEFAULT_USER_AGENT, load_driver_cookies
+
+logger = logging.getLogger(__name__)
+
+_PASSWORD_INPUT_RE = re.compile(rb'<input[^>]+type\s*=\s*["\']?password', re.I)
+
+
+def shows_login_form(response):
+    """Comprobación por defecto: la sesión ha caducado si la página pide una contraseña"""
+    return response.status_code in (401, 403) or bool(_PASSWORD_INPUT_RE.search(response.content))
+
+
+def _as_cookie_list(cookies):
+    """Cookies como lista de diccionarios de Selenium (acepta también nombre -> valor)"""
+    if isinstance(cookies, dict):
+        return [{'name': name, 'value': value} for name, value in cookies.items()]
+    return [dict(cookie) for cookie in cookies]
+
+
+class SessionStore:
+    def __init__(self, state_file='.sessions.json', max_age=12 * 3600):
+        """
+        Args:
+            state_file: Fichero JSON con las cookies de cada sitio
+            max_age: Segundos tras los que una sesión guardada se descarta sin comprobarla
+        """
+        self.state_file = state_file
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._sessions = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        # Solo legible por el usuario: son credenciales de sesión
+        fd = os.open(self.state_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._sessions, f, indent=2, ensure_ascii=False)
+
+    def load(self, site):
+        """Cookies guardadas del sitio (lista de Selenium), o None si no hay o son demasiado antiguas"""
+        with self._lock:
+            session = self._sessions.get(site)
+        if not session or time.time() - session.get('saved', 0) > self.max_age:
+            return None
+        return session['cookies']
+
+    def save(self, site, cookies):
+        """Guarda las cookies del sitio (driver.get_cookies() o un diccionario nombre -> valor)"""
+        with self._lock:
+            self._sessions[site] = {'saved': time.time(), 'cookies': _as_cookie_list(cookies)}
+            self._save()
+
+    def forget(self, site):
+        with self._lock:
+            if self._sessions.pop(site, None) is not None:
+                self._save()
+
+    def valid_cookies(self, site, check_url, expired=shows_login_form, user_agent=DEFAULT_USER_AGENT,
+                      timeout=(5, 15)):
+        """
+        Cookies guardadas del sitio si siguen valiendo, o None
+
+        Args:
+            check_url: Página (ligera) que solo se ve con la sesión iniciada
+            expired: Función expired(response) que detecta que la sesión ya no vale
+            user_agent: User-Agent de la petición (algunas aplicaciones ligan la sesión a él)
+        """
+        cookies = self.load(site)
+        if not cookies:
+            return None
+        try:
+            response = requests.get(check_url, cookies={cookie['name']: cookie['value'] for cookie in cookies},
+                                    headers={'User-Agent': user_agent}, timeout=timeout)
+        except requests.RequestException as e:
+            logger.warning(f"No se pudo comprobar la sesión guardada de {site}: {e}")
+            return None
+        if expired(response):
+            logger.info(f"La sesión guardada de {site} ha caducado")
+            self.forget(site)
+            return None
+        return cookies
+
+    def driver_login(self, site, driver, check_url, login, expired=shows_login_form):
+        """
+        Deja el navegador con la sesión iniciada: reutiliza la guardada si sigue valiendo o llama a login()
+
+        Args:
+            login: Función sin argumentos que inicia sesión en driver y devuelve True si lo consigue
+        """
+        cookies = self.valid_cookies(site, check_url, expired)
+        if cookies:
+            load_driver_cookies(driver, check_url, cookies)
+            logger.info(f"✓ Sesión guardada de {site} reutilizada, sin login")
+            return True
+        if not login():
+            return False
+        self.save(site, driver.get_cookies())
+        return True
+
+    def fetcher_login(self, site, fetcher, check_url, login, expired=shows_login_form):
+        """
+        Como driver_login para un Fetcher (create_fetcher)
+
+        Args:
+            login: Función sin argumentos que inicia sesión y devuelve sus cookies (nombre -> valor) o None
+        """
+        cookies = self.valid_cookies(site, check_url, expired, fetcher.session.headers.get('User-Agent'))
+        if cookies:
+            fetcher.cookies.update({cookie['name']: cookie['value'] for cookie in cookies})
+            logger.info(f"✓ Sesión guardada de {site} reutilizada, sin login")
+            return True
+        cookies = login()
+        if cookies is None:
+            return False
+        fetcher.cookies.update(cookies)
+        self.save(site, cookies)
+        return True
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Descubrimiento incremental de páginas a partir de robots.txt y los sitemaps
+
+Lee las directivas Sitemap: de robots.txt (o /sitemap.xml si no hay), sigue
+los índices de sitemaps y descomprime los .xml.gz, y recorre cada fichero con
+iterparse sin cargarlo entero en memoria. Con <lastmod> se quedan solo las
+páginas modificadas desde la última ejecución correcta de ese sitio, de modo
+que una pasada incremental cuesta unas pocas descargas en lugar de recorrer
+todo el árbol de categorías.
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import unquote, urljoin, urlparse
+
+import requests
+
+from .urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(value):
+    """Convierte un <lastmod> (fecha W3C) en timestamp; None si no se puede leer
+
+    Una fecha sin hora se toma como el final de ese día para no descartar
+    cambios hechos después de la última ejecución del mismo día.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    date_only = len(value) == 10
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() + (86400 - 1 if date_only else 0)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_sitemap_entries(raw_data):
+    """Recorre un sitemap o índice de sitemaps y genera (tipo, loc, lastmod)
+
+    tipo es 'url' para páginas y 'sitemap' para sitemaps hijos de un índice.
+    """
+    stream = io.BytesIO(raw_data)
+    if raw_data[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    for _, element in ET.iterparse(stream, events=('end',)):
+        kind = _local_name(element.tag)
+        if kind not in ('url', 'sitemap'):
+            continue
+        loc, lastmod = '', None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(child.text)
+        element.clear()
+        if loc:
+            yield kind, loc, lastmod
+
+
+class SitemapDiscovery:
+    def __init__(self, fetcher, state_file='.sitemap_state.json'):
+        """
+        Args:
+            fetcher: Fetcher con el que se descargan robots.txt y los sitemaps
+            state_file: Fichero JSON con la hora de la última ejecución correcta por sitio
+        """
+        self.fetcher = fetcher
+        self.state_file = state_file
+        self.stats = {'sitemaps': 0, 'skipped_sitemaps': 0, 'urls': 0, 'changed': 0}
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def last_run(self, base_url):
+        """Timestamp de inicio de la última ejecución correcta del sitio, o None"""
+        return self._load_state().get(urlparse(base_url).netloc)
+
+    def mark_success(self, base_url, started_at):
+        """Guarda started_at como referencia para la siguiente pasada incremental"""
+        state = self._load_state()
+        state[urlparse(base_url).netloc] = started_at
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+
+    def _download(self, url):
+        # max_age=0: los sitemaps siempre se revalidan (un 304 sale casi gratis)
+        try:
+            return self.fetcher.get(url, max_age=0).content
+        except requests.RequestException as e:
+            logger.warning(f"No se pudo descargar {url}: {e}")
+            return None
+
+    def sitemap_urls(self, base_url):
+        """Sitemaps declarados en robots.txt, o /sitemap.xml si no declara ninguno"""
+        robots = self._download(urljoin(base_url, '/robots.txt'))
+        sitemaps = []
+        if robots:
+            for line in robots.decode('utf-8', errors='replace').splitlines():
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'sitemap' and value.strip():
+                    sitemaps.append(value.strip())
+        return sitemaps or [urljoin(base_url, '/sitemap.xml')]
+
+    def iter_urls(self, sitemap_url, since=None, _seen=None):
+        """Genera (loc, lastmod) de un sitemap siguiendo los índices
+
+        Los sitemaps hijos cuyo lastmod es anterior a since no se descargan.
+        """
+        seen = _seen if _seen is not None else set()
+        if sitemap_url in seen:
+            return
+        seen.add(sitemap_url)
+
+        raw_data = self._download(sitemap_url)
+        if not raw_data:
+            return
+        self.stats['sitemaps'] += 1
+        try:
+            for kind, loc, lastmod in iter_sitemap_entries(raw_data):
+                if kind == 'sitemap':
+                    if since is not None and lastmod is not None and lastmod <= since:
+                        self.stats['skipped_sitemaps'] += 1
+                        continue
+                    yield from self.iter_urls(loc, since, seen)
+                else:
+                    self.stats['urls'] += 1
+                    yield loc, lastmod
+        except ET.ParseError as e:
+            logger.warning(f"Sitemap no válido {sitemap_url}: {e}")
+
+    def changed_urls(self, base_url, since=None):
+        """URLs del sitio modificadas desde since (por defecto, la última ejecución correcta)
+
+        Las entradas sin lastmod se incluyen siempre. Genera cada URL canónica
+        una sola vez.
+        """
+        if since is None:
+            since = self.last_run(base_url)
+        if since is None:
+            logger.info("Sin ejecución previa: se toman todas las URLs del sitemap")
+        else:
+            logger.info(f"Buscando cambios desde {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(since))}")
+
+        emitted = set()
+        for sitemap_url in self.sitemap_urls(base_url):
+            for loc, lastmod in self.iter_urls(sitemap_url, since):
+                if since is not None and lastmod is not None and lastmod <= since:
+                    continue
+                key = canonicalize_url(loc)
+                if key in emitted:
+                    continue
+                emitted.add(key)
+                self.stats['changed'] += 1
+                yield loc
+
+    def summary(self):
+        return (f"sitemap: {self.stats['sitemaps']} ficheros leídos, {self.stats['skipped_sitemaps']} sin cambios, "
+                f"{self.stats['changed']}/{self.stats['urls']} URLs modificadas")
+
+
+def category_from_url(url):
+    """Nombre legible a partir del último tramo de la ruta de una página de listado"""
+    slug = unquote(urlparse(url).path.rstrip('/').rsplit('/', 1)[-1])
+    return slug.replace('-', ' ').replace('_', ' ').strip().capitalize()
+
+
+def load_csv_items(filename):
+    """Filas de un CSV generado en una ejecución anterior (lista vacía si no existe)"""
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def merge_items(previous, changed, key='enlace_detalle', keep=('categoria',)):
+    """Actualiza las filas anteriores con los productos cambiados y añade los nuevos
+
+    Se comparan por la URL canónica de key. Los campos vacíos no pisan datos
+    anteriores y los de keep (p. ej. la categoría del árbol completo) se
+    conservan si ya tenían valor.
+    """
+    merged = [dict(row) for row in previous]
+    index = {canonicalize_url(row[key]): row for row in merged if row.get(key)}
+    for item in changed:
+        row = index.get(canonicalize_url(item[key])) if item.get(key) else None
+        if row is None:
+            merged.append(item)
+            if item.get(key):
+                index[canonicalize_url(item[key])] = item
+            continue
+        for field, value in item.items():
+            if value in ('', None, []) or (field in keep and row.get(field)):
+                continue
+            row[field] = value
+    return merged
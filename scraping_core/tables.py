@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Extracción en streaming de las filas de una tabla HTML grande
+
+Los listados de GeneraWeb traen 1000 filas por página dentro de un
+driver.page_source de varios MB. En lugar de construir el árbol del
+documento completo, se recorta el HTML de la tabla que interesa con una
+búsqueda de texto y se recorre con iterparse de lxml: cada <tr> se entrega
+en cuanto se cierra y se libera después de procesarlo, de modo que en
+memoria nunca hay más que la fila en curso.
+"""
+
+import io
+import re
+
+from lxml import etree
+
+_TABLE_TAG_RE = re.compile(r'<(/?)table\b[^>]*>', re.I)
+_CLASS_ATTR_RE = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.I)
+
+
+def _has_class_token(element, cls):
+    return cls in (element.get('class') or '').split()
+
+
+def extract_table_html(html_content, table_class='table'):
+    """HTML de la primera <table> cuya clase contiene table_class, o None si no hay
+
+    Equivale a soup.find('table', class_=table_class) sin parsear el resto
+    del documento; las tablas anidadas quedan dentro del fragmento.
+    """
+    start, depth = None, 0
+    for match in _TABLE_TAG_RE.finditer(html_content):
+        closing = match.group(1) == '/'
+        if start is None:
+            if closing:
+                continue
+            classes = _CLASS_ATTR_RE.search(match.group(0))
+            if classes and table_class in ''.join(value for value in classes.groups() if value).split():
+                start, depth = match.start(), 1
+            continue
+        depth += -1 if closing else 1
+        if depth == 0:
+            return html_content[start:match.end()]
+    # Tabla sin cerrar (página cortada): el parser cierra lo que falte
+    return html_content[start:] if start is not None else None
+
+
+def iter_table_rows(table_html, row_class=None):
+    """Genera los <tr> (elementos de lxml) de la tabla, liberando cada uno al pedir el siguiente
+
+    Solo se entregan las filas de la propia tabla, no las de tablas anidadas
+    en sus celdas. Los datos de la fila deben extraerse antes de avanzar.
+
+    Args:
+        table_html: HTML de la tabla (ver extract_table_html)
+        row_class: Clase que deben tener las filas (None = todas)
+    """
+    source = io.BytesIO(table_html.encode('utf-8'))
+    for _, row in etree.iterparse(source, events=('end',), tag='tr', html=True, encoding='utf-8'):
+        if sum(1 for _ in row.iterancestors('table')) != 1:
+            continue
+        if row_class is None or _has_class_token(row, row_class):
+            yield row
+        # Liberar la fila y las anteriores ya procesadas
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+
+def find_with_class(element, tag, cls):
+    """Descendientes tag con la clase cls (como element.find_all(tag, class_=cls) de BeautifulSoup)"""
+    return [child for child in element.iter(tag) if child is not element and _has_class_token(child, cls)]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Canonicalización de URLs para identificar un mismo recurso durante un crawl
+
+Dos enlaces que solo difieren en el orden de los parámetros, el fragmento,
+parámetros de seguimiento (utm_*, gclid...), mayúsculas del host, el puerto
+por defecto o la barra final se consideran la misma página.
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', 'srsltid',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_')
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """Forma canónica de una URL: clave para deduplicar y compartir descargas"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+    params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+              if not is_tracking_param(name)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(params)), ''))
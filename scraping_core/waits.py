@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Esperas por condición para los scrapers de Selenium
+
+Los scrapers esperaban con pausas fijas (time.sleep de 2 a 8 segundos) tras
+cada navegación, aunque la página hubiera cargado en 300 ms. PageWaits
+sustituye cada pausa por una condición que se comprueba cada poll segundos
+hasta un timeout:
+
+    ready       document.readyState === 'complete' (y no en about:blank)
+    present     hay algún elemento con el selector CSS
+    stable      el número de elementos del selector no cambia durante stable_ms
+    new_page    tras una acción (clic, envío) se ha cargado una página nueva
+
+Las condiciones se evalúan con execute_script, sin depender de las clases
+de espera de Selenium. Cada espera guarda lo que tardó de verdad, de modo
+que summary() muestra la distribución real de tiempos de carga por tipo de
+espera y cuántas agotaron el timeout.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_READY_JS = "return document.readyState === 'complete' && location.href !== 'about:blank';"
+_COUNT_JS = "return document.querySelectorAll(arguments[0]).length;"
+# Marca en window: desaparece cuando el navegador carga otro documento
+_MARK_JS = "window.__pageWaitsMark = true;"
+_NEW_PAGE_JS = "return !window.__pageWaitsMark && document.readyState === 'complete';"
+
+
+class PageWaits:
+    def __init__(self, timeout=15, poll=0.1):
+        """
+        Args:
+            timeout: Segundos máximos de cada espera si no se indica otro
+            poll: Segundos entre comprobaciones de la condición
+        """
+        self.timeout = timeout
+        self.poll = poll
+        self.durations = defaultdict(list)
+        self.timeouts = defaultdict(int)
+        # Los navegadores de un DriverPool pueden compartir las mismas esperas
+        self._lock = threading.Lock()
+
+    def _record(self, name, start, ok):
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.durations[name].append(elapsed)
+            if not ok:
+                self.timeouts[name] += 1
+        if not ok:
+            logger.warning(f"Espera '{name}' agotada tras {elapsed:.1f}s")
+
+    def _until(self, name, condition, timeout):
+        """Comprueba condition() hasta que devuelva algo verdadero o se agote el timeout"""
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        while True:
+            try:
+                result = condition()
+            except Exception:
+                # Página a medio cargar o ventana cambiando: se vuelve a intentar
+                result = None
+            if result or time.monotonic() >= deadline:
+                self._record(name, start, bool(result))
+                return result
+            time.sleep(self.poll)
+
+    def ready(self, driver, timeout=None):
+        """Espera a que el documento esté cargado; True si lo está antes del timeout"""
+        return bool(self._until('ready', lambda: driver.execute_script(_READY_JS), timeout))
+
+    def present(self, driver, selector, timeout=None):
+        """Espera a que haya algún elemento con el selector CSS; True si aparece"""
+        return bool(self._until('present', lambda: driver.execute_script(_COUNT_JS, selector), timeout))
+
+    def stable(self, driver, selector, stable_ms=500, min_count=1, timeout=None):
+        """
+        Espera a que el número de elementos del selector deje de cambiar
+
+        Sirve para tablas y listados que se van rellenando: se da por cargado
+        cuando hay al menos min_count elementos y el número no ha variado en
+        stable_ms milisegundos. Devuelve el último número de elementos visto.
+        """
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def settled():
+            count = driver.execute_script(_COUNT_JS, selector)
+            now = time.monotonic()
+            if count != state['count']:
+                state['count'], state['since'] = count, now
+                return False
+            return count >= min_count and (now - state['since']) * 1000 >= stable_ms
+
+        self._until('stable', settled, timeout)
+        return max(state['count'], 0)
+
+    def new_page(self, driver, action, timeout=None):
+        """Ejecuta action() (un clic, un envío...) y espera a que cargue la página siguiente"""
+        driver.execute_script(_MARK_JS)
+        action()
+        return bool(self._until('new_page', lambda: driver.execute_script(_NEW_PAGE_JS), timeout))
+
+    def summary(self):
+        """Tiempo real de cada tipo de espera: mediana, p90, máximo y timeouts"""
+        parts = []
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+        for name, ordered in durations.items():
+            median = ordered[len(ordered) // 2]
+            p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+            parts.append(f"{name}: {len(ordered)} esperas, mediana {median:.2f}s, p90 {p90:.2f}s, "
+                         f"máx {ordered[-1]:.2f}s, {self.timeouts[name]} timeouts")
+        return 'esperas: ' + ('; '.join(parts) if parts else 'ninguna')
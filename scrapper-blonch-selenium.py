@@ -7,18 +7,15 @@ URL: https://www.bombasbloch.com/productos
 """
 
 import csv
-import time
 import logging
 from urllib.parse import urljoin
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
 
+from scraping_core import AdaptiveRateLimiter, PageWaits
+from scraping_core.chrome import create_scraping_driver
+
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -29,23 +26,16 @@ class BombasBlochSeleniumScraper:
         self.productos_url = urljoin(base_url, "/productos")
         self.driver = None
         self.headless = headless
+        # Ritmo por host ajustado según el TTFB de cada página (sustituye a las pausas fijas)
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=2.0, max_rate=8.0)
+        # Esperas por condición en lugar de pausas fijas; registra lo que tarda cada carga
+        self.waits = PageWaits()
         
     def init_driver(self):
         """Inicializa el driver de Selenium"""
         try:
-            chrome_options = Options()
-            
-            if self.headless:
-                chrome_options.add_argument('--headless')
-            
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            # Intentar inicializar el driver
-            self.driver = webdriver.Chrome(options=chrome_options)
+            # Perfil ligero: headless nuevo, sin imágenes, fuentes, CSS ni analítica
+            self.driver = create_scraping_driver(headless=self.headless)
             logger.info("✓ Driver de Chrome inicializado correctamente")
             return True
             
@@ -64,13 +54,10 @@ class BombasBlochSeleniumScraper:
     def get_page_with_wait(self, url, wait_time=10):
         """Obtiene una página y espera a que cargue el contenido"""
         try:
-            self.driver.get(url)
-            time.sleep(2)  # Espera inicial para que cargue JavaScript
+            self.rate_limiter.navigate(self.driver, url)
             
-            # Esperar a que el contenido principal cargue
-            WebDriverWait(self.driver, wait_time).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Esperar a que el JavaScript termine de pintar el contenido: el número de enlaces deja de cambiar
+            self.waits.stable(self.driver, 'body a[href]', stable_ms=300, timeout=wait_time)
             
             return self.driver.page_source
             
@@ -335,15 +322,14 @@ class BombasBlochSeleniumScraper:
                     if get_details and item.get('enlace_detalle'):
                         detailed_info = self.extract_detailed_product_info(item['enlace_detalle'])
                         item.update(detailed_info)
-                        time.sleep(0.5)  # Pausa entre producto y producto
                     
                     all_items.append(item)
-                
-                time.sleep(1)  # Pausa entre categorías
             
             return all_items
             
         finally:
+            if self.waits.durations:
+                logger.info(self.waits.summary())
             self.close_driver()
     
     def save_to_csv(self, items, filename='catalogo_bombas_bloch_selenium.csv'):
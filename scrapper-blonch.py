@@ -5,101 +5,142 @@ Web Scraper para extraer información completa del catálogo de Bombas Bloch
 URL: https://www.bombasbloch.com/productos
 """
 
-import base64
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+from bs4 import SoupStrainer
 import csv
 import time
 import os
+import sys
+from functools import partial
 from urllib.parse import urljoin, urlparse
 import logging
-import gzip
-import zlib
-import chardet
-import brotli
+
+from scraping_core import (AsyncFetchEngine, ParsePool, SelectorStats, SitemapDiscovery, canonicalize_url,
+                           category_from_url, ParsedPage, create_fetcher, href_contains, load_csv_items, merge_items)
+from scraping_core.multiselect import SelectorSet
+from scraping_core.schema import (Field, ItemSchema, absolute_url, detail_link, element_text, file_name,
+                                  truncate)
 
 # Configuración del logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class BombasBlochScraper:
-    def __init__(self, base_url="https://www.bombasbloch.com"):
+    # Ruta común de las páginas de listado de categorías
+    LISTING_PATH = '/productos/Catalog/listing/'
+    # Filtro compartido: al ser el mismo objeto, ParsedPage memoriza sus búsquedas
+    LISTING_HREF = href_contains(LISTING_PATH)
+    # Subárbol que se construye cuando extract_categories parsea la página por su cuenta
+    CATEGORY_STRAINER = SoupStrainer('a', href=LISTING_HREF)
+    
+    # Productos/categorías en <li id="cid_..."|"iid_...">; si no hay, estructuras genéricas
+    ITEM_SCHEMA = ItemSchema(
+        items=['li[id^=cid_|iid_]', '.item_prod', '.product-item', '.product', '.product-card',
+               '.grid-item', '.collection-item'],
+        fields=[
+            # El id del elemento sirve de código hasta encontrar uno mejor
+            Field('codigo', '. @id'),
+            Field('sku', '. @id'),
+            # Título y enlace en h3 > a; si no, h2 o un elemento con clase title/name
+            Field('titulo', ['h3 / a', 'h3']),
+            Field('enlace_detalle', 'h3 / a @href', post=detail_link),
+            Field('titulo', ['h2 / a', 'h2', '[class*=title|name i] / a', '[class*=title|name i]'],
+                  unless=['titulo']),
+            Field('enlace_detalle', 'a[href] @href', post=detail_link, unless=['enlace_detalle']),
+            Field('url_imagen_principal', 'img @src|data-src|data-lazy-src|data-original', post=absolute_url),
+            Field('imagen_principal', 'img @src|data-src|data-lazy-src|data-original', post=file_name),
+            Field('precio_oferta', '[class*=price i] / [class*=sale|offer i]'),
+            Field('precio_regular', '[class*=price i] / [class*=regular i]'),
+            Field('precio', '[class*=price i]', unless=['precio_oferta', 'precio_regular']),
+            Field('sku', ['[class*=sku|code|ref i]', '. @data-product-id|data-id|data-sku']),
+            Field('codigo', ['[class*=sku|code|ref i]', '. @data-product-id|data-id|data-sku']),
+            Field('descripcion_corta', '[class*=description|excerpt i]', post=truncate(200)),
+            Field('categoria', '[class*=category|cat i]'),
+            Field('stock', '[class*=stock|availability i]'),
+        ],
+        defaults={
+            'titulo': '', 'codigo': '', 'sku': '', 'imagen_principal': '', 'url_imagen_principal': '',
+            'precio': '', 'precio_regular': '', 'precio_oferta': '', 'enlace_detalle': '',
+            'descripcion_corta': '', 'categoria': '', 'stock': '',
+        },
+    )
+    
+    def __init__(self, base_url="https://www.bombasbloch.com", max_concurrency=32, max_per_host=4, offline=False, cache_dir='.http_cache', dead_letter_file='dead_letters.jsonl', selector_stats_file='.selector_stats.json', parse_workers=None):
         self.base_url = base_url
         self.productos_url = urljoin(base_url, "/productos")
-        self.session = requests.Session()
-        # Desactivar verificación SSL para certificados auto-firmados
-        self.session.verify = False
-        # Headers para parecer un navegador real
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Núcleo de descarga compartido: caché, limitador, reintentos y decodificación.
+        # verify=False por los certificados auto-firmados del sitio
+        self.fetcher = create_fetcher(verify=False, offline=offline, cache_dir=cache_dir, dead_letter_file=dead_letter_file)
+        # Motor asíncrono que ejecuta get_page_content con límites de concurrencia
+        self.fetch_engine = AsyncFetchEngine(self.get_page_content, max_concurrency, max_per_host)
+        # Aciertos de los selectores de reserva en este sitio, guardados entre ejecuciones
+        self.selector_stats = SelectorStats(selector_stats_file)
+        self.site_selector_stats = self.selector_stats.for_site(base_url)
+        # Procesos que parsean listados y fichas mientras se sigue descargando (None = en el event loop)
+        self.parse_workers = parse_workers
+        self.parse_pool = None
         
     def get_page_content(self, url):
         """Obtiene el contenido HTML real (descomprimido y decodificado correctamente)."""
-        try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-
-            raw_data = response.content
-
-            # --- 1️⃣ Detectar compresión ---
-            content_encoding = response.headers.get('Content-Encoding', '').lower()
-
-            if 'gzip' in content_encoding:
-                try:
-                    raw_data = gzip.decompress(raw_data)
-                except Exception:
-                    pass  # algunos servidores ya lo descomprimen automáticamente
-
-            elif 'deflate' in content_encoding:
-                try:
-                    raw_data = zlib.decompress(raw_data)
-                except Exception:
-                    pass
-            elif 'br' in content_encoding:
-                try:
-                    raw_data = brotli.decompress(raw_data)
-                except Exception:
-                    pass
-
-            # --- 2️⃣ Detectar si el cuerpo parece base64 ---
-            try:
-                if all(c.isalnum() or c in '+/=\n\r' for c in raw_data.decode('ascii', errors='ignore')[:200]):
-                    decoded = base64.b64decode(raw_data)
-                    logger.info("Contenido decodificado de base64")
-                    if b'<html' in decoded.lower():
-                        raw_data = decoded
-            except Exception:
-                pass
-
-            # --- 3️⃣ Detectar codificación de texto ---
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding') or response.apparent_encoding or 'utf-8'
-
-            html = raw_data.decode(encoding, errors='replace')
-
-            return html
+        return self.fetcher.get_html(url)
+    
+    async def get_page_content_async(self, url):
+        """Versión awaitable de get_page_content sobre el motor asíncrono"""
+        return await self.fetch_engine.fetch(url)
+    
+    def worker_state(self):
+        """Contadores de selectores anotados en un proceso de parseo, para sumarlos en el principal"""
+        return self.selector_stats.take_delta()
+    
+    def open_parse_pool(self):
+        """Arranca el pool de parseo si se pidieron procesos; cada uno crea su propio scraper sin caché"""
+        if self.parse_workers and self.parse_pool is None:
+            factory = partial(type(self), base_url=self.base_url, cache_dir=None,
+                              selector_stats_file=self.selector_stats.state_file)
+            self.parse_pool = ParsePool(factory, self.parse_workers, on_state=self.selector_stats.merge)
+    
+    def close_parse_pool(self):
+        if self.parse_pool is not None:
+            logger.info(self.parse_pool.summary())
+            self.parse_pool.close()
+            self.parse_pool = None
+    
+    async def parse_async(self, method, *args):
+        """Ejecuta el extractor method en el pool de parseo, o aquí mismo si no hay pool"""
+        if self.parse_pool is None:
+            return getattr(self, method)(*args)
+        return await self.parse_pool.run(method, *args)
+    
+    async def extract_catalog_items_async(self, html_content):
+        """extract_catalog_items a través del pool de parseo (para fetch_parsed)"""
+        return await self.parse_async('extract_catalog_items', html_content)
+    
+    async def retry_dead_letters_async(self):
+        """Reintenta las URLs de este sitio que fallaron en ejecuciones anteriores
 
-        except requests.RequestException as e:
-            logger.error(f"Error al acceder a {url}: {e}")
-            return None
+        Las que se recuperan quedan en la caché, así que el crawl posterior no
+        vuelve a descargarlas; las que fallan de nuevo vuelven a la lista.
+        """
+        if self.fetcher.cache is not None and self.fetcher.cache.offline:
+            return
+        pending = self.fetcher.dead_letters.take(urlparse(self.base_url).netloc)
+        if not pending:
+            return
+        logger.info(f"Reintentando {len(pending)} URLs fallidas en ejecuciones anteriores")
+        results = await self.fetch_engine.fetch_all([entry['url'] for entry in pending])
+        logger.info(f"✓ Recuperadas {sum(1 for html in results if html)}/{len(pending)} URLs")
     
     def extract_categories(self, html_content):
-        """Extrae las categorías de productos desde la página principal"""
+        """Extrae las categorías de productos desde la página principal (HTML o ParsedPage)"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        page = ParsedPage.of(html_content, self.CATEGORY_STRAINER)
         categories = []
         
         # Buscar enlaces de categorías en la estructura de Bombas Bloch
         # La estructura es: <li id="ecommerce"><a href="/productos/Catalog/listing/...">
-        category_links = soup.find_all('a', href=lambda x: x and '/productos/Catalog/listing/' in x)
+        category_links = page.find_all('a', href=self.LISTING_HREF)
         
         for link in category_links:
             category_name = link.get_text(strip=True)
@@ -115,176 +156,59 @@ class BombasBlochScraper:
         return categories
     
     def extract_catalog_items(self, html_content):
-        """Extrae los elementos del catálogo desde el HTML - específico para Bombas Bloch"""
+        """Extrae los elementos del catálogo desde el HTML o ParsedPage - específico para Bombas Bloch"""
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        items = []
-        
-        # Buscar productos/categorías en la estructura específica de Bombas Bloch
-        # Los elementos están en <li> con id que empieza con "cid_" o "iid_"
-        product_items = soup.find_all('li', id=lambda x: x and (x.startswith('cid_') or x.startswith('iid_')))
-        
-        if product_items:
-            logger.info(f"Encontrados {len(product_items)} elementos en la página")
+        items = self.ITEM_SCHEMA.extract(ParsedPage.of(html_content).tree, self.base_url, self.site_selector_stats)
+        if items:
+            logger.info(f"Encontrados {len(items)} elementos en la página")
         else:
-            # Fallback: buscar otras estructuras posibles
-            product_selectors = [
-                '.item_prod',
-                '.product-item',
-                '.product',
-                '.product-card',
-                '.grid-item',
-                '.collection-item'
-            ]
-            
-            for selector in product_selectors:
-                product_items = soup.select(selector)
-                if product_items:
-                    logger.info(f"Encontrados {len(product_items)} productos usando selector: {selector}")
-                    break
-        
-        if not product_items:
             logger.warning("No se encontraron productos con los selectores predefinidos")
         
-        for item_element in product_items:
-            item_data = self.extract_item_data(item_element)
-            if item_data and (item_data['titulo'] or item_data['imagen_principal']):
-                items.append(item_data)
-        
-        return items
+        return [item for item in items if item['titulo'] or item['imagen_principal']]
     
-    def extract_item_data(self, element):
-        """Extrae título, imagen, código y enlace de un elemento del catálogo"""
-        item = {
-            'titulo': '',
-            'codigo': '',
-            'sku': '',
-            'imagen_principal': '',
-            'url_imagen_principal': '',
-            'precio': '',
-            'precio_regular': '',
-            'precio_oferta': '',
-            'enlace_detalle': '',
-            'descripcion_corta': '',
-            'categoria': '',
-            'stock': ''
-        }
-        
-        try:
-            # Extraer ID del elemento como código
-            element_id = element.get('id', '')
-            if element_id:
-                item['codigo'] = element_id
-                item['sku'] = element_id
-            
-            # Extraer título - buscar en h3 > a (estructura de Bombas Bloch)
-            title_elem = element.find('h3')
-            if title_elem:
-                link = title_elem.find('a')
-                if link:
-                    item['titulo'] = link.get_text(strip=True)
-                    href = link.get('href')
-                    if href and not href.startswith('#'):
-                        item['enlace_detalle'] = urljoin(self.base_url, href)
-                else:
-                    item['titulo'] = title_elem.get_text(strip=True)
-            
-            # Si no hay h3, buscar en h2 o elementos con clase title
-            if not item['titulo']:
-                title_elem = (
-                    element.find('h2') or 
-                    element.find(class_=lambda x: x and ('title' in x.lower() or 'name' in x.lower()))
-                )
-                if title_elem:
-                    link = title_elem.find('a')
-                    if link:
-                        item['titulo'] = link.get_text(strip=True)
-                    else:
-                        item['titulo'] = title_elem.get_text(strip=True)
-            
-            # Si aún no hay enlace, buscar el primer enlace del elemento
-            if not item['enlace_detalle']:
-                link_elem = element.find('a', href=True)
-                if link_elem:
-                    href = link_elem.get('href')
-                    if href and not href.startswith('#'):
-                        item['enlace_detalle'] = urljoin(self.base_url, href)
-            
-            # Extraer imagen principal
-            img_elem = element.find('img')
-            if img_elem:
-                # Intentar obtener la imagen de varias fuentes posibles
-                img_src = (
-                    img_elem.get('src') or 
-                    img_elem.get('data-src') or 
-                    img_elem.get('data-lazy-src') or
-                    img_elem.get('data-original')
-                )
-                
-                if img_src:
-                    # Asegurar URL completa
-                    full_img_url = urljoin(self.base_url, img_src)
-                    item['url_imagen_principal'] = full_img_url
-                    # Extraer solo el nombre del archivo
-                    item['imagen_principal'] = img_src.split('/')[-1].split('?')[0]
-            
-            # Extraer precio
-            price_elem = element.find(class_=lambda x: x and 'price' in x.lower())
-            if price_elem:
-                # Buscar precio de oferta
-                sale_price = price_elem.find(class_=lambda x: x and ('sale' in x.lower() or 'offer' in x.lower()))
-                if sale_price:
-                    item['precio_oferta'] = sale_price.get_text(strip=True)
-                
-                # Buscar precio regular
-                regular_price = price_elem.find(class_=lambda x: x and 'regular' in x.lower())
-                if regular_price:
-                    item['precio_regular'] = regular_price.get_text(strip=True)
-                
-                # Si no hay separación, tomar el precio general
-                if not item['precio_oferta'] and not item['precio_regular']:
-                    item['precio'] = price_elem.get_text(strip=True)
-            
-            # Extraer SKU o código de producto
-            sku_elem = element.find(class_=lambda x: x and ('sku' in x.lower() or 'code' in x.lower() or 'ref' in x.lower()))
-            if sku_elem:
-                item['sku'] = sku_elem.get_text(strip=True)
-                item['codigo'] = sku_elem.get_text(strip=True)
-            else:
-                # Intentar extraer del data attribute
-                sku_attr = element.get('data-product-id') or element.get('data-id') or element.get('data-sku')
-                if sku_attr:
-                    item['sku'] = str(sku_attr)
-                    item['codigo'] = str(sku_attr)
-            
-            # Extraer descripción corta
-            desc_elem = element.find(class_=lambda x: x and ('description' in x.lower() or 'excerpt' in x.lower()))
-            if desc_elem:
-                item['descripcion_corta'] = desc_elem.get_text(strip=True)[:200]
-            
-            # Extraer categoría
-            cat_elem = element.find(class_=lambda x: x and ('category' in x.lower() or 'cat' in x.lower()))
-            if cat_elem:
-                item['categoria'] = cat_elem.get_text(strip=True)
-            
-            # Extraer estado de stock
-            stock_elem = element.find(class_=lambda x: x and ('stock' in x.lower() or 'availability' in x.lower()))
-            if stock_elem:
-                item['stock'] = stock_elem.get_text(strip=True)
-            
-            if item['titulo'] or item['imagen_principal']:
-                logger.info(f"Extraído producto: {item['titulo'][:50] if item['titulo'] else 'Sin título'} - SKU: {item['sku']}")
-            
-            return item
-            
-        except Exception as e:
-            logger.error(f"Error extrayendo datos del elemento: {e}")
-            return None
+    # Selectores de la ficha de producto, de más a menos prioritario; se resuelven
+    # todos en un solo recorrido del documento
+    DETAIL_SELECTORS = SelectorSet({
+        'galeria': [
+            '.product-gallery img',
+            '.product-images img',
+            '.gallery img',
+            '.slider img',
+            '[class*="gallery"] img',
+            '[class*="slider"] img',
+            '.product-image-gallery img',
+            '.thumbnails img',
+        ],
+        'descripcion': [
+            '.product-description',
+            '.product-content',
+            '[class*="description"]',
+            '#description',
+            '.description',
+            '.entry-content',
+            '.product-details',
+        ],
+        'especificaciones': [
+            '.product-specifications',
+            '.specifications',
+            '.technical-specs',
+            '#specifications',
+            '[class*="spec"]',
+        ],
+        'tablas': 'table[class*="attribute" i], table[class*="spec" i]',
+        'descarga': ', '.join(f'a[href*="{ext}" i]' for ext in ('.pdf', '.zip', '.doc', '.docx', '.xlsx')),
+    })
     
     def extract_detailed_product_info(self, product_url):
         """Extrae información detallada de la página individual del producto"""
+        logger.info(f"Obteniendo detalles de: {product_url}")
+        html_content = self.get_page_content(product_url)
+        return self.parse_detailed_product_info(html_content, product_url)
+    
+    def parse_detailed_product_info(self, html_content, product_url=''):
+        """Extrae la información detallada del HTML de la página de un producto"""
         detailed_info = {
             'imagenes_adicionales': [],
             'urls_imagenes_adicionales': [],
@@ -295,99 +219,55 @@ class BombasBlochScraper:
             'atributos': ''
         }
         
+        if not html_content:
+            return detailed_info
+        
         try:
-            logger.info(f"Obteniendo detalles de: {product_url}")
-            html_content = self.get_page_content(product_url)
-            if not html_content:
-                return detailed_info
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Extraer imágenes adicionales de galería
-            gallery_selectors = [
-                '.product-gallery img',
-                '.product-images img',
-                '.gallery img',
-                '.slider img',
-                '[class*="gallery"] img',
-                '[class*="slider"] img',
-                '.product-image-gallery img',
-                '.thumbnails img'
-            ]
-            
-            for selector in gallery_selectors:
-                images = soup.select(selector)
-                if images:
-                    for img in images:
-                        img_src = (
-                            img.get('src') or 
-                            img.get('data-src') or 
-                            img.get('data-large-image') or
-                            img.get('data-lazy-src')
-                        )
-                        if img_src:
-                            full_url = urljoin(self.base_url, img_src)
-                            if full_url not in detailed_info['urls_imagenes_adicionales']:
-                                detailed_info['urls_imagenes_adicionales'].append(full_url)
-                                detailed_info['imagenes_adicionales'].append(img_src.split('/')[-1].split('?')[0])
-                    if detailed_info['imagenes_adicionales']:
-                        break
-            
-            # Extraer descripción completa
-            desc_selectors = [
-                '.product-description',
-                '.product-content',
-                '[class*="description"]',
-                '#description',
-                '.description',
-                '.entry-content',
-                '.product-details'
-            ]
-            
-            for selector in desc_selectors:
-                desc_elem = soup.select_one(selector)
-                if desc_elem:
-                    detailed_info['descripcion_completa'] = desc_elem.get_text(strip=True)
+            matches = self.DETAIL_SELECTORS.match(ParsedPage.of(html_content).tree, self.site_selector_stats)
+            
+            # Imágenes adicionales: el primer selector de galería con imágenes utilizables
+            for index, images in enumerate(matches.candidates('galeria')):
+                for img in images:
+                    img_src = (
+                        img.get('src') or 
+                        img.get('data-src') or 
+                        img.get('data-large-image') or
+                        img.get('data-lazy-src')
+                    )
+                    if img_src:
+                        full_url = urljoin(self.base_url, img_src)
+                        if full_url not in detailed_info['urls_imagenes_adicionales']:
+                            detailed_info['urls_imagenes_adicionales'].append(full_url)
+                            detailed_info['imagenes_adicionales'].append(img_src.split('/')[-1].split('?')[0])
+                if detailed_info['imagenes_adicionales']:
+                    matches.used('galeria', index)
                     break
             
-            # Extraer especificaciones técnicas
-            specs_selectors = [
-                '.product-specifications',
-                '.specifications',
-                '.technical-specs',
-                '#specifications',
-                '[class*="spec"]'
-            ]
-            
-            for selector in specs_selectors:
-                specs_elem = soup.select_one(selector)
-                if specs_elem:
-                    detailed_info['especificaciones'] = specs_elem.get_text(strip=True)
-                    break
-            
-            # Extraer atributos del producto (tablas de especificaciones)
-            tables = soup.find_all('table', class_=lambda x: x and ('attribute' in x.lower() or 'spec' in x.lower()))
-            if tables:
-                attrs = []
-                for table in tables:
-                    rows = table.find_all('tr')
-                    for row in rows:
-                        cells = row.find_all(['th', 'td'])
-                        if len(cells) >= 2:
-                            key = cells[0].get_text(strip=True)
-                            value = cells[1].get_text(strip=True)
-                            attrs.append(f"{key}: {value}")
-                if attrs:
-                    detailed_info['atributos'] = '; '.join(attrs)
-            
-            # Extraer enlaces de descarga (PDF, catálogos, etc.)
-            download_links = soup.find_all('a', href=True)
-            for link in download_links:
-                href = link.get('href', '')
-                if any(ext in href.lower() for ext in ['.pdf', '.zip', '.doc', '.docx', '.xlsx']):
-                    detailed_info['url_archivo_descarga'] = urljoin(self.base_url, href)
-                    detailed_info['archivo_descarga'] = href.split('/')[-1]
-                    break
+            # Descripción completa y especificaciones técnicas
+            desc_elem = matches.first('descripcion')
+            if desc_elem is not None:
+                detailed_info['descripcion_completa'] = element_text(desc_elem)
+            
+            specs_elem = matches.first('especificaciones')
+            if specs_elem is not None:
+                detailed_info['especificaciones'] = element_text(specs_elem)
+            
+            # Atributos del producto (tablas de especificaciones); solo se recorren las tablas
+            attrs = []
+            for table in matches.all('tablas'):
+                for row in table.iter('tr'):
+                    cells = list(row.iter('th', 'td'))
+                    if len(cells) >= 2:
+                        attrs.append(f"{element_text(cells[0])}: {element_text(cells[1])}")
+            if attrs:
+                detailed_info['atributos'] = '; '.join(attrs)
+            
+            # Enlace de descarga (PDF, catálogos, etc.)
+            download = matches.first('descarga')
+            if download is not None:
+                href = download.get('href')
+                detailed_info['url_archivo_descarga'] = urljoin(self.base_url, href)
+                detailed_info['archivo_descarga'] = href.split('/')[-1]
             
             logger.info(f"Detalles extraídos: {len(detailed_info['imagenes_adicionales'])} imágenes adicionales, "
                        f"descripción: {'Sí' if detailed_info['descripcion_completa'] else 'No'}")
@@ -397,14 +277,79 @@ class BombasBlochScraper:
         
         return detailed_info
     
-    def scrape_catalog(self, get_details=True, max_categories=None):
-        """Función principal para hacer scraping del catálogo"""
+    def selector_report(self):
+        """Aciertos de cada selector de reserva en este sitio, marcando los que nunca aciertan"""
+        candidates = {'productos': self.ITEM_SCHEMA.items}
+        candidates.update(self.DETAIL_SELECTORS.groups)
+        return self.selector_stats.report(self.base_url, candidates)
+    
+    async def fetch_details_async(self, items, semaphore, details_by_url):
+        """Obtiene los detalles de los productos en paralelo manteniendo el orden.
+
+        Cada enlace_detalle se descarga una sola vez por ejecución; los
+        resultados se guardan en details_by_url y se combinan con los items
+        en el mismo orden en que aparecen en la lista.
+        """
+        pending_urls = []
+        for item in items:
+            url = item.get('enlace_detalle')
+            if url and url not in details_by_url and url not in pending_urls:
+                pending_urls.append(url)
+
+        async def fetch(url):
+            async with semaphore:
+                logger.info(f"Obteniendo detalles de: {url}")
+                html_content = await self.get_page_content_async(url)
+            return await self.parse_async('parse_detailed_product_info', html_content, url)
+
+        # gather devuelve los resultados en el orden de entrada
+        results = await asyncio.gather(*(fetch(url) for url in pending_urls))
+        for url, detailed_info in zip(pending_urls, results):
+            details_by_url[url] = detailed_info
+
+        for item in items:
+            if item.get('enlace_detalle'):
+                # Combinar información básica con detalles
+                item.update(details_by_url[item['enlace_detalle']])
+
+        return items
+
+    def limit_rate(self, requests_per_second):
+        """Empieza cada host a requests_per_second y no deja que el limitador adaptativo lo supere"""
+        self.fetcher.rate_limiter.initial_rate = requests_per_second
+        self.fetcher.rate_limiter.set_max_rate(requests_per_second)
+
+    def scrape_catalog(self, get_details=True, max_categories=None, max_workers=4, requests_per_second=2.0):
+        """Función principal para hacer scraping del catálogo
+
+        Args:
+            get_details: Si True, descarga la página de detalle de cada producto
+            max_categories: Limita el número de categorías a procesar
+            max_workers: Máximo de páginas de detalle descargándose a la vez
+            requests_per_second: Máximo de peticiones por segundo por host; el limitador
+                adaptativo empieza en él y lo reduce si el servidor se satura
+        """
+        self.open_parse_pool()
+        try:
+            items = asyncio.run(self.scrape_catalog_async(get_details, max_categories, max_workers, requests_per_second))
+        finally:
+            self.close_parse_pool()
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        self.selector_stats.save()
+        return items
+
+    async def scrape_catalog_async(self, get_details=True, max_categories=None, max_workers=4, requests_per_second=2.0):
+        """Variante asíncrona de scrape_catalog: categorías y detalles se descargan en paralelo"""
         all_items = []
+        start_time = time.monotonic()
+        self.limit_rate(requests_per_second)
+        await self.retry_dead_letters_async()
         
         logger.info(f"Iniciando scraping de: {self.productos_url}")
         
         # Obtener la página principal de productos
-        html_content = self.get_page_content(self.productos_url)
+        html_content = await self.get_page_content_async(self.productos_url)
         
         if not html_content:
             logger.error("No se pudo obtener el contenido de la página")
@@ -428,51 +373,40 @@ class BombasBlochScraper:
             categories = categories[:max_categories]
             logger.info(f"Limitando a las primeras {max_categories} categorías")
         
-        # Recorrer cada categoría y extraer los productos
-        for i, category in enumerate(categories, 1):
+        # Límite de detalles en curso; el ritmo por host lo marca el limitador adaptativo
+        semaphore = asyncio.Semaphore(max_workers)
+        details_by_url = {}
+        
+        # Descargar todas las categorías a la vez; cada una se parsea en cuanto llega
+        # (en el pool de parseo si lo hay) y se procesan en su orden original
+        category_pages = await asyncio.gather(*(
+            self.fetch_engine.fetch_parsed(category['url'], self.extract_catalog_items_async) for category in categories
+        ))
+        
+        for i, (category, items) in enumerate(zip(categories, category_pages), 1):
             logger.info("")
             logger.info(f"{'='*60}")
             logger.info(f"Procesando categoría {i}/{len(categories)}: {category['nombre']}")
             logger.info(f"{'='*60}")
             
-            # Obtener HTML de la categoría
-            category_html = self.get_page_content(category['url'])
-            
-            if not category_html:
+            if items is None:
                 logger.warning(f"No se pudo obtener contenido de: {category['nombre']}")
                 continue
             
-            # Extraer productos de esta categoría
-            items = self.extract_catalog_items(category_html)
-            
             if not items:
                 logger.warning(f"No se encontraron productos en: {category['nombre']}")
                 continue
             
             logger.info(f"✓ Encontrados {len(items)} productos en {category['nombre']}")
             
-            # Agregar categoría a cada producto
-            for item in items:
-                item['categoria'] = category['nombre']
-            
-            # Si se solicita, obtener información detallada de cada producto
-            if get_details:
-                for j, item in enumerate(items, 1):
-                    logger.info(f"  → Procesando producto {j}/{len(items)}: {item.get('titulo', 'Sin título')[:50]}")
-                    if item.get('enlace_detalle'):
-                        detailed_info = self.extract_detailed_product_info(item['enlace_detalle'])
-                        # Combinar información básica con detalles
-                        item.update(detailed_info)
-                        
-                        # Pausa entre solicitudes para ser respetuoso con el servidor
-                        time.sleep(1)
-                    
-                    all_items.append(item)
-            else:
-                all_items.extend(items)
-            
-            # Pausa entre categorías
-            time.sleep(1)
+            # Agregar categoría a cada producto (copias: el resultado del motor es compartido)
+            all_items.extend(dict(item, categoria=category['nombre']) for item in items)
+        
+        # Si se solicita, obtener información detallada de todos los productos
+        if get_details:
+            logger.info("")
+            logger.info(f"→ Obteniendo detalles de {len(all_items)} productos ({max_workers} en paralelo)")
+            await self.fetch_details_async(all_items, semaphore, details_by_url)
         
         # Eliminar duplicados basándose en el enlace o SKU
         logger.info("")
@@ -489,8 +423,76 @@ class BombasBlochScraper:
         
         logger.info(f"✓ Total de productos únicos: {len(unique_items)}")
         
+        elapsed = time.monotonic() - start_time
+        if elapsed > 0:
+            logger.info(f"⏱ {len(unique_items)} productos en {elapsed:.1f}s ({len(unique_items) / elapsed:.2f} productos/segundo)")
+        
         return unique_items
     
+    def scrape_sitemap(self, previous_items=(), get_details=True, max_workers=4, requests_per_second=2.0):
+        """Pasada incremental: solo las páginas del sitemap modificadas desde la última ejecución
+
+        Los listados cambiados aportan productos nuevos o actualizados; las
+        fichas de producto cambiadas solo se refrescan si ya estaban en
+        previous_items (la salida anterior). Devuelve los productos a combinar
+        con merge_items.
+        """
+        self.limit_rate(requests_per_second)
+        discovery = SitemapDiscovery(self.fetcher)
+        started_at = time.time()
+        urls = list(discovery.changed_urls(self.base_url))
+        logger.info(discovery.summary())
+        
+        known_urls = {canonicalize_url(row['enlace_detalle']) for row in previous_items if row.get('enlace_detalle')}
+        self.open_parse_pool()
+        try:
+            items, complete = asyncio.run(self.scrape_sitemap_async(urls, known_urls, get_details, max_workers))
+        finally:
+            self.close_parse_pool()
+        if complete:
+            discovery.mark_success(self.base_url, started_at)
+        else:
+            logger.warning("Hubo páginas sin descargar: la próxima pasada volverá a revisar estos cambios")
+        logger.info(self.fetcher.summary())
+        logger.info(self.fetch_engine.summary())
+        self.selector_stats.save()
+        return items
+    
+    async def scrape_sitemap_async(self, urls, known_urls, get_details=True, max_workers=4):
+        """Descarga los listados y fichas cambiados; devuelve (productos, si se descargó todo)"""
+        listing_urls = [url for url in urls if self.LISTING_PATH in url]
+        product_urls = [url for url in urls if canonicalize_url(url) in known_urls]
+        logger.info(f"→ {len(listing_urls)} listados y {len(product_urls)} fichas de producto modificados")
+        
+        pages = await asyncio.gather(*(
+            self.fetch_engine.fetch_parsed(url, self.extract_catalog_items_async) for url in listing_urls
+        ))
+        all_items = []
+        for url, items in zip(listing_urls, pages):
+            for item in items or []:
+                all_items.append(dict(item, categoria=category_from_url(url)))
+        
+        listed = {canonicalize_url(item['enlace_detalle']) for item in all_items if item.get('enlace_detalle')}
+        all_items.extend({'enlace_detalle': url} for url in product_urls if canonicalize_url(url) not in listed)
+        
+        if get_details:
+            await self.fetch_details_async(all_items, asyncio.Semaphore(max_workers), {})
+        
+        unique_items = []
+        seen_keys = set()
+        for item in all_items:
+            key = item.get('enlace_detalle') or item.get('sku') or item.get('titulo')
+            if item.get('enlace_detalle'):
+                key = canonicalize_url(key)
+            if key and key not in seen_keys:
+                unique_items.append(item)
+                seen_keys.add(key)
+            elif not key:
+                unique_items.append(item)
+        
+        logger.info(f"✓ {len(unique_items)} productos nuevos o modificados")
+        return unique_items, all(page is not None for page in pages)
+    
     def save_to_csv(self, items, filename='bombas_bloch_productos.csv'):
         """Guarda los elementos extraídos en un archivo CSV con toda la información"""
         if not items:
@@ -542,19 +544,40 @@ def main():
     logger.info("URL: https://www.bombasbloch.com/productos")
     logger.info("=" * 60)
     
-    scraper = BombasBlochScraper()
+    # --offline: reproduce la última ejecución desde la caché sin acceder a la red
+    offline = '--offline' in sys.argv
+    # --sitemap: solo revisa las páginas del sitemap modificadas desde la última ejecución
+    incremental = '--sitemap' in sys.argv
+    # --parse-pool: listados y fichas se parsean en un proceso por núcleo mientras continúan
+    # las descargas (solo compensa en crawls grandes con varios núcleos; por defecto se parsea aquí)
+    parse_workers = os.cpu_count() if '--parse-pool' in sys.argv else None
+    scraper = BombasBlochScraper(offline=offline, parse_workers=parse_workers)
+    
+    # --selector-report: muestra qué selectores de reserva aciertan en el sitio, sin descargar nada
+    if '--selector-report' in sys.argv:
+        for line in scraper.selector_report():
+            print(line)
+        return
     
     # Realizar scraping
     # Opciones:
     # - get_details=True: Extrae información detallada de cada producto (más lento pero completo)
     # - get_details=False: Solo extrae información básica (más rápido)
     # - max_categories=N: Limita el número de categorías a procesar (útil para pruebas)
+    # - max_workers=N: Hilos que descargan páginas de detalle en paralelo
+    # - requests_per_second=N: Máximo de peticiones por segundo por servidor (se reduce si se satura)
     
     # Para prueba rápida, usar: scraper.scrape_catalog(get_details=False, max_categories=2)
     # Para extracción completa, usar: scraper.scrape_catalog(get_details=True)
     
-    # Extraer las 11 categorías principales de Bombas Bloch
-    items = scraper.scrape_catalog(get_details=True, max_categories=11)
+    if incremental:
+        # Combinar los cambios con el CSV de la ejecución anterior
+        previous_items = load_csv_items('bombas_bloch_productos.csv')
+        changed_items = scraper.scrape_sitemap(previous_items, get_details=True, max_workers=4, requests_per_second=2.0)
+        items = merge_items(previous_items, changed_items)
+    else:
+        # Extraer las 11 categorías principales de Bombas Bloch
+        items = scraper.scrape_catalog(get_details=True, max_categories=11, max_workers=4, requests_per_second=2.0)
     
     if items:
         # Mostrar muestra de resultados